@@ -0,0 +1,87 @@
+"""
+Фиксированный семафор на 100 запросов против AdaptiveConcurrencyLimiter
+
+Локальный HTTP stub: задержка растет, когда одновременных запросов больше
+capacity, выше hard_limit - 429. Каждый запрос повторяется до 5 раз.
+
+python -m benchmarks.adaptive_limiter
+"""
+import asyncio
+import time
+
+from aiohttp import web, ClientSession, ClientResponseError
+
+from src.core.utils.adaptive_limiter import AdaptiveConcurrencyLimiter
+
+
+class Stub:
+    def __init__(self, capacity: int, hard_limit: int, latency: float) -> None:
+        self.capacity, self.hard_limit, self.latency = capacity, hard_limit, latency
+        self.inflight = 0
+
+    async def handle(self, request: web.Request) -> web.Response:
+        if self.inflight >= self.hard_limit:
+            return web.Response(status=429)
+
+        self.inflight += 1
+        try:
+            await asyncio.sleep(self.latency * max(1.0, self.inflight / self.capacity))
+        finally:
+            self.inflight -= 1
+
+        return web.json_response({"code": "200000", "data": []})
+
+
+async def run(limiter, url: str, total: int) -> tuple[float, int, int]:
+    errors = failed = 0
+
+    async with ClientSession() as session:
+        async def request():
+            nonlocal errors, failed
+            for _ in range(5):
+                try:
+                    async with limiter.slot() if isinstance(limiter, AdaptiveConcurrencyLimiter) else limiter:
+                        async with session.get(url) as response:
+                            response.raise_for_status()
+                            return await response.read()
+                except ClientResponseError:
+                    errors += 1
+                    await asyncio.sleep(0.05)
+
+            failed += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*[request() for _ in range(total)])
+
+    return time.perf_counter() - start, errors, failed
+
+
+async def scenario(title: str, capacity: int, hard_limit: int, latency: float, total: int = 800):
+    stub = Stub(capacity, hard_limit, latency)
+    app = web.Application()
+    app.router.add_get("/kline", stub.handle)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/kline"
+
+    fixed = await run(asyncio.Semaphore(100), url, total)
+    adaptive_limiter = AdaptiveConcurrencyLimiter(name=title)
+    adaptive = await run(adaptive_limiter, url, total)
+
+    await runner.cleanup()
+
+    print(f"{title}: fixed(100) {fixed[0]:.2f}s {fixed[1]} 429s {fixed[2]} failed | "
+          f"adaptive {adaptive[0]:.2f}s {adaptive[1]} 429s {adaptive[2]} failed, limit {adaptive_limiter.current_limit}, "
+          f"p50/p90/p99 " + "/".join(f"{v * 1000:.0f}" for v in adaptive_limiter.percentiles().values()) + " ms")
+
+
+async def main():
+    await scenario("slow", capacity=20, hard_limit=60, latency=0.05)
+    await scenario("fast", capacity=400, hard_limit=1000, latency=0.05)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,78 @@
+"""
+Стенд BackupStore: год дневных CSV + один растущий файл; полный zip против инкрементального бэкапа
+
+python -m benchmarks.backup_store
+"""
+from pathlib import Path
+import tempfile
+import time
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+from src.core.backup_store import BackupStore
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+
+    def day_frame(day: pd.Timestamp) -> pd.DataFrame:
+        close = 100 + np.cumsum(rng.normal(0, 0.5, 288))
+        return pd.DataFrame({"datetime": pd.date_range(day, periods=288, freq="5min"),
+                             "open": close, "close": close, "max": close + 1, "min": close - 1,
+                             "volume": rng.random(288) * 1e4})
+
+    def zip_backup(data_dir: Path, path: Path) -> None:
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zipf:
+            for file in data_dir.rglob("*"):
+                if file.is_file():
+                    zipf.write(file, arcname=file.relative_to(data_dir))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(tmp) / "data"
+        days = pd.date_range("2024-01-01", periods=365, freq="D")
+
+        for day in days:
+            path = data_dir / "processed" / "BTC" / "5m" / f"{day:%Y-%m-%d}.csv"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            day_frame(day).to_csv(path, index=False)
+
+        # Файл запуска пишется новыми свечами в начало (как save_dataset)
+        launch = data_dir / "raw" / "launch_parser_1" / "BTC" / "BTC_5m.csv"
+        launch.parent.mkdir(parents=True, exist_ok=True)
+        history = pd.concat([day_frame(day) for day in days[-60:]]).iloc[::-1]
+        history.to_csv(launch, index=False)
+
+        store = BackupStore(Path(tmp) / "backup", data_dir)
+
+        start = time.perf_counter()
+        zip_backup(data_dir, Path(tmp) / "full_1.zip")
+        zip_first = time.perf_counter() - start
+
+        start = time.perf_counter()
+        store.backup([data_dir])
+        incremental_first = time.perf_counter() - start
+
+        # День спустя: новый дневной файл и 288 свечей в начале файла запуска
+        new_day = days[-1] + pd.Timedelta(days=1)
+        day_frame(new_day).to_csv(data_dir / "processed" / "BTC" / "5m" / f"{new_day:%Y-%m-%d}.csv", index=False)
+        pd.concat([day_frame(new_day).iloc[::-1], history]).to_csv(launch, index=False)
+
+        start = time.perf_counter()
+        zip_backup(data_dir, Path(tmp) / "full_2.zip")
+        zip_second = time.perf_counter() - start
+
+        start = time.perf_counter()
+        manifest = store.backup([data_dir])
+        incremental_second = time.perf_counter() - start
+        stats = store.load_manifest(manifest)["stats"]
+
+        restored = store.restore(manifest, target=Path(tmp) / "restore")
+        assert all((data_dir / path.relative_to(Path(tmp) / "restore")).read_bytes() == path.read_bytes()
+                   for path in restored)
+
+        print(f"first backup: zip {zip_first:.2f}s, incremental {incremental_first:.2f}s")
+        print(f"next day: zip {zip_second:.2f}s, incremental {incremental_second:.2f}s "
+              f"({stats['files_changed']} of {stats['files']} files read, "
+              f"{stats['chunks_new']} of {stats['chunks']} chunks new, {stats['bytes_stored'] / 2**10:.0f} KiB stored)")
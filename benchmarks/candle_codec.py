@@ -0,0 +1,48 @@
+"""
+Стенд candle_codec: коэффициент сжатия относительно CSV / сырого float64 и скорость декодирования
+
+python -m benchmarks.candle_codec
+"""
+import io
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.core.candle_codec import CANDLE_COLUMNS, encode_candles, decode_candles
+
+
+if __name__ == "__main__":
+    rows = 2 * 365 * 288
+    rng = np.random.default_rng(0)
+    close = np.round(100 + np.cumsum(rng.normal(0, 0.05, rows)), 4)
+    candles = pd.DataFrame({
+        "datetime": pd.date_range("2023-01-01", periods=rows, freq="5min"),
+        "open": np.round(close + rng.normal(0, 0.01, rows), 4), "close": close,
+        "max": np.round(close + rng.random(rows) * 0.1, 4), "min": np.round(close - rng.random(rows) * 0.1, 4),
+        "volume": np.round(rng.random(rows) * 1e4, 2),
+    })
+    candles.loc[rng.choice(rows, 500, replace=False), list(CANDLE_COLUMNS[1:])] = np.nan
+
+    buffer = io.StringIO()
+    candles.to_csv(buffer, index=False)
+    csv_size, raw_size = len(buffer.getvalue().encode()), rows * 48
+
+    for name, values in (("decimal", candles), ("noisy floats", candles.assign(
+            **{column: candles[column] * np.pi for column in CANDLE_COLUMNS[1:]}))):
+        start = time.perf_counter()
+        block = encode_candles(values)
+        encode_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        decoded = decode_candles(block)
+        decode_time = time.perf_counter() - start
+
+        assert decoded["datetime"].equals(values["datetime"])
+        for column in CANDLE_COLUMNS[1:]:
+            assert np.array_equal(decoded[column].to_numpy(), values[column].to_numpy(), equal_nan=True)
+
+        print(f"{name}: {rows} candles, {len(block) / 2**20:.2f} MiB "
+              f"(x{csv_size / len(block):.1f} vs CSV, x{raw_size / len(block):.1f} vs float64), "
+              f"encode {encode_time * 1000:.0f} ms, decode {decode_time * 1000:.0f} ms "
+              f"({rows / decode_time / 1e6:.1f} M candles/s)")
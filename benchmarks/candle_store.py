@@ -0,0 +1,73 @@
+"""
+Стенд CandleStore: год свечей 5m, сброс по 50 свечей - CSV (как Dataset.save_dataset) против Parquet
+
+python -m benchmarks.candle_store
+"""
+from datetime import date, datetime
+from pathlib import Path
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.core.candle_store import CandleStore
+
+
+if __name__ == "__main__":
+    FLUSH, FLUSHES = 50, 20
+
+    rng = np.random.default_rng(0)
+    rows = 365 * 288 + FLUSH * FLUSHES
+    close = 100 + np.cumsum(rng.normal(0, 0.5, rows))
+    candles = pd.DataFrame({
+        "datetime": pd.date_range("2024-01-01", periods=rows, freq="5min"),
+        "open": close + rng.normal(0, 0.1, rows),
+        "close": close,
+        "max": close + rng.random(rows),
+        "min": close - rng.random(rows),
+        "volume": rng.random(rows) * 1e4,
+    })
+    history, tail = candles.iloc[:365 * 288], candles.iloc[365 * 288:]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = Path(tmp) / "BTC_5m.csv"
+        history.to_csv(csv_path, index=False)
+
+        csv_times = []
+        for i in range(FLUSHES):
+            chunk = tail.iloc[i * FLUSH:(i + 1) * FLUSH]
+            start_time = time.perf_counter()
+            saved = pd.read_csv(csv_path)
+            saved["datetime"] = pd.to_datetime(saved["datetime"])
+            pd.concat([chunk, saved]).drop_duplicates(subset=["datetime"]).to_csv(csv_path, index=False)
+            csv_times.append(time.perf_counter() - start_time)
+
+        store = CandleStore(Path(tmp) / "candles")
+        for _, day in history.groupby(history["datetime"].dt.floor("D")):
+            for i in range(0, len(day), FLUSH):
+                store.append("BTC", "5m", day.iloc[i:i + FLUSH])
+
+        parts_usage = store.disk_usage()
+        store.compact(before=date(2100, 1, 1))
+        compact_usage = store.disk_usage()
+
+        store_times = []
+        for i in range(FLUSHES):
+            chunk = tail.iloc[i * FLUSH:(i + 1) * FLUSH]
+            start_time = time.perf_counter()
+            store.append("BTC", "5m", chunk)
+            store_times.append(time.perf_counter() - start_time)
+
+        start_time = time.perf_counter()
+        week = store.read("BTC", "5m", start=datetime(2024, 6, 1), end=datetime(2024, 6, 7, 23, 59))
+        read_time = time.perf_counter() - start_time
+
+        assert len(store.read("BTC", "5m")) == rows
+        assert len(week) == 7 * 288
+
+        print(f"flush {FLUSH} candles: csv p50 {np.median(csv_times) * 1000:.1f} ms, "
+              f"parquet p50 {np.median(store_times) * 1000:.1f} ms")
+        print(f"disk: csv {csv_path.stat().st_size / 2**20:.1f} MiB, "
+              f"parquet parts {parts_usage / 2**20:.1f} MiB, compacted {compact_usage / 2**20:.1f} MiB")
+        print(f"read 1 week of {rows} candles: {read_time * 1000:.1f} ms")
@@ -0,0 +1,53 @@
+"""
+Стенд consensus_merge: сравнение с циклом check_dt_legacy и замер на 5 источниках по 100k свечей
+
+python -m benchmarks.consensus
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.core.utils.clear_datasets import check_dt_legacy
+from src.core.utils.consensus import CONSENSUS_COLUMNS, consensus_merge
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+
+    def sources(rows: int, count: int = 5) -> list[pd.DataFrame]:
+        base = pd.DataFrame({
+            "datetime": pd.date_range("2024-01-01", periods=rows, freq="5min"),
+            **{column: np.round(rng.random(rows) * 100, 2) for column in CONSENSUS_COLUMNS},
+        })
+
+        frames = []
+        for _ in range(count):
+            frame = base.copy()
+            noise = rng.random(rows) < 0.1
+            frame.loc[noise, "close"] += 0.01
+            frames.append(frame.sample(frac=0.95, random_state=int(rng.integers(1 << 31))))
+
+        return frames
+
+    small = sources(5_000)
+
+    start = time.perf_counter()
+    legacy = check_dt_legacy(small)
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result, report = consensus_merge(small)
+    elapsed = time.perf_counter() - start
+
+    legacy = legacy.sort_values("datetime", ignore_index=True)[result.columns]
+    assert legacy.equals(result)
+
+    print(f"5 x 5k rows: check_dt loop {legacy_time * 1000:.0f} ms, consensus_merge {elapsed * 1000:.0f} ms, "
+          f"disagreeing {len(report)}")
+
+    large = sources(100_000)
+    start = time.perf_counter()
+    result, report = consensus_merge(large)
+    print(f"5 x 100k rows: consensus_merge {(time.perf_counter() - start) * 1000:.0f} ms, "
+          f"agreed {len(result)}, disagreeing {len(report)}")
@@ -0,0 +1,34 @@
+"""
+Декодер свечей KuCoin: построчный разбор через DataFrame против decode_kline
+
+python -m benchmarks.kline_decoder
+"""
+from datetime import datetime
+from timeit import timeit
+
+import pandas as pd
+
+from src.core.utils.kline_decoder import SPOT_KLINE_COLUMNS, decode_kline
+
+
+def legacy_decode(payload: list) -> pd.DataFrame:
+    df = pd.DataFrame(payload, columns=list(SPOT_KLINE_COLUMNS)).drop("_", axis=1)
+    df["datetime"] = df["datetime"].apply(lambda x: datetime.fromtimestamp(int(x)))
+    df["datetime"] = pd.to_datetime(df["datetime"])
+    df["datetime"] = df["datetime"].dt.strftime('%Y-%m-%d %H:%M:%S')
+    df["volume"] = df["volume"].apply(float)
+    df["datetime"] = pd.to_datetime(df["datetime"], format='%Y-%m-%d %H:%M:%S')
+    return df
+
+
+if __name__ == "__main__":
+    now = int(datetime.now().timestamp())
+    payload = [[str(now - i * 300), "1.01", "1.02", "1.05", "0.99", "123.45", "124.5"]
+               for i in range(1500)]
+
+    number = 200
+    legacy = timeit(lambda: legacy_decode(payload), number=number) / number
+    columnar = timeit(lambda: decode_kline(payload).to_frame(), number=number) / number
+
+    print(f"1500 candles: legacy {legacy * 1000:.3f} ms, columnar {columnar * 1000:.3f} ms, "
+          f"x{legacy / columnar:.1f}")
@@ -0,0 +1,55 @@
+"""
+Стенд coerce_ohlcv: сравнение с str_to_float / convert_volume и замер на 1M строк
+
+python -m benchmarks.numeric
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.core.utils.clear_datasets import convert_volume, str_to_float
+from src.core.utils.numeric import coerce_ohlcv
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+
+    def sample(rows: int) -> pd.DataFrame:
+        price = np.round(rng.random(rows) * 1000, 2)
+        volume = np.round(rng.random(rows) * 999, 2)
+        data = pd.DataFrame({
+            "datetime": pd.date_range("2020-01-01", periods=rows, freq="5min"),
+            "open": pd.Series(price).map("{:,.2f}".format).str.replace(",", " ").str.replace(".", ","),
+            "close": price.astype(str), "max": price, "min": price.astype(str),
+            "volume": pd.Series(volume).astype(str) + rng.choice(["", "K", "M", "B"], rows),
+        })
+        data.loc[rng.choice(rows, rows // 1000, replace=False), "close"] = "x"
+        data.loc[rng.choice(rows, rows // 1000, replace=False), "min"] = "bad"
+        return data
+
+    data = sample(100_000)
+
+    start = time.perf_counter()
+    legacy = data.copy()
+    for column in ("open", "close", "max", "min"):
+        legacy[column] = legacy[column].apply(str_to_float)
+    legacy = convert_volume(legacy)
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result, valid, rejected = coerce_ohlcv(data)
+    elapsed = time.perf_counter() - start
+
+    assert np.allclose(result.loc[legacy.index, "volume"].to_numpy(), legacy["volume"].astype(float).to_numpy())
+    for column in ("open", "max"):
+        assert np.allclose(result[column].to_numpy(), legacy[column].astype(float).to_numpy())
+    assert set(rejected["row"]) == set(data.index[data["min"] == "bad"])
+
+    print(f"100k rows: legacy {legacy_time * 1000:.0f} ms, coerce_ohlcv {elapsed * 1000:.0f} ms "
+          f"(x{legacy_time / elapsed:.0f}), rejected {len(rejected)}")
+
+    data = sample(1_000_000)
+    start = time.perf_counter()
+    coerce_ohlcv(data)
+    print(f"1M rows: coerce_ohlcv {(time.perf_counter() - start) * 1000:.0f} ms")
@@ -0,0 +1,44 @@
+"""
+Стенд OHLCVMemmap: год свечей 5m - pd.read_csv + разбор datetime против memmap
+
+python -m benchmarks.ohlcv_memmap
+"""
+from pathlib import Path
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.core.ohlcv_memmap import OHLCVMemmap
+
+
+if __name__ == "__main__":
+    rows = 365 * 288
+    rng = np.random.default_rng(0)
+    close = 100 + np.cumsum(rng.normal(0, 0.5, rows))
+    candles = pd.DataFrame({
+        "datetime": pd.date_range("2024-01-01", periods=rows, freq="5min"),
+        "open": close, "close": close, "max": close + 1, "min": close - 1,
+        "volume": rng.random(rows) * 1e4,
+    })
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path, bin_path = Path(tmp) / "BTC_5m.csv", Path(tmp) / "BTC_5m.ohlcv"
+        candles.to_csv(csv_path, index=False)
+        OHLCVMemmap.write(bin_path, candles)
+
+        start_time = time.perf_counter()
+        data = pd.read_csv(csv_path)
+        data["datetime"] = pd.to_datetime(data["datetime"], format='%Y-%m-%d %H:%M:%S')
+        week = data[(data["datetime"] >= "2024-06-01") & (data["datetime"] < "2024-06-08")]
+        csv_time = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        week_bin = OHLCVMemmap(bin_path).to_frame("2024-06-01", "2024-06-07 23:55")
+        bin_time = time.perf_counter() - start_time
+
+        assert np.allclose(week["close"].to_numpy(), week_bin["close"].to_numpy())
+
+        print(f"1 week of {rows} candles: csv {csv_time * 1000:.1f} ms, memmap {bin_time * 1000:.2f} ms; "
+              f"size csv {csv_path.stat().st_size / 2**20:.1f} MiB, binary {bin_path.stat().st_size / 2**20:.1f} MiB")
@@ -0,0 +1,45 @@
+"""
+Буфер AttParser: CandleRingBuffer против DatasetTimeseries.append
+
+python -m benchmarks.ring_buffer
+"""
+from datetime import datetime
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+
+from src.core.models import CandleRingBuffer, DatasetTimeseries
+from src.core.models.ring_buffer import OHLCV_COLUMNS
+
+
+if __name__ == "__main__":
+    coins, timeframes, capacity, cycles = 500, ("5m", "15m", "1h"), 200, 20
+
+    now = pd.Timestamp(datetime.now()).floor("5min")
+    polls = [pd.DataFrame({"datetime": pd.date_range(end=now + pd.Timedelta(minutes=5 * i), periods=3, freq="5min"),
+                           **{column: np.random.rand(3) for column in OHLCV_COLUMNS}})
+             for i in range(cycles)]
+
+    buffers = {(coin, tf): CandleRingBuffer(capacity, tf) for coin in range(coins) for tf in timeframes}
+    frames = {key: DatasetTimeseries(polls[0].copy()) for key in buffers}
+
+    start = perf_counter()
+    for poll in polls:
+        for buffer in buffers.values():
+            buffer.append(poll)
+    ring = (perf_counter() - start) / (cycles * len(buffers))
+
+    start = perf_counter()
+    for poll in polls:
+        for frame in frames.values():
+            frame.append(poll)
+    legacy = (perf_counter() - start) / (cycles * len(frames))
+
+    memory = sum(buffer.nbytes for buffer in buffers.values())
+    legacy_memory = sum(frame.get_dataset().memory_usage(deep=True).sum() for frame in frames.values())
+
+    print(f"{coins} coins x {len(timeframes)} timeframes, capacity {capacity}")
+    print(f"append: ring {ring * 1e6:.1f} us, DatasetTimeseries.append {legacy * 1e6:.1f} us, x{legacy / ring:.1f}")
+    print(f"memory: ring {memory / 2**20:.1f} MiB (preallocated), DatasetTimeseries {legacy_memory / 2**20:.1f} MiB "
+          f"({cycles + 2} rows each)")
@@ -0,0 +1,35 @@
+"""
+Стенд rollup: проверка против pandas.resample и замер на годе свечей 5m
+
+python -m benchmarks.rollup
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.core.utils.rollup import rollup, OHLCV_COLUMNS
+
+
+if __name__ == "__main__":
+    rows = 365 * 288
+    rng = np.random.default_rng(0)
+    close = 100 + np.cumsum(rng.normal(0, 0.5, rows))
+    candles = pd.DataFrame({
+        "datetime": pd.date_range("2024-01-01", periods=rows, freq="5min"),
+        "open": close + rng.normal(0, 0.1, rows), "close": close,
+        "max": close + rng.random(rows), "min": close - rng.random(rows),
+        "volume": rng.random(rows) * 1e4,
+    }).sample(frac=1, random_state=0)
+
+    for timeframe, freq in (("15m", "15min"), ("1h", "1h"), ("4h", "4h"), ("1d", "1D")):
+        start = time.perf_counter()
+        result = rollup(candles, timeframe)
+        elapsed = time.perf_counter() - start
+
+        expected = (candles.set_index("datetime").sort_index()
+                    .resample(freq, origin="epoch")
+                    .agg({"open": "first", "close": "last", "max": "max", "min": "min", "volume": "sum"}))
+
+        assert np.allclose(result[list(OHLCV_COLUMNS)].to_numpy(), expected[list(OHLCV_COLUMNS)].to_numpy())
+        print(f"{timeframe}: {len(result)} candles from {rows} in {elapsed * 1000:.1f} ms")
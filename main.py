@@ -18,13 +18,14 @@ def print_help():
             --last_launch   : Parser last launch for save_type (default: 0)
             --clear         : Clear dataset for all coins (default: 0)
             --db_use        : Use database (default: 0)
+            --stream        : Stream candles over websocket, kucoin_api only (default: 0)
             --help          : Show this help message"""
           )
 
 
 async def start_parser(count: int, time_parser="1m", pause: float=1, mode="api", miss: bool = False,
                        last_launch: bool = False, clear: bool = False, save: bool = False, 
-                       db_use: bool = False, save_type: str = "raw"):
+                       db_use: bool = False, save_type: str = "raw", stream: bool = False):
     
     from src.handlers.att_parser import AttParser
     from src.handlers.parser_handler import Handler as HandlerParser
@@ -42,7 +43,8 @@ async def start_parser(count: int, time_parser="1m", pause: float=1, mode="api",
                            miss=miss,
                             last_launch=last_launch,
                            time_parser=time_parser, 
-                            save=save, save_type=save_type)
+                            save=save, save_type=save_type,
+                           stream=stream)
     
     if not data:
         return
@@ -62,6 +64,7 @@ if __name__ == "__main__":
     parser.add_argument('--last_launch',type=int, default=0, help='Parser last launch for save_type (default: 0)')
     parser.add_argument('--db_use',type=int, default=0, help='Use database (default: 0)')
     parser.add_argument('--clear',type=int, default=0, help='Clear dataset for all coins (default: 0)')
+    parser.add_argument('--stream',type=int, default=0, help='Stream candles over websocket, kucoin_api only (default: 0)')
     
     if "--help" in argv or "-h" in argv:
         print_help()
@@ -74,4 +77,4 @@ if __name__ == "__main__":
 
     asyncio.run(start_parser(args.count, args.time, args.pause, mode=args.mode, miss=args.miss,
                              last_launch=args.last_launch, clear=args.clear, save=args.save, 
-                             db_use=args.db_use, save_type=args.save_type))
+                             db_use=args.db_use, save_type=args.save_type, stream=args.stream))
@@ -1,5 +1,6 @@
 from src.core import settings_app
 from celery import Celery
+from celery.schedules import crontab
 
 celery_app = Celery(
     "parser_kucoin",
@@ -57,5 +58,22 @@ celery_app.conf.update(
         "heartbeat": 600,  # 10 минут
     },
     
+    # Периодические задачи (celery beat)
+    beat_schedule={
+        # Склейка частей Parquet за прошедшие дни
+        "compact-candle-store": {
+            "task": "app.tasks.compact_candle_store",
+            "schedule": crontab(hour=0, minute=30),
+        },
+        # Склейка старых запусков парсера в raw/consolidated
+        "compact-raw-launches": {
+            "task": "app.tasks.compact_raw_launches",
+            "schedule": crontab(hour=1, minute=0),
+        },
+        # Секции таблицы свечей на следующие месяцы
+        "ensure-timeseries-partitions": {
+            "task": "app.tasks.ensure_timeseries_partitions",
+            "schedule": crontab(day_of_month=1, hour=0, minute=10),
+        },
+    },
 )
-
@@ -131,7 +131,8 @@ async def restore_unfinished_tasks():
                             save=task.save,
                             save_type=task.save_type,
                             coins=task.coins,
-                            manual_stop=task.manual_stop
+                            manual_stop=task.manual_stop,
+                            stream=task.stream
                         )
                     except (AccessRefused, OperationalError) as e:
                         logger.error(
@@ -171,7 +172,8 @@ async def restore_unfinished_tasks():
                         save=task.save,
                         save_type=task.save_type,
                         coins=task.coins,
-                        manual_stop=task.manual_stop
+                        manual_stop=task.manual_stop,
+                        stream=task.stream
                     )
                     
                     restored_count += 1
@@ -6,7 +6,7 @@ from fastapi import HTTPException, Depends
 from typing import Callable, Any
 import logging
 
-from core.database.orm import UserQuery
+from src.core.database.orm import UserQuery
 from app.configuration.auth import verify_authorization
 
 logger = logging.getLogger(__name__)
@@ -120,6 +120,16 @@ class ParsingTaskRequest(BaseModel):
     save_type: str = Field(default="raw", description="Тип сохранения: raw, processed")
     coins: Optional[List[str]] = Field(default=None, description="Список монет для парсинга (если не указан, парсятся все активные монеты)")
     manual_stop: bool = Field(default=False, description="Режим парсинга до ручной остановки (игнорирует count)")
+    stream: bool = Field(default=False, description="Получать свечи через websocket вместо опроса REST (только kucoin_api)")
+
+
+class ShardedParsingTaskRequest(ParsingTaskRequest):
+    shards: int = Field(default=2, ge=1, description="Количество шардов (задач Celery), между которыми делятся монеты")
+
+
+class ShardCoinsRequest(BaseModel):
+    coins: List[str] = Field(..., description="Монеты, добавляемые в шардированную задачу")
+    shards: Optional[int] = Field(default=None, ge=1, description="Новое количество шардов (если не указано, не меняется)")
 
 
 class ParsingTaskResponse(BaseModel):
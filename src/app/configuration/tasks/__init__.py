@@ -1,3 +1,5 @@
-__all__ = ("run_parser_task",)
+__all__ = ("run_parser_task", "compact_candle_store", "compact_raw_launches",
+           "ensure_timeseries_partitions")
 
-from .parser import run_parser_task
\ No newline at end of file
+from .parser import run_parser_task
+from .storage import compact_candle_store, compact_raw_launches, ensure_timeseries_partitions
@@ -56,9 +56,12 @@ def on_task_retry(sender=None, task_id=None, reason=None, **kwargs):
 def run_parser_task(self, parser_type: str, count: int = 100, time_parser: str = "5m",
                     pause: float = 60, miss: bool = False, last_launch: bool = False,
                     clear: bool = False, save: bool = False, save_type: str = "raw",
-                    coins: list = None, manual_stop: bool = False):
+                    coins: list = None, manual_stop: bool = False, stream: bool = False,
+                    launch_dir: str = None):
     """
     Celery задача для запуска парсера
+
+    launch_dir - общая папка запуска (шарды одного запуска пишут в нее)
     
     Задача автоматически восстанавливается после перезагрузки сервера
     благодаря настройкам персистентности в celery_app.py
@@ -67,7 +70,7 @@ def run_parser_task(self, parser_type: str, count: int = 100, time_parser: str =
         # Обновляем прогресс задачи
         self.update_state(state='PROGRESS', meta={'message': 'Инициализация парсера...'})
         
-        logger.info(f"Starting parser task: {parser_type}, count={count}, time={time_parser}, coins={coins}, manual_stop={manual_stop}")
+        logger.info(f"Starting parser task: {parser_type}, count={count}, time={time_parser}, coins={coins}, manual_stop={manual_stop}, stream={stream}")
         
         # Инициализируем парсер
         parser = HandlerParser.get_parser(f"parser {parser_type}")
@@ -78,6 +81,7 @@ def run_parser_task(self, parser_type: str, count: int = 100, time_parser: str =
             return {"status": "error", "error": error_msg}
         
         att = AttParser(parser, pause, clear)
+        att.launch_dir = launch_dir
         
         # Сохраняем ссылку на задачу для проверки остановки
         att.task_instance = self
@@ -158,7 +162,8 @@ def run_parser_task(self, parser_type: str, count: int = 100, time_parser: str =
                     time_parser=time_parser,
                     save=save,
                     save_type=save_type,
-                    manual_stop=manual_stop
+                    manual_stop=manual_stop,
+                    stream=stream
                 )
                 
                 if not data:
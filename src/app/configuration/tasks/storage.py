@@ -0,0 +1,65 @@
+import asyncio
+import logging
+
+from src.app.celery_app import celery_app
+from src.core import data_manager
+
+logger = logging.getLogger("parser_logger.tasks")
+
+
+@celery_app.task(name="app.tasks.compact_candle_store", ignore_result=False)
+def compact_candle_store(data_types: list = None, coin: str = None, timeframe: str = None):
+    """
+    Склейка частей Parquet хранилища свечей за закрытые дни
+    """
+    result = {}
+
+    for data_type in data_types or ["raw", "processed"]:
+        result[data_type] = data_manager.candle_store(data_type).compact(coin=coin, timeframe=timeframe)
+
+    logger.info(f"Candle store compacted: {result}")
+
+    return {"status": "success", "result": result}
+
+
+@celery_app.task(name="app.tasks.compact_raw_launches", ignore_result=False)
+def compact_raw_launches(keep_last: int = None, retention_days: int = None, dry_run: bool = False):
+    """
+    Склейка старых папок raw/launch_parser_N и удаление сырых данных по retention
+    """
+    from src.core.database.orm import TaskQuery
+
+    # Папки запусков активных задач (в т.ч. общая папка шардов) не трогаем
+    active = asyncio.run(TaskQuery.get_active_launch_dirs())
+
+    report = data_manager.compact_raw_launches(keep_last=keep_last, retention_days=retention_days,
+                                               dry_run=dry_run, skip=active)
+
+    logger.info(f"Raw launches compacted, reclaimed {report['bytes_reclaimed']} bytes")
+
+    return {"status": "success", "result": report}
+
+
+@celery_app.task(name="app.tasks.ensure_timeseries_partitions", ignore_result=False)
+def ensure_timeseries_partitions(months_ahead: int = 2):
+    """
+    Создание месячных секций таблицы свечей заранее
+    """
+    from src.core.database import Database
+    from src.core.database.partitions import ensure_partitions
+    from src.core.settings import settings_parser
+
+    async def run():
+        db = Database(url=settings_parser.database.url, pool_size=1, max_overflow=0)
+
+        try:
+            async with db.engine.begin() as conn:
+                return await ensure_partitions(conn, months_ahead=months_ahead)
+        finally:
+            await db.dispose()
+
+    created = asyncio.run(run())
+
+    logger.info(f"Timeseries partitions created: {created}")
+
+    return {"status": "success", "created": created}
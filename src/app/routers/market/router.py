@@ -8,10 +8,17 @@ import logging
 from src.app.configuration.auth import verify_authorization
 from src.app.services import get_ex_service
 from src.app.configuration.schemas.user import KucoinApiKeyResponse
+from src.core import data_manager
 
 router = APIRouter(prefix="/kucoin/market", tags=["kucoin_market"])
 logger = logging.getLogger(__name__)
 
+# TTL кэша публичных рыночных данных, сек (ответ не зависит от API ключа)
+SYMBOLS_TTL = 300
+TICKER_TTL = 2
+STATS_TTL = 10
+KLINES_TTL = 30
+
 
 @router.get("/symbols")
 async def get_symbols(
@@ -22,7 +29,9 @@ async def get_symbols(
     """Получить список торговых пар с KuCoin"""
     try:
         kucoin_service = await get_ex_service(api_key_id, user.id)
-        symbols = await kucoin_service.get_symbols(market)
+        symbols = await data_manager.cache.aget_or_set(("kucoin_symbols", market),
+                                                       lambda: kucoin_service.get_symbols(market),
+                                                       ttl=SYMBOLS_TTL)
         
         return {
             "symbols": symbols,
@@ -44,7 +53,9 @@ async def get_ticker(
     """Получить тикер для конкретной торговой пары"""
     try:
         kucoin_service = await get_ex_service(api_key_id, user.id)
-        ticker = await kucoin_service.get_ticker(symbol)
+        ticker = await data_manager.cache.aget_or_set(("kucoin_ticker", symbol),
+                                                      lambda: kucoin_service.get_ticker(symbol),
+                                                      ttl=TICKER_TTL, disk=False)
         
         return {
             "ticker": ticker,
@@ -67,7 +78,12 @@ async def get_all_tickers(
     """Получить все тикеры"""
     try:
         kucoin_service = await get_ex_service(api_key_id, user.id)
-        tickers = await kucoin_service.get_all_tickers(save_to_db=save_to_db)
+        if save_to_db:
+            tickers = await kucoin_service.get_all_tickers(save_to_db=True)
+        else:
+            tickers = await data_manager.cache.aget_or_set(("kucoin_tickers",),
+                                                           lambda: kucoin_service.get_all_tickers(),
+                                                           ttl=TICKER_TTL, disk=False)
         
         return {
             "tickers": tickers,
@@ -90,7 +106,9 @@ async def get_24hr_stats(
     """Получить 24-часовую статистику для торговой пары"""
     try:
         kucoin_service = await get_ex_service(api_key_id, user.id)
-        stats = await kucoin_service.get_24hr_stats(symbol)
+        stats = await data_manager.cache.aget_or_set(("kucoin_stats", symbol),
+                                                     lambda: kucoin_service.get_24hr_stats(symbol),
+                                                     ttl=STATS_TTL, disk=False)
         
         return {
             "stats": stats,
@@ -116,10 +134,13 @@ async def get_klines(
     """Получить свечи (klines) для торговой пары"""
     try:
         kucoin_service = await get_ex_service(api_key_id, user.id)
-        klines = await kucoin_service.async_get_kline_spot(symbol, time=kline_type)
+        async def load_klines():
+            klines = await kucoin_service.async_get_kline_spot(symbol, time=kline_type)
+            return klines.to_records(day=kline_type[-1] in ("d", "D", "w", "W")) if klines is not None else []
 
         return {
-            "klines": klines,
+            "klines": await data_manager.cache.aget_or_set(("kucoin_klines", symbol, kline_type, start_at, end_at),
+                                                           load_klines, ttl=KLINES_TTL),
             "symbol": symbol,
             "type": kline_type,
             "api_key_id": api_key_id
@@ -8,7 +8,9 @@ from src.core.database.orm import TaskQuery
 
 from src.app.celery_app import celery_app
 from src.app.configuration import run_parser_task, Server
-from src.app.configuration.schemas import ParsingTaskRequest, ParsingTaskResponse, TaskStatusResponse, ParsingTaskListItem
+from src.app.configuration.schemas import (ParsingTaskRequest, ParsingTaskResponse, TaskStatusResponse, ParsingTaskListItem,
+                                           ShardedParsingTaskRequest, ShardCoinsRequest)
+from src.app.services.shard_service import ShardedParsingService, TASK_PARAMS
 from src.handlers.parser_handler import Handler as HandlerParser
 
 router = APIRouter(prefix="/parsing", tags=["parsing"])
@@ -42,7 +44,8 @@ async def start_parsing(
         save=task_request.save,
         save_type=task_request.save_type,
         coins=task_request.coins,
-        manual_stop=task_request.manual_stop
+        manual_stop=task_request.manual_stop,
+        stream=task_request.stream
     )
     
     # Создаем запись в БД
@@ -59,6 +62,7 @@ async def start_parsing(
         save_type=task_request.save_type,
         coins=task_request.coins,
         manual_stop=task_request.manual_stop,
+        stream=task_request.stream,
     )
     
     return ParsingTaskResponse(
@@ -68,6 +72,58 @@ async def start_parsing(
     )
 
 
+@router.post("/start_sharded", response_model=ParsingTaskResponse)
+async def start_sharded_parsing(
+    task_request: ShardedParsingTaskRequest):
+    """
+    Запустить парсинг, разделив монеты между task_request.shards задачами Celery
+
+    Возвращает task_id логической задачи, ее статус агрегирует статусы шардов
+    """
+    available_parsers = HandlerParser.get_available_parsers()
+    
+    if f"parser {task_request.parser_type}" not in available_parsers:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid parser type: {task_request.parser_type}. Available: {[p.replace('parser ', '') for p in available_parsers]}"
+        )
+
+    if task_request.parser_type not in ("kucoin_api", "kucoin_driver"):
+        raise HTTPException(status_code=400, detail="Sharding is supported only for kucoin parsers")
+
+    try:
+        parent = await ShardedParsingService.start(
+            params={name: getattr(task_request, name) for name in TASK_PARAMS},
+            coins=task_request.coins,
+            shards=task_request.shards
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return ParsingTaskResponse(
+        task_id=parent.task_id,
+        status=parent.status,
+        message=f"Sharded parsing task {parent.task_id} started with {len(parent.result['shards'])} shards"
+    )
+
+
+@router.post("/sharded/{task_id}/coins", response_model=TaskStatusResponse)
+async def add_sharded_coins(
+    task_id: str,
+    coins_request: ShardCoinsRequest):
+    """
+    Добавить монеты в шардированную задачу, перезапускаются только затронутые шарды
+    """
+    parent = await TaskQuery.get_parsing_task_by_task_id(task_id)
+
+    if parent is None or not ShardedParsingService.is_sharded(parent):
+        raise HTTPException(status_code=404, detail=f"Sharded task {task_id} not found")
+
+    parent = await ShardedParsingService.add_coins(parent, coins_request.coins, coins_request.shards)
+
+    return TaskStatusResponse(**await ShardedParsingService.aggregate_status(parent))
+
+
 @router.get("/status/{task_id}", response_model=TaskStatusResponse)
 async def get_task_status(
     task_id: str):
@@ -77,6 +133,9 @@ async def get_task_status(
     # Сначала пытаемся получить из БД
     db_task = await TaskQuery.get_parsing_task_by_task_id(task_id)
     
+    if db_task and ShardedParsingService.is_sharded(db_task):
+        return TaskStatusResponse(**await ShardedParsingService.aggregate_status(db_task))
+
     if db_task:
         # Если задача найдена в БД, возвращаем статус из БД
         response = {
@@ -174,8 +233,14 @@ async def stop_task(
     """
     Остановить задачу парсинга и обновить статус в БД
     """
-    # Отменяем задачу в Celery
-    celery_app.control.revoke(task_id, terminate=True)
+    db_task = await TaskQuery.get_parsing_task_by_task_id(task_id)
+
+    # У шардированной задачи нет своей задачи Celery - останавливаем шарды
+    if db_task and ShardedParsingService.is_sharded(db_task):
+        await ShardedParsingService.stop(db_task)
+    else:
+        # Отменяем задачу в Celery
+        celery_app.control.revoke(task_id, terminate=True)
     
     # Обновляем статус в БД
 
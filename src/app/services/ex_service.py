@@ -9,8 +9,10 @@ from datetime import datetime, timedelta
 import pandas as pd
 
 from kucoin.client import Market, Trade, User
-from core.database.orm import UserQuery, CoinQuery
-from core.database.models import KucoinApiKey
+from src.core.database.orm import UserQuery, CoinQuery
+from src.core.database.models import KucoinApiKey
+from src.core.utils.kline_decoder import KlineBatch, decode_kline, to_kucoin_kline_type, SPOT_KLINE_COLUMNS
+from src.core.utils.rate_limiter import get_kucoin_rate_limiter
 
 logger = logging.getLogger(__name__)
 
@@ -76,41 +78,26 @@ class ExApiService:
     # Market Data Methods
     async def async_get_kline_spot(self, symbol: str, 
                              time: Literal["5min", "15min", "30min", "1hour", "4hour", "1day", "1week", "1mouth", "1year"] = "5min",
-                             last_datetime: datetime = None) -> pd.DataFrame | None:
+                             last_datetime: datetime = None) -> KlineBatch | None:
 
         # cls.logger.info(f"Get coin: {symbol} time: {time=} last_datetime: {last_datetime=}")
 
+        time = to_kucoin_kline_type(time)
+
         try:
+            await get_kucoin_rate_limiter().acquire("spot_kline")
             data = await self.market.async_get_kline(symbol, time)
         except Exception as e:
             logger.error(f"Error get kline {symbol} - {e}")
             return None
 
-        colums = ["datetime", "open", "close", "max", "min", "_", "volume"]
-
-        df = pd.DataFrame(data, columns=colums).drop("_", axis=1)
+        batch = decode_kline(data, SPOT_KLINE_COLUMNS)
 
-        if len(df) == 0:
-            logger.error(f"Error get kline {symbol} - {len(df)=}")
+        if len(batch) == 0:
+            logger.error(f"Error get kline {symbol} - {len(batch)=}")
             return None
 
-        df["datetime"] = df["datetime"].apply(lambda x: datetime.fromtimestamp(int(x)))
-        
-        df["datetime"] = pd.to_datetime(df['datetime'])
-
-        if last_datetime:
-            df = df[df["datetime"] >= last_datetime]
-
-        if "day" in time or "week" in time:
-            df["datetime"] = df["datetime"].dt.strftime('%Y-%m-%d')
-        else:
-            df["datetime"] = df["datetime"].dt.strftime('%Y-%m-%d %H:%M:%S')
-
-        df["volume"] = df["volume"].apply(float)
-
-        # df = DatasetTimeseries(df)
-
-        return symbol, df
+        return batch.since(last_datetime)
 
     async def get_symbols(self, market: Optional[str] = None) -> Dict[str, Any]:
         """Получить список торговых пар"""
@@ -189,6 +176,7 @@ class ExApiService:
         await self._check_rate_limit()
         
         try:
+            await get_kucoin_rate_limiter().acquire("stats_24hr")
             return self.market.get_24hr_stats(symbol)
         except Exception as e:
             logger.error(f"KuCoin API error in get_24hr_stats: {e}")
@@ -207,6 +195,7 @@ class ExApiService:
             if end_at:
                 kwargs['endAt'] = end_at
             
+            await get_kucoin_rate_limiter().acquire("spot_kline")
             return self.market.get_kline(symbol, kline_type, **kwargs)
         except Exception as e:
             logger.error(f"KuCoin API error in get_klines: {e}")
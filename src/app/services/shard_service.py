@@ -0,0 +1,234 @@
+"""
+Шардированный запуск парсера: монеты делятся между несколькими задачами Celery
+"""
+import logging
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List
+from uuid import uuid4
+
+from src.core import data_manager
+from src.core.database.models import ParsingTask
+from src.core.database.orm import CoinQuery, TaskQuery
+from src.core.utils.consistent_hash import ConsistentHashRing
+from src.parser_driver.api import create_launch_dir
+
+from src.app.celery_app import celery_app
+from src.app.configuration import run_parser_task
+
+logger = logging.getLogger(__name__)
+
+SHARDED_STATUS = "sharded"  # Статус родительской записи, такие задачи не восстанавливаются lifespan
+SHARD_REPLICAS = 100
+
+# Поля ParsingTask, которые передаются в run_parser_task
+TASK_PARAMS = ("parser_type", "count", "time_parser", "pause", "miss", "last_launch",
+               "clear", "save", "save_type", "manual_stop", "stream")
+
+
+class ShardedParsingService:
+    """
+    Логическая задача - родительская запись ParsingTask без задачи Celery
+
+    В result родителя хранится карта шардов {"shards": {name: {"task_id", "coins"}}},
+    каждый шард - обычная запись ParsingTask со своей задачей Celery.
+    При save все шарды пишут в одну папку запуска result["launch_dir"].
+    """
+
+    @staticmethod
+    def is_sharded(task: ParsingTask) -> bool:
+        return isinstance(task.result, dict) and "shards" in task.result
+
+    @staticmethod
+    def shard_names(count: int) -> List[str]:
+        return [f"shard-{i}" for i in range(count)]
+
+    @classmethod
+    def partition(cls, coins: List[str], count: int) -> Dict[str, List[str]]:
+        return ConsistentHashRing(cls.shard_names(count), replicas=SHARD_REPLICAS).partition(coins)
+
+    @staticmethod
+    def _create_launch_dir(params: Dict[str, Any]) -> str | None:
+        """
+        Одна папка запуска на все шарды: иначе каждый шард создает свою, и
+        _load_last_launch видит только запуск одного из них
+        """
+        if not params.get("save") or params.get("save_type", "raw") != "raw":
+            return None
+
+        return create_launch_dir(str(data_manager["raw"]))
+
+    @staticmethod
+    async def _start_shard(params: Dict[str, Any], coins: List[str], launch_dir: str | None = None) -> str:
+        task = run_parser_task.delay(**params, coins=coins, launch_dir=launch_dir)
+        await TaskQuery.create_parsing_task(task_id=task.id, **params, coins=coins)
+
+        if launch_dir is not None:
+            await TaskQuery.set_parsing_task_launch_dir(task.id, launch_dir)
+
+        return task.id
+
+    @staticmethod
+    async def _stop_shard(task_id: str, message: str) -> None:
+        celery_app.control.revoke(task_id, terminate=True)
+
+        await TaskQuery.update_parsing_task_status(
+            task_id=task_id,
+            status="revoked",
+            progress_message=message,
+            completed_at=datetime.utcnow()
+        )
+
+    @classmethod
+    async def start(cls, params: Dict[str, Any], coins: List[str] | None, shards: int) -> ParsingTask:
+        if not coins:
+            coins = [coin.name for coin in await CoinQuery.get_coins()]
+
+        if not coins:
+            raise ValueError("No coins to shard")
+
+        shard_map = {}
+        result = {"shards": shard_map, "shard_count": shards, "launch_dir": cls._create_launch_dir(params)}
+
+        # Родитель создается до шардов: если запуск прервется, запущенные шарды
+        # уже записаны в его карте и останавливаются вместе с ним
+        parent_id = f"sharded-{uuid4()}"
+        await TaskQuery.create_parsing_task(task_id=parent_id, **params, coins=coins, status=SHARDED_STATUS)
+
+        try:
+            for name, shard_coins in cls.partition(coins, shards).items():
+                if shard_coins:
+                    shard_map[name] = {"task_id": await cls._start_shard(params, shard_coins, result["launch_dir"]),
+                                       "coins": shard_coins}
+
+                    await TaskQuery.update_parsing_task_status(task_id=parent_id, status=SHARDED_STATUS,
+                                                               result=result)
+        except Exception as e:
+            logger.error(f"Error starting shards of {parent_id}: {e}")
+
+            for shard in shard_map.values():
+                await cls._stop_shard(shard["task_id"], "Запуск шардов прерван")
+
+            # Не error: задачи с этим статусом восстанавливаются при старте как обычные
+            await TaskQuery.update_parsing_task_status(
+                task_id=parent_id,
+                status="revoked",
+                progress_message="Запуск шардов прерван",
+                error=str(e),
+                result=result,
+                completed_at=datetime.utcnow()
+            )
+            raise
+
+        return await TaskQuery.update_parsing_task_status(
+            task_id=parent_id,
+            status=SHARDED_STATUS,
+            progress_message=f"Запущено шардов: {len(shard_map)}",
+            result=result,
+            started_at=datetime.utcnow()
+        )
+
+    @classmethod
+    async def add_coins(cls, parent: ParsingTask, coins: List[str], shards: int | None = None) -> ParsingTask:
+        """
+        Добавить монеты (и/или сменить число шардов) и перезапустить только
+        те шарды, у которых изменился набор монет
+        """
+        params = {name: getattr(parent, name) for name in TASK_PARAMS}
+        shard_map: Dict[str, Dict[str, Any]] = parent.result["shards"]
+        shards = shards or parent.result.get("shard_count", len(shard_map))
+
+        all_coins = list(dict.fromkeys([*(parent.coins or []), *coins]))
+        partition = {name: shard_coins for name, shard_coins in cls.partition(all_coins, shards).items()
+                     if shard_coins}
+
+        changed = [name for name in sorted(set(shard_map) | set(partition))
+                   if sorted(shard_map.get(name, {}).get("coins", [])) != sorted(partition.get(name, []))]
+
+        for name in changed:
+            if name in shard_map:
+                await cls._stop_shard(shard_map[name]["task_id"], "Шард перебалансирован")
+                shard_map.pop(name)
+
+            if name in partition:
+                shard_map[name] = {"task_id": await cls._start_shard(params, partition[name],
+                                                                     parent.result.get("launch_dir")),
+                                   "coins": partition[name]}
+
+        logger.info(f"Sharded task {parent.task_id} rebalanced: {changed}")
+
+        await TaskQuery.update_parsing_task_coins(parent.task_id, all_coins)
+
+        return await TaskQuery.update_parsing_task_status(
+            task_id=parent.task_id,
+            status=SHARDED_STATUS,
+            progress_message=f"Перезапущено шардов: {len(changed)} из {len(shard_map)}",
+            result={**parent.result, "shards": shard_map, "shard_count": shards}
+        )
+
+    @classmethod
+    async def _resolve_shards(cls, parent: ParsingTask) -> Dict[str, ParsingTask | None]:
+        """Задачи шардов с учетом перезапуска при рестарте сервера (restored -> new_task_id)"""
+        shard_map: Dict[str, Dict[str, Any]] = parent.result["shards"]
+        tasks = {task.task_id: task for task in
+                 await TaskQuery.get_parsing_tasks_by_task_ids([shard["task_id"] for shard in shard_map.values()])}
+
+        resolved, moved = {}, False
+        for name, shard in shard_map.items():
+            task = tasks.get(shard["task_id"])
+
+            while task is not None and isinstance(task.result, dict) and task.result.get("new_task_id"):
+                task = await TaskQuery.get_parsing_task_by_task_id(task.result["new_task_id"])
+
+                if task is not None:
+                    shard["task_id"], moved = task.task_id, True
+
+            resolved[name] = task
+
+        if moved:
+            await TaskQuery.update_parsing_task_status(task_id=parent.task_id, status=SHARDED_STATUS,
+                                                       result=parent.result)
+
+        return resolved
+
+    @classmethod
+    async def aggregate_status(cls, parent: ParsingTask) -> Dict[str, Any]:
+        shards = await cls._resolve_shards(parent)
+        statuses = Counter(task.status if task is not None else "unknown" for task in shards.values())
+
+        if statuses["error"]:
+            status = "error"
+        elif statuses["in_progress"]:
+            status = "in_progress"
+        elif statuses["completed"] == len(shards):
+            status = "completed"
+        elif statuses["revoked"] == len(shards):
+            status = "revoked"
+        else:
+            status = "pending"
+
+        return {
+            "task_id": parent.task_id,
+            "status": status,
+            "message": f"Шардов: {len(shards)} (" + ", ".join(f"{key}: {value}" for key, value in statuses.items()) + ")",
+            "result": {
+                **parent.result,
+                "shards": {name: {**parent.result["shards"][name],
+                                  "status": task.status if task is not None else "unknown",
+                                  "message": task.progress_message if task is not None else None}
+                           for name, task in shards.items()}
+            },
+            "error": "; ".join(f"{name}: {task.error}" for name, task in shards.items()
+                               if task is not None and task.error) or None,
+            "created_at": parent.created_at,
+            "started_at": parent.started_at,
+            "completed_at": max((task.completed_at for task in shards.values()
+                                 if task is not None and task.completed_at), default=None)
+                            if status in ("completed", "revoked") else None
+        }
+
+    @classmethod
+    async def stop(cls, parent: ParsingTask) -> None:
+        for task in (await cls._resolve_shards(parent)).values():
+            if task is not None and task.status not in ("completed", "revoked"):
+                await cls._stop_shard(task.task_id, "Задача была остановлена пользователем")
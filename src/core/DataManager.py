@@ -7,19 +7,26 @@ else:
     class Image: pass
 
 from pydantic import Field
-from os import walk, listdir
+from os import listdir
 from pydantic_settings import BaseSettings
 from pathlib import Path
-from typing import Optional, Literal, Any, Dict, Union, Generator, Callable
+from typing import Optional, Literal, Any, Dict, Union, Generator, Callable, Iterable
 import pandas as pd
 import aiofiles
 import json
-import zipfile
 import yaml
 import shutil
 from datetime import datetime
 from functools import cached_property
 
+from .candle_store import CandleStore
+from .ohlcv_memmap import OHLCVMemmap
+from . import candle_codec
+from .dataset_catalog import DatasetCatalog
+from .cache import TwoTierCache
+from .backup_store import BackupStore
+from .launch_compactor import LaunchCompactor
+
 import logging
 
 logger = logging.getLogger("DataManager")
@@ -32,6 +39,7 @@ class SettingsTrade(BaseSettings):
     RAW_DATA_PATH: Path = DATA_DIR / "raw"
     CACHED_DATA_PATH: Path = DATA_DIR / "cached"
     PROCESSED_DATA_PATH: Path = DATA_DIR / "processed"
+    CANDLES_DATA_PATH: Path = DATA_DIR / "candles"
     BACKUP_DATA_PATH: Path = DATA_DIR / "backup"
     PARSING_CONFIG_PATH: Path = DATA_DIR / "parsing_config"
     TRACH_PATH: Path = DATA_DIR / "trach"
@@ -42,6 +50,20 @@ class SettingsTrade(BaseSettings):
     TYPE_DATASET_FOR_COIN: Optional[Literal["clear", "train", "test"]] = Field(default="clear", description="Тип датасета (clear, train, test) для сохранения в БД")
     TIMETRAVEL: Optional[str] = Field(default="5m", description="Временная метка данных")
 
+    # Кэш DataManager.cache_data / load_cache
+    CACHE_MEMORY_MAX_BYTES: int = Field(default=256 * 2**20, description="Лимит LRU в памяти, байт")
+    CACHE_DISK_MAX_BYTES: int = Field(default=2 * 2**30, description="Лимит кэша на диске, байт")
+    CACHE_TTL: Optional[float] = Field(default=3600, description="TTL по умолчанию, сек (None - без TTL)")
+
+    # Склейка папок запусков raw/launch_parser_N
+    RAW_KEEP_LAUNCHES: int = Field(default=1, description="Сколько последних запусков не склеивать")
+    RAW_RETENTION_DAYS: Optional[int] = Field(default=30, description="Хранить сырые данные, уже попавшие в processed, дней (None - всегда)")
+    RAW_LAUNCH_MIN_AGE: float = Field(default=3600, description="Не склеивать запуски, измененные меньше стольких секунд назад")
+
+    # Дополнительные копии свечей при сохранении: каждая - еще одна запись на каждый сброс парсера
+    CANDLES_RAW_PARQUET: bool = Field(default=False, description="Дублировать сырые свечи из CSV запуска в Parquet хранилище")
+    CANDLES_OHLCV_MEMMAP: bool = Field(default=False, description="Дописывать свечи в бинарный файл OHLCV (иначе - export_ohlcv по запросу)")
+
     # Модели ML
     MODELS_DIR: Path = BASE_DIR / "models"
     MODELS_CONFIGS_PATH: Path = MODELS_DIR / "model_configs"
@@ -55,6 +77,7 @@ class DataManager:
         self.required_dirs = {
             "raw": self.settings.RAW_DATA_PATH,
             "processed": self.settings.PROCESSED_DATA_PATH,
+            "candles": self.settings.CANDLES_DATA_PATH,
             "cached": self.settings.CACHED_DATA_PATH,
             "backup": self.settings.BACKUP_DATA_PATH,
             "log": self.settings.LOG_PATH,
@@ -62,6 +85,8 @@ class DataManager:
             "trach": self.settings.TRACH_PATH,
             }
 
+        self._candle_stores: Dict[str, CandleStore] = {}
+
         self._ensure_directories_exist()
         self._setup_logging()
 
@@ -90,6 +115,89 @@ class DataManager:
         
         return self.required_dirs[key]
 
+    def candle_store(self, data_type: Literal["raw", "processed"] = "processed") -> CandleStore:
+        """
+        Parquet хранилище свечей: candles/<data_type>/<coin>/<timeframe>/<day>
+        """
+        if data_type not in self._candle_stores:
+            self._candle_stores[data_type] = CandleStore(self.required_dirs["candles"] / data_type)
+
+        return self._candle_stores[data_type]
+
+    def ohlcv_path(self, coin: str, timetravel: str, data_type: Literal["raw", "processed"] = "processed") -> Path:
+        return self.required_dirs["candles"] / "ohlcv" / data_type / f"{coin}_{timetravel}.ohlcv"
+
+    def append_candles(self, coin: str, timetravel: str, data: pd.DataFrame,
+                       data_type: Literal["raw", "processed"] = "processed") -> None:
+        """
+        Дописать свечи в Parquet хранилище и, если включен CANDLES_OHLCV_MEMMAP, в бинарный файл OHLCV
+        """
+        self.candle_store(data_type).append(coin, timetravel, data)
+
+        if self.settings.CANDLES_OHLCV_MEMMAP:
+            OHLCVMemmap.append(self.ohlcv_path(coin, timetravel, data_type), data, timetravel)
+
+    def export_ohlcv(self, coin: str, timetravel: str, data_type: Literal["raw", "processed"] = "processed") -> Path:
+        """
+        Выгрузка свечей из Parquet хранилища в бинарный файл для memmap чтения
+        """
+        path = self.ohlcv_path(coin, timetravel, data_type)
+        OHLCVMemmap.write(path, self.candle_store(data_type).read(coin, timetravel), timetravel)
+
+        logger.info(f"OHLCV exported: {path}")
+        return path
+
+    def archive_path(self, coin: str, timetravel: str, data_type: Literal["raw", "processed"] = "processed") -> Path:
+        return self.required_dirs["candles"] / "archive" / data_type / f"{coin}_{timetravel}.ohc"
+
+    def archive_candles(self, coin: str, timetravel: str, data_type: Literal["raw", "processed"] = "processed",
+                        level: int = 6) -> Path:
+        """
+        Сжатый архив всей истории свечей из Parquet хранилища (блоки по месяцам)
+        """
+        path = self.archive_path(coin, timetravel, data_type)
+        blocks = candle_codec.write_archive(path, self.candle_store(data_type).read(coin, timetravel), level=level)
+
+        logger.info(f"Candles archived: {path}, {blocks} blocks")
+        return path
+
+    def read_archive(self, coin: str, timetravel: str, data_type: Literal["raw", "processed"] = "processed",
+                     start: datetime = None, end: datetime = None) -> pd.DataFrame:
+        return candle_codec.read_archive(self.archive_path(coin, timetravel, data_type), start, end)
+
+    @cached_property
+    def launch_compactor(self) -> LaunchCompactor:
+        return LaunchCompactor(self.settings.RAW_DATA_PATH,
+                               processed_last=self.candle_store("processed").last_datetime,
+                               on_remove=self.catalog.remove)
+
+    def compact_raw_launches(self, keep_last: int = None, retention_days: int = None,
+                             dry_run: bool = False, skip: Iterable[Path] = (),
+                             min_age: float = None) -> Dict[str, int]:
+        """
+        Склейка старых папок запусков в raw/consolidated и очистка по retention
+
+        skip - папки запусков активных задач парсинга
+        """
+        keep_last = self.settings.RAW_KEEP_LAUNCHES if keep_last is None else keep_last
+        retention_days = self.settings.RAW_RETENTION_DAYS if retention_days is None else retention_days
+        min_age = self.settings.RAW_LAUNCH_MIN_AGE if min_age is None else min_age
+
+        return self.launch_compactor.compact(keep_last=keep_last, retention_days=retention_days,
+                                             dry_run=dry_run, skip=skip, min_age=min_age)
+
+    @cached_property
+    def catalog(self) -> DatasetCatalog:
+        """
+        Каталог CSV датасетов (SQLite в cached), при первом запуске индексирует существующие файлы
+        """
+        catalog = DatasetCatalog(self.settings.CACHED_DATA_PATH / "catalog.sqlite", self.settings.DATA_DIR)
+
+        if catalog.is_empty():
+            catalog.rebuild([self.required_dirs["raw"], self.required_dirs["processed"]])
+
+        return catalog
+
     @cached_property
     def coin_list(self) -> list[str]:
         """Кэшированный список монет"""
@@ -100,12 +208,7 @@ class DataManager:
         dt.to_csv(self.settings.COIN_LIST_PATH)
 
     def get_last_launch(self) -> Path:
-        paths = list(self.get_path("raw", filter_path=lambda x: "launch_parser" in str(x.name)))
-
-        if not paths:
-            return None
-        
-        return max(paths, key=lambda x: int(str(x.name).split("_")[-1]))
+        return self.catalog.last_launch("raw")
     
     def get_path_from(self, path: Path, filter_path: Optional[Callable] = lambda x: True) -> Generator[Path, None, None]:
         yield from list(self.get_path(path, filter_path=filter_path))
@@ -134,23 +237,26 @@ class DataManager:
                 yield Path(base_path) / dirs
             return
 
-        for root, dirs, files in walk(base_path):
-            if not all(map(lambda x: ".csv" in x, files)):
-                continue
+        # Отбор как при обходе папок: монета - часть имени между "_" и "-"
+        # (BTC_5m.csv, clear_BTC_5m.csv, BTC-USDT_5m.csv), таймфрейм - окончание
+        # имени, без timetravel и dataset_type файлы не отбираются. Кандидаты -
+        # CSV файлы каталога под base_path вместо walk
+        for record in self.catalog.find(under=base_path):
+            file = Path(record["path"])
 
-            for file in files:
+            if coin and coin not in file.name.replace("_", "-").split("-"):
+                continue
 
-                if coin:
-                    if not coin in file.replace("_", "-").split("-"):
-                        continue
+            if not ((timetravel and file.name.endswith(f"{timetravel}.csv")) or dataset_type):
+                continue
 
-                if (timetravel and file.endswith(f"{timetravel}.csv")) or dataset_type:
-                    if (dataset_type and file.startswith(f"{dataset_type}")) or not dataset_type:
-                        if not filter_path(Path(root) / file):
-                            continue
+            if dataset_type and not file.name.startswith(dataset_type):
+                continue
 
-                        yield Path(root) / file
+            if not filter_path(file):
+                continue
 
+            yield file
 
     def save_img(self, img: Image, time_parser: str = "5m", name: str = "img") -> None:
         path = self.create_dir("raw", "img")
@@ -213,13 +319,22 @@ class DataManager:
             logger.error(f"Error writing to {path}: {str(e)}")
             raise
 
-    def cache_data(self, data: Any, key: str) -> None:
+    @cached_property
+    def cache(self) -> TwoTierCache:
+        """
+        Двухуровневый кэш: LRU в памяти процесса и диск (cached/cache)
+        """
+        return TwoTierCache(self.settings.CACHED_DATA_PATH / "cache",
+                            memory_max_bytes=self.settings.CACHE_MEMORY_MAX_BYTES,
+                            disk_max_bytes=self.settings.CACHE_DISK_MAX_BYTES,
+                            default_ttl=self.settings.CACHE_TTL)
+
+    def cache_data(self, data: Any, key: str, ttl: float = None) -> None:
         """
         Кэширование данных в памяти и на диске
         """
         try:
-            cache_path = self.settings.CACHED_DATA_PATH / f"{key}.pkl"
-            pd.to_pickle(data, cache_path)
+            self.cache.set(key, data, ttl)
             logger.info(f"Data cached: {key}")
         except Exception as e:
             logger.error(f"Cache error for {key}: {str(e)}")
@@ -229,40 +344,51 @@ class DataManager:
         Загрузка данных из кэша
         """
         try:
-            cache_path = self.settings.CACHED_DATA_PATH / f"{key}.pkl"
-            return pd.read_pickle(cache_path)
-        except FileNotFoundError:
-            logger.warning(f"Cache not found: {key}")
-            return None
+            data = self.cache.get(key)
+
+            if data is None:
+                logger.warning(f"Cache not found: {key}")
+
+            return data
         except Exception as e:
             logger.error(f"Cache load error for {key}: {str(e)}")
             return None
 
+    def cache_stats(self) -> Dict[str, int]:
+        return self.cache.stats()
+
+    @cached_property
+    def backup_store(self) -> BackupStore:
+        return BackupStore(self.settings.BACKUP_DATA_PATH / "store", self.settings.DATA_DIR)
+
     def backup_data(self, paths: list[Path], backup_name: str = None) -> Path:
         """
-        Создание резервной копии данных
+        Инкрементальная резервная копия данных, возвращает путь к манифесту
         """
-        backup_name = backup_name or f"backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
-        backup_path = self.settings.BACKUP_DATA_PATH / backup_name
-        
         try:
-            with zipfile.ZipFile(backup_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                for path in paths:
-                    if path.is_file():
-                        zipf.write(path, arcname=path.name)
-                        
-                    elif path.is_dir():
-                        for file in path.rglob('*'):
-                            if file.is_file():
-                                zipf.write(file, arcname=file.relative_to(path.parent))
-            
-            logger.info(f"Backup created: {backup_path}")
-            return backup_path
+            manifest_path = self.backup_store.backup(paths, backup_name)
+
+            logger.info(f"Backup created: {manifest_path}")
+            return manifest_path
         
         except Exception as e:
             logger.error(f"Backup failed: {str(e)}")
             raise
 
+    def restore_backup(self, backup_name: str = None, at: datetime = None,
+                       target: Path = None, prefix: str = None) -> list[Path]:
+        """
+        Восстановление из бэкапа backup_name или последнего на момент at
+        """
+        try:
+            return self.backup_store.restore(backup_name, at=at, target=target, prefix=prefix)
+        except Exception as e:
+            logger.error(f"Restore failed: {str(e)}")
+            raise
+
+    def prune_backups(self, keep: int = 30) -> Dict[str, int]:
+        return self.backup_store.prune(keep)
+
     def validate_dataset(self, df: pd.DataFrame, expected_columns: list) -> bool:
         """
         Валидация структуры датасета
@@ -301,22 +427,24 @@ class DataManager:
             logger.error(f"Error creating directory: {str(e)}")
             raise
         
-    def get_latest_processed_data(self, coin: str, type_data: str = "processed") -> Optional[pd.DataFrame]:
+    def get_latest_processed_data(self, coin: str, type_data: str = "processed",
+                                  timetravel: str = None, start: datetime = None,
+                                  end: datetime = None, ttl: float = 60) -> Optional[pd.DataFrame]:
         """
-        Получение последней версии обработанных данных для указанной монеты
+        Получение обработанных данных для указанной монеты из хранилища свечей
+
+        Результат кэшируется в памяти на ttl секунд (на диск не пишется -
+        Parquet и так на диске), вызывающий получает копию.
         """
-        try:
-            coin_dir = self.required_dirs[type_data] / coin
-            if not coin_dir.exists():
-                return None
+        timetravel = timetravel or self.settings.TIMETRAVEL
 
-            latest_file = max(
-                coin_dir.glob("*.parquet"),
-                key=lambda x: x.stat().st_mtime,
-                default=None
-            )
+        try:
+            data = self.cache.get_or_set(
+                ("processed_data", type_data, coin, timetravel, str(start), str(end)),
+                lambda: self.candle_store(type_data).read(coin, timetravel, start=start, end=end),
+                ttl=ttl, disk=False)
 
-            return pd.read_parquet(latest_file) if latest_file else None
+            return data.copy() if not data.empty else None
         except Exception as e:
             logger.error(f"Error getting latest data for {coin}: {str(e)}")
             return None
@@ -354,26 +482,16 @@ class DataManager:
         self,
         coin: str,
         data: pd.DataFrame,
-        dataset_type: str = "clear",
-        version: str = None
+        timetravel: str = None
     ) -> Path:
         """
-        Сохранение обработанных данных с версионированием
+        Сохранение обработанных данных в хранилище свечей
         """
-        version = version or datetime.now().strftime("%Y%m%d_%H%M%S")
+        store = self.candle_store("processed")
+        timetravel = timetravel or self.settings.TIMETRAVEL
 
-        save_dir = self.get_path(
-            "processed",
-            coin=coin,
-            dataset_type=dataset_type,
-            timetravel=self.settings.TIMETRAVEL
-        )
-        
-        filename = f"{coin}_{dataset_type}_{self.settings.TIMETRAVEL}_{version}.parquet"
-        save_path = save_dir / filename
-        
-        await self.write_file(data, save_path, format="parquet")
-        
-        return save_path
+        store.append(coin, timetravel, data, only_new=False)
+
+        return store.path(coin, timetravel)
     
 data_manager = DataManager()
\ No newline at end of file
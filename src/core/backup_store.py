@@ -0,0 +1,304 @@
+"""
+Инкрементальные бэкапы с адресацией по содержимому
+
+Файлы режутся на чанки по содержимому (gear hash), чанк хранится один раз
+под своим sha256, сжатие новых чанков идет в пуле процессов. Каждый бэкап -
+манифест: файл -> размер, mtime, список чанков. Файл с теми же размером и
+mtime, что в прошлом манифесте, не читается вовсе, поэтому время бэкапа
+зависит от объема изменений, а не от всей истории.
+"""
+from __future__ import annotations
+
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+from hashlib import sha256
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+import json
+import multiprocessing as mp
+import os
+import shutil
+import zlib
+
+import numpy as np
+
+import logging
+
+logger = logging.getLogger("BackupStore")
+
+GEAR = np.random.default_rng(0x5EED).integers(0, 2**32, 256, dtype=np.uint64).astype(np.uint32)
+
+MANIFEST_FORMAT = "%Y%m%d_%H%M%S_%f"
+
+
+def chunk_boundaries(data: bytes, mask_bits: int = 16, min_size: int = 16 * 2**10,
+                     max_size: int = 2**20) -> List[int]:
+    """
+    Концы чанков в data (content-defined chunking)
+
+    gear hash h = sum(GEAR[b[i - j]] << j): младшие mask_bits бит зависят
+    только от последних mask_bits байт, поэтому считаются векторно за mask_bits
+    проходов. Граница - там, где младшие биты нулевые (в среднем раз в 2**mask_bits байт).
+    Вставка в начало файла сдвигает только соседние чанки, остальные совпадают.
+    """
+    size = len(data)
+    if size <= min_size:
+        return [size] if size else []
+
+    gear = GEAR[np.frombuffer(data, dtype=np.uint8)]
+    hashes = gear.copy()
+
+    for shift in range(1, mask_bits):
+        hashes[shift:] += gear[:size - shift] << np.uint32(shift)
+
+    candidates = np.flatnonzero((hashes & np.uint32((1 << mask_bits) - 1)) == 0) + 1
+
+    boundaries, start = [], 0
+    for candidate in candidates.tolist():
+        while candidate - start > max_size:
+            start += max_size
+            boundaries.append(start)
+
+        if candidate - start >= min_size:
+            boundaries.append(candidate)
+            start = candidate
+
+    while size - start > max_size:
+        start += max_size
+        boundaries.append(start)
+
+    if start < size:
+        boundaries.append(size)
+
+    return boundaries
+
+
+def _store_chunk(path: str, data: bytes, level: int) -> int:
+    """Сжать и записать чанк (выполняется в пуле), вернуть размер на диске"""
+    if os.path.exists(path):
+        return 0
+
+    compressed = zlib.compress(data, level)
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(compressed)
+    os.replace(tmp_path, path)
+
+    return len(compressed)
+
+
+class BackupStore:
+    """
+    root/chunks/<hash[:2]>/<hash> - сжатые чанки, root/manifests/<name>.json - бэкапы
+
+    Пути в манифесте относительны base_dir (папка данных), поэтому
+    восстановление можно сделать как на место, так и в другую папку.
+    """
+
+    def __init__(self, root: Path, base_dir: Path, workers: int = None, level: int = 6,
+                 mask_bits: int = 16, min_chunk: int = 16 * 2**10, max_chunk: int = 2**20) -> None:
+        self.root = Path(root)
+        self.base_dir = Path(base_dir).resolve()
+        self.workers = workers or os.cpu_count() or 1
+        self.level = level
+        self.mask_bits = mask_bits
+        self.min_chunk = min_chunk
+        self.max_chunk = max_chunk
+
+        self.chunks_dir = self.root / "chunks"
+        self.manifests_dir = self.root / "manifests"
+
+        self.chunks_dir.mkdir(parents=True, exist_ok=True)
+        self.manifests_dir.mkdir(parents=True, exist_ok=True)
+
+    def chunk_path(self, digest: str) -> Path:
+        return self.chunks_dir / digest[:2] / digest
+
+    def _executor(self) -> Executor:
+        # Воркер Celery - демон, ему нельзя порождать процессы; zlib отпускает GIL
+        if mp.current_process().daemon:
+            return ThreadPoolExecutor(self.workers)
+
+        return ProcessPoolExecutor(self.workers)
+
+    def _relative(self, path: Path) -> str:
+        path = path.resolve()
+
+        try:
+            return str(path.relative_to(self.base_dir))
+        except ValueError:
+            return str(path)
+
+    @staticmethod
+    def _iter_files(paths: Iterable[Path]) -> Iterator[Path]:
+        for path in map(Path, paths):
+            if path.is_file():
+                yield path
+            elif path.is_dir():
+                yield from sorted(file for file in path.rglob("*") if file.is_file())
+            else:
+                logger.warning(f"Backup path does not exist: {path}")
+
+    def manifests(self) -> List[Path]:
+        return sorted(self.manifests_dir.glob("*.json"))
+
+    def load_manifest(self, name: str | Path) -> dict:
+        path = Path(name)
+        if not path.exists():
+            path = self.manifests_dir / f"{Path(name).stem}.json"
+
+        with open(path) as f:
+            return json.load(f)
+
+    def find_manifest(self, at: datetime = None) -> Optional[Path]:
+        """Последний бэкап не позже at (None - самый последний)"""
+        manifests = self.manifests()
+
+        if at is not None:
+            manifests = [path for path in manifests
+                         if datetime.strptime(path.stem.split("-", 1)[0], MANIFEST_FORMAT) <= at]
+
+        return manifests[-1] if manifests else None
+
+    def backup(self, paths: Iterable[Path], name: str = None) -> Path:
+        created_at = datetime.now()
+        parent_path = self.find_manifest()
+        parent = self.load_manifest(parent_path)["files"] if parent_path else {}
+
+        files: Dict[str, dict] = {}
+        stats = {"files": 0, "files_changed": 0, "bytes_read": 0, "chunks": 0,
+                 "chunks_new": 0, "bytes_new": 0, "bytes_stored": 0}
+
+        pending: Set[Future] = set()
+        scheduled: Set[str] = set()
+
+        def collect(done: Iterable[Future]) -> None:
+            for future in done:
+                stats["bytes_stored"] += future.result()
+
+        with self._executor() as executor:
+            for file in self._iter_files(paths):
+                stat = file.stat()
+                relative = self._relative(file)
+                previous = parent.get(relative)
+
+                stats["files"] += 1
+
+                if previous and previous["size"] == stat.st_size and previous["mtime"] == stat.st_mtime:
+                    files[relative] = previous
+                    continue
+
+                data = file.read_bytes()
+                stats["files_changed"] += 1
+                stats["bytes_read"] += len(data)
+
+                chunks, start = [], 0
+                for end in chunk_boundaries(data, self.mask_bits, self.min_chunk, self.max_chunk):
+                    chunk = data[start:end]
+                    digest = sha256(chunk).hexdigest()
+                    chunks.append([digest, len(chunk)])
+                    start = end
+
+                    if digest in scheduled or self.chunk_path(digest).exists():
+                        continue
+
+                    self.chunk_path(digest).parent.mkdir(exist_ok=True)
+                    scheduled.add(digest)
+                    stats["chunks_new"] += 1
+                    stats["bytes_new"] += len(chunk)
+
+                    # Ограничиваем очередь, чтобы не держать в памяти все новые чанки
+                    if len(pending) >= self.workers * 2:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        collect(done)
+
+                    pending.add(executor.submit(_store_chunk, str(self.chunk_path(digest)), chunk, self.level))
+
+                stats["chunks"] += len(chunks)
+                files[relative] = {"size": stat.st_size, "mtime": stat.st_mtime, "chunks": chunks}
+
+            collect(wait(pending).done)
+
+        name = f"{created_at.strftime(MANIFEST_FORMAT)}" + (f"-{name}" if name else "")
+        manifest_path = self.manifests_dir / f"{name}.json"
+
+        manifest = {"name": name, "created_at": created_at.isoformat(),
+                    "parent": parent_path.stem if parent_path else None,
+                    "base_dir": str(self.base_dir), "stats": stats, "files": files}
+
+        tmp_path = manifest_path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, manifest_path)
+
+        logger.info(f"Backup {name}: {stats}")
+
+        return manifest_path
+
+    def read_chunk(self, digest: str) -> bytes:
+        data = zlib.decompress(self.chunk_path(digest).read_bytes())
+
+        if sha256(data).hexdigest() != digest:
+            raise ValueError(f"Backup chunk {digest} is corrupted")
+
+        return data
+
+    def restore(self, name: str | Path = None, at: datetime = None, target: Path = None,
+                prefix: str = None) -> List[Path]:
+        """
+        Восстановить файлы бэкапа name (или последнего не позже at) в target
+        (по умолчанию - на место, в base_dir); prefix - только файлы под этим путем
+        """
+        manifest_path = Path(name) if name else self.find_manifest(at)
+        if manifest_path is None:
+            raise FileNotFoundError(f"No backup found at {at}")
+
+        manifest = self.load_manifest(manifest_path)
+        target = Path(target) if target else self.base_dir
+
+        restored = []
+        for relative, entry in manifest["files"].items():
+            if prefix and not relative.startswith(prefix):
+                continue
+
+            path = Path(relative) if Path(relative).is_absolute() else target / relative
+            path.parent.mkdir(parents=True, exist_ok=True)
+
+            tmp_path = path.with_name(f".{path.name}.restore")
+            with open(tmp_path, "wb") as f:
+                for digest, _ in entry["chunks"]:
+                    f.write(self.read_chunk(digest))
+
+            os.replace(tmp_path, path)
+            os.utime(path, (entry["mtime"], entry["mtime"]))
+            restored.append(path)
+
+        logger.info(f"Restored {len(restored)} files from {manifest['name']} to {target}")
+
+        return restored
+
+    def prune(self, keep: int = 30) -> Dict[str, int]:
+        """Удалить старые манифесты и чанки, на которые не ссылается ни один оставшийся"""
+        manifests = self.manifests()
+        removed = manifests[:-keep] if keep else manifests
+
+        for path in removed:
+            path.unlink()
+
+        referenced = {digest for path in self.manifests()
+                      for entry in self.load_manifest(path)["files"].values()
+                      for digest, _ in entry["chunks"]}
+
+        chunks_removed = bytes_removed = 0
+        for chunk in self.chunks_dir.glob("*/*"):
+            if chunk.name not in referenced:
+                bytes_removed += chunk.stat().st_size
+                chunk.unlink()
+                chunks_removed += 1
+
+        return {"manifests_removed": len(removed), "chunks_removed": chunks_removed,
+                "bytes_removed": bytes_removed}
+
+    def clear(self) -> None:
+        shutil.rmtree(self.root)
@@ -0,0 +1,330 @@
+"""
+Двухуровневый кэш: LRU в памяти процесса с лимитом по байтам и диск с TTL
+
+Память - объекты как есть (без повторной распаковки на каждое попадание),
+размер оценивается по длине pickle. Диск - файл на ключ: заголовок с
+временем истечения и sha256 содержимого, запись через временный файл.
+"""
+from __future__ import annotations
+
+from collections import OrderedDict
+from functools import wraps
+from hashlib import sha256
+from pathlib import Path
+from threading import RLock
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+import asyncio
+import os
+import pickle
+import struct
+import time
+
+from .utils.metrics import cache_events_total
+
+import logging
+
+logger = logging.getLogger("DataCache")
+
+MISSING = object()
+
+DISK_MAGIC = b"DMC1"
+DISK_HEADER = struct.Struct("<4sd32s")  # magic, expires_at (0 - без TTL), sha256 payload
+
+
+def make_key(*parts: Any) -> str:
+    """
+    Ключ из произвольных частей (имя функции, аргументы) - sha256 от repr,
+    поэтому части должны иметь полный и устойчивый repr (не DataFrame)
+    """
+    return sha256(repr(parts).encode()).hexdigest()
+
+
+class MemoryLRU:
+    """
+    LRU по байтам: при превышении max_bytes вытесняются давно не читанные ключи
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.size = 0
+
+        self._items: OrderedDict[str, tuple[Any, int, float]] = OrderedDict()
+        self._lock = RLock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            item = self._items.get(key)
+
+            if item is None:
+                return MISSING
+
+            value, size, expires_at = item
+            if expires_at and expires_at < time.time():
+                self.delete(key)
+                cache_events_total.labels(tier="memory", event="expired").inc()
+                return MISSING
+
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, size: int, expires_at: float = 0) -> int:
+        """Положить значение, вернуть число вытесненных ключей"""
+        with self._lock:
+            self.delete(key)
+
+            if size > self.max_bytes:
+                return 0
+
+            self._items[key] = (value, size, expires_at)
+            self.size += size
+
+            evicted = 0
+            while self.size > self.max_bytes:
+                _, (_, old_size, _) = self._items.popitem(last=False)
+                self.size -= old_size
+                evicted += 1
+
+            return evicted
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            item = self._items.pop(key, None)
+
+            if item is not None:
+                self.size -= item[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self.size = 0
+
+
+class DiskCache:
+    """
+    Файл <root>/<key[:2]>/<key>.cache на ключ
+
+    Поврежденный (не совпал sha256) или просроченный файл удаляется при
+    чтении. При превышении max_bytes удаляются файлы с самым старым mtime
+    (mtime обновляется при чтении, т.е. это тоже LRU).
+    """
+
+    def __init__(self, root: Path, max_bytes: int) -> None:
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+
+        self.root.mkdir(parents=True, exist_ok=True)
+
+        self._size: Optional[int] = None
+        self._lock = RLock()
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.cache"
+
+    def _files(self) -> list[Path]:
+        return list(self.root.glob("*/*.cache"))
+
+    @property
+    def size(self) -> int:
+        if self._size is None:
+            self._size = sum(file.stat().st_size for file in self._files())
+
+        return self._size
+
+    def get(self, key: str) -> tuple[Any, bytes, float] | object:
+        path = self._path(key)
+
+        try:
+            with open(path, "rb") as f:
+                raw = f.read()
+        except FileNotFoundError:
+            return MISSING
+
+        try:
+            magic, expires_at, checksum = DISK_HEADER.unpack_from(raw)
+            payload = raw[DISK_HEADER.size:]
+
+            if magic != DISK_MAGIC or sha256(payload).digest() != checksum:
+                raise ValueError("checksum mismatch")
+        except (struct.error, ValueError) as e:
+            logger.warning(f"Corrupted cache file {path}: {e}")
+            cache_events_total.labels(tier="disk", event="corrupted").inc()
+            self.delete(key)
+            return MISSING
+
+        if expires_at and expires_at < time.time():
+            cache_events_total.labels(tier="disk", event="expired").inc()
+            self.delete(key)
+            return MISSING
+
+        os.utime(path)
+
+        return pickle.loads(payload), payload, expires_at
+
+    def set(self, key: str, payload: bytes, expires_at: float = 0) -> int:
+        """Записать атомарно, вернуть число вытесненных файлов"""
+        if len(payload) + DISK_HEADER.size > self.max_bytes:
+            return 0
+
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(DISK_HEADER.pack(DISK_MAGIC, expires_at, sha256(payload).digest()))
+            f.write(payload)
+
+        with self._lock:
+            # size до замены: при первом обращении он считается по файлам и уже учел бы новый
+            size = self.size - (path.stat().st_size if path.exists() else 0)
+            os.replace(tmp_path, path)
+
+            self._size = size + path.stat().st_size
+
+            return self._evict(keep=path) if self._size > self.max_bytes else 0
+
+    def _evict(self, keep: Path) -> int:
+        files = sorted(((file.stat(), file) for file in self._files() if file != keep),
+                       key=lambda item: item[0].st_mtime)
+
+        evicted = 0
+        for stat, file in files:
+            if self._size <= self.max_bytes:
+                break
+
+            file.unlink(missing_ok=True)
+            self._size -= stat.st_size
+            evicted += 1
+
+        return evicted
+
+    def delete(self, key: str) -> None:
+        path = self._path(key)
+
+        with self._lock:
+            if path.exists():
+                size = path.stat().st_size
+                path.unlink(missing_ok=True)
+
+                if self._size is not None:
+                    self._size -= size
+
+    def clear(self) -> None:
+        with self._lock:
+            for file in self._files():
+                file.unlink(missing_ok=True)
+
+            self._size = 0
+
+
+class TwoTierCache:
+    """
+    get: память -> диск (с подъемом в память) -> промах
+
+    Значения из памяти отдаются без копирования - изменять их нельзя.
+    """
+
+    def __init__(self, root: Path, memory_max_bytes: int, disk_max_bytes: int,
+                 default_ttl: float = None) -> None:
+        self.memory = MemoryLRU(memory_max_bytes)
+        self.disk = DiskCache(root, disk_max_bytes)
+        self.default_ttl = default_ttl
+
+        self.counters: Dict[str, int] = {"memory_hits": 0, "disk_hits": 0, "misses": 0,
+                                         "memory_evictions": 0, "disk_evictions": 0}
+
+    def _count(self, counter: str, tier: str, event: str, value: int = 1) -> None:
+        if value:
+            self.counters[counter] += value
+            cache_events_total.labels(tier=tier, event=event).inc(value)
+
+    def _expires_at(self, ttl: float | None) -> float:
+        ttl = self.default_ttl if ttl is None else ttl
+        return time.time() + ttl if ttl else 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        key = make_key(key)
+
+        value = self.memory.get(key)
+        if value is not MISSING:
+            self._count("memory_hits", "memory", "hit")
+            return value
+
+        item = self.disk.get(key)
+        if item is not MISSING:
+            value, payload, expires_at = item
+            self._count("disk_hits", "disk", "hit")
+            self._count("memory_evictions", "memory", "eviction",
+                        self.memory.set(key, value, len(payload), expires_at))
+            return value
+
+        self._count("misses", "all", "miss")
+        return default
+
+    def set(self, key: Hashable, value: Any, ttl: float = None, disk: bool = True) -> None:
+        key = make_key(key)
+
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        expires_at = self._expires_at(ttl)
+
+        self._count("memory_evictions", "memory", "eviction",
+                    self.memory.set(key, value, len(payload), expires_at))
+
+        if disk:
+            self._count("disk_evictions", "disk", "eviction", self.disk.set(key, payload, expires_at))
+
+    def delete(self, key: Hashable) -> None:
+        key = make_key(key)
+
+        self.memory.delete(key)
+        self.disk.delete(key)
+
+    def clear(self) -> None:
+        self.memory.clear()
+        self.disk.clear()
+
+    def get_or_set(self, key: Hashable, factory: Callable[[], Any], ttl: float = None, disk: bool = True) -> Any:
+        value = self.get(key, MISSING)
+
+        if value is MISSING:
+            value = factory()
+            self.set(key, value, ttl, disk)
+
+        return value
+
+    async def aget_or_set(self, key: Hashable, factory: Callable[[], Awaitable[Any]],
+                          ttl: float = None, disk: bool = True) -> Any:
+        value = self.get(key, MISSING)
+
+        if value is MISSING:
+            value = await factory()
+            self.set(key, value, ttl, disk)
+
+        return value
+
+    def memoize(self, ttl: float = None, disk: bool = True) -> Callable:
+        """Кэш результата по имени функции и аргументам, для обычных и async функций"""
+        def decorator(func: Callable) -> Callable:
+            name = f"{func.__module__}.{func.__qualname__}"
+
+            if asyncio.iscoroutinefunction(func):
+                @wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    return await self.aget_or_set(make_key(name, args, sorted(kwargs.items())),
+                                                  lambda: func(*args, **kwargs), ttl, disk)
+                return async_wrapper
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                return self.get_or_set(make_key(name, args, sorted(kwargs.items())),
+                                       lambda: func(*args, **kwargs), ttl, disk)
+            return wrapper
+
+        return decorator
+
+    def stats(self) -> Dict[str, int]:
+        return {**self.counters,
+                "memory_items": len(self.memory), "memory_bytes": self.memory.size,
+                "disk_bytes": self.disk.size}
@@ -0,0 +1,273 @@
+"""
+Сжатый формат блока свечей OHLCV для долгого хранения истории
+
+- datetime: delta-of-delta (у ровного ряда 5m почти все значения 0) -> zigzag varint;
+- цены: если значения точно представимы десятичными с k знаками, то целые
+  value * 10^k, дельта к предыдущей свече, zigzag varint; иначе XOR с
+  предыдущим значением (биты float64) и транспонирование байтов;
+- объем: тот же выбор, но без дельты (объемы соседних свечей не связаны);
+- NaN (пропущенные свечи) - битовая маска, в самих данных заменяются предыдущим значением;
+- в конце весь блок сжимается zlib.
+
+Кодирование и декодирование векторные (numpy), без цикла по свечам.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Iterator, Union
+import os
+import struct
+import zlib
+
+import numpy as np
+import pandas as pd
+
+MAGIC = b"OHCB"
+VERSION = 1
+
+BLOCK_HEADER = struct.Struct("<4sBBI")   # magic, version, zlib level, count
+COLUMN_HEADER = struct.Struct("<BBbBI")  # mode, delta, scale, has_nan, payload size
+BLOCK_SIZE = struct.Struct("<I")         # длина блока в файле архива
+
+ARCHIVE_MAGIC = b"OHCA\x00\x00\x00\x01"
+
+MODE_DECIMAL, MODE_XOR = 0, 1
+MAX_SCALE = 12
+
+PRICE_COLUMNS = ("open", "close", "max", "min")
+CANDLE_COLUMNS = ("datetime", *PRICE_COLUMNS, "volume")
+
+
+def zigzag_encode(values: np.ndarray) -> np.ndarray:
+    values = values.astype(np.int64, copy=False)
+    return ((values << 1) ^ (values >> 63)).view(np.uint64)
+
+
+def zigzag_decode(values: np.ndarray) -> np.ndarray:
+    values = values.astype(np.uint64, copy=False)
+    return ((values >> np.uint64(1)).view(np.int64)) ^ -(values & np.uint64(1)).view(np.int64)
+
+
+def varint_encode(values: np.ndarray) -> bytes:
+    """uint64 -> LEB128: 7 бит на байт, старший бит - продолжение"""
+    values = values.astype(np.uint64, copy=False)
+
+    sizes = np.ones(len(values), dtype=np.int64)
+    for k in range(1, 10):
+        sizes += values >= np.uint64(1 << (7 * k))
+
+    offsets = np.cumsum(sizes) - sizes
+    out = np.zeros(int(sizes.sum()), dtype=np.uint8)
+
+    for k in range(int(sizes.max(initial=0))):
+        mask = sizes > k
+        chunk = (values[mask] >> np.uint64(7 * k)) & np.uint64(0x7F)
+        more = (sizes[mask] > k + 1).astype(np.uint64) << np.uint64(7)
+        out[offsets[mask] + k] = (chunk | more).astype(np.uint8)
+
+    return out.tobytes()
+
+
+def varint_decode(raw: bytes, count: int) -> np.ndarray:
+    data = np.frombuffer(raw, dtype=np.uint8)
+    ends = np.flatnonzero(data < 0x80)
+
+    if len(ends) != count:
+        raise ValueError(f"Varint stream has {len(ends)} values, expected {count}")
+
+    if not count:
+        return np.empty(0, dtype=np.uint64)
+
+    starts = np.r_[0, ends[:-1] + 1]
+    shift = (np.arange(len(data)) - np.repeat(starts, ends - starts + 1)) * 7
+
+    parts = (data & 0x7F).astype(np.uint64) << shift.astype(np.uint64)
+
+    return np.add.reduceat(parts, starts)
+
+
+def decimal_scale(values: np.ndarray) -> int | None:
+    """Наименьшее k, при котором round(x * 10^k) / 10^k восстанавливает x бит в бит"""
+    limit = float(2 ** 53)
+
+    for scale in range(MAX_SCALE + 1):
+        scaled = np.round(values * 10.0 ** scale)
+
+        if np.abs(scaled).max(initial=0) >= limit:
+            return None
+
+        if np.array_equal(scaled / 10.0 ** scale, values):
+            return scale
+
+    return None
+
+
+def _fill_nan(values: np.ndarray, nan: np.ndarray) -> np.ndarray:
+    """NaN -> предыдущее значение (в начале ряда - первое непустое или 0)"""
+    index = np.where(nan, 0, np.arange(len(values)))
+    np.maximum.accumulate(index, out=index)
+    values = values[index]
+
+    return np.where(np.isnan(values), 0.0, values)
+
+
+def encode_column(values: np.ndarray, delta: bool) -> bytes:
+    values = np.asarray(values, dtype=np.float64)
+    nan = np.isnan(values)
+    has_nan = bool(nan.any())
+
+    if has_nan:
+        values = _fill_nan(values, nan)
+
+    scale = decimal_scale(values)
+
+    if scale is not None:
+        integers = np.round(values * 10.0 ** scale).astype(np.int64)
+
+        if delta:
+            integers = np.diff(integers, prepend=0)
+
+        mode, payload = MODE_DECIMAL, varint_encode(zigzag_encode(integers))
+    else:
+        bits = values.view(np.uint64)
+        xor = bits ^ np.r_[np.uint64(0), bits[:-1]]
+
+        # Старшие байты XOR почти всегда нулевые - после транспонирования это длинные нули для zlib
+        mode, scale, payload = MODE_XOR, 0, xor.astype("<u8").view(np.uint8).reshape(-1, 8).T.tobytes()
+
+    mask = np.packbits(nan).tobytes() if has_nan else b""
+
+    return COLUMN_HEADER.pack(mode, delta, scale, has_nan, len(payload)) + mask + payload
+
+
+def decode_column(raw: memoryview, offset: int, count: int) -> tuple[np.ndarray, int]:
+    mode, delta, scale, has_nan, size = COLUMN_HEADER.unpack_from(raw, offset)
+    offset += COLUMN_HEADER.size
+
+    nan = None
+    if has_nan:
+        mask_size = (count + 7) // 8
+        nan = np.unpackbits(np.frombuffer(raw, np.uint8, mask_size, offset), count=count).astype(bool)
+        offset += mask_size
+
+    payload = raw[offset:offset + size]
+    offset += size
+
+    if mode == MODE_DECIMAL:
+        integers = zigzag_decode(varint_decode(payload, count))
+
+        if delta:
+            integers = np.cumsum(integers)
+
+        values = integers / 10.0 ** scale
+    elif mode == MODE_XOR:
+        xor = np.frombuffer(payload, np.uint8).reshape(8, count).T.copy().view("<u8").ravel()
+        values = np.bitwise_xor.accumulate(xor).view(np.float64)
+    else:
+        raise ValueError(f"Unknown column mode {mode}")
+
+    if nan is not None:
+        values = np.where(nan, np.nan, values)
+
+    return values, offset
+
+
+def encode_candles(data: pd.DataFrame, level: int = 6) -> bytes:
+    """
+    DataFrame (datetime, open, close, max, min, volume) -> блок
+
+    Строки сортируются по datetime, пустые даты отбрасываются.
+    level - уровень zlib (0 - без сжатия).
+    """
+    timestamp = pd.to_datetime(data["datetime"], errors="coerce")
+    valid = timestamp.notna().to_numpy()
+
+    order = np.argsort(timestamp.to_numpy()[valid], kind="stable")
+    timestamp = timestamp.to_numpy()[valid].astype("datetime64[ns]").view(np.int64)[order]
+
+    dod = np.diff(np.diff(timestamp, prepend=0), prepend=0)
+    body = [varint_encode(zigzag_encode(dod))]
+
+    for column in CANDLE_COLUMNS[1:]:
+        values = pd.to_numeric(data[column], errors="coerce").to_numpy(dtype=np.float64)[valid][order]
+        body.append(encode_column(values, delta=column in PRICE_COLUMNS))
+
+    body = BLOCK_SIZE.pack(len(body[0])) + b"".join(body)
+
+    if level:
+        body = zlib.compress(body, level)
+
+    return BLOCK_HEADER.pack(MAGIC, VERSION, level, len(timestamp)) + body
+
+
+def decode_candles(raw: bytes) -> pd.DataFrame:
+    magic, version, level, count = BLOCK_HEADER.unpack_from(raw)
+
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"Invalid candle block: magic {magic!r}, version {version}")
+
+    body = memoryview(raw)[BLOCK_HEADER.size:]
+    if level:
+        body = memoryview(zlib.decompress(body))
+
+    (size,) = BLOCK_SIZE.unpack_from(body)
+    offset = BLOCK_SIZE.size + size
+
+    dod = zigzag_decode(varint_decode(body[BLOCK_SIZE.size:offset], count))
+    columns = {"datetime": np.cumsum(np.cumsum(dod)).view("datetime64[ns]")}
+
+    for column in CANDLE_COLUMNS[1:]:
+        columns[column], offset = decode_column(body, offset, count)
+
+    return pd.DataFrame(columns)
+
+
+def write_archive(path: Union[str, Path], data: pd.DataFrame, freq: str = "MS", level: int = 6) -> int:
+    """
+    Файл архива: заголовок и блоки по периоду freq (по умолчанию месяц),
+    каждый с префиксом длины - можно читать блоками. Запись атомарная.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    timestamp = pd.to_datetime(data["datetime"], errors="coerce")
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+
+    blocks = 0
+    with open(tmp_path, "wb") as f:
+        f.write(ARCHIVE_MAGIC)
+
+        for _, group in data.groupby(timestamp.dt.to_period(freq[0]), sort=True):
+            block = encode_candles(group, level)
+            f.write(BLOCK_SIZE.pack(len(block)) + block)
+            blocks += 1
+
+    os.replace(tmp_path, path)
+
+    return blocks
+
+
+def iter_archive(path: Union[str, Path]) -> Iterator[pd.DataFrame]:
+    with open(path, "rb") as f:
+        if f.read(len(ARCHIVE_MAGIC)) != ARCHIVE_MAGIC:
+            raise ValueError(f"Invalid candle archive {path}")
+
+        while size := f.read(BLOCK_SIZE.size):
+            yield decode_candles(f.read(BLOCK_SIZE.unpack(size)[0]))
+
+
+def read_archive(path: Union[str, Path], start=None, end=None) -> pd.DataFrame:
+    frames = []
+
+    for frame in iter_archive(path):
+        if start is not None:
+            frame = frame[frame["datetime"] >= pd.Timestamp(start)]
+        if end is not None:
+            frame = frame[frame["datetime"] <= pd.Timestamp(end)]
+
+        frames.append(frame)
+
+    if not frames:
+        return pd.DataFrame({column: [] for column in CANDLE_COLUMNS})
+
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,250 @@
+"""
+Хранилище свечей в Parquet с разбиением coin/timeframe/day
+
+Запись только добавлением: каждый сброс буфера - новый файл part-*.parquet
+в папке своего дня, существующие файлы не перечитываются и не переписываются.
+compact() склеивает части закрытых дней в один файл.
+"""
+from __future__ import annotations
+
+from datetime import datetime, date
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import uuid4
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+import logging
+
+logger = logging.getLogger("CandleStore")
+
+CANDLE_COLUMNS = ("datetime", "open", "close", "max", "min", "volume")
+
+SCHEMA = pa.schema([("datetime", pa.timestamp("ns"))] +
+                   [(column, pa.float64()) for column in CANDLE_COLUMNS[1:]])
+
+DAY_FORMAT = "%Y-%m-%d"
+
+
+class CandleStore:
+    """
+    root/<coin>/<timeframe>/<YYYY-MM-DD>/part-<time_ns>-<uuid>.parquet
+
+    Имя части начинается с времени записи, поэтому порядок имен - порядок
+    записей: при чтении дубли по datetime схлопываются с приоритетом
+    последней записи. Чтение отбрасывает дни по имени папки, а внутри
+    файлов фильтр по datetime проталкивается в статистику row group.
+    """
+
+    def __init__(self, root: Path, compression: str = "zstd") -> None:
+        self.root = Path(root)
+        self.compression = compression
+
+        self.root.mkdir(parents=True, exist_ok=True)
+
+        # Последняя записанная свеча по (coin, timeframe), лениво с диска
+        self._last: Dict[Tuple[str, str], Optional[pd.Timestamp]] = {}
+
+    def path(self, coin: str, timeframe: str) -> Path:
+        return self.root / coin / timeframe
+
+    def days(self, coin: str, timeframe: str) -> List[date]:
+        path = self.path(coin, timeframe)
+
+        if not path.exists():
+            return []
+
+        result = []
+        for day_dir in path.iterdir():
+            try:
+                result.append(datetime.strptime(day_dir.name, DAY_FORMAT).date())
+            except ValueError:
+                continue
+
+        return sorted(result)
+
+    def parts(self, coin: str, timeframe: str, day: date) -> List[Path]:
+        return sorted((self.path(coin, timeframe) / day.strftime(DAY_FORMAT)).glob("part-*.parquet"))
+
+    @staticmethod
+    def _normalize(data: pd.DataFrame) -> pd.DataFrame:
+        columns = {}
+
+        timestamp = data["datetime"]
+        if timestamp.dtype.kind != "M":
+            timestamp = pd.to_datetime(timestamp, errors="coerce")
+        columns["datetime"] = timestamp.to_numpy().astype("datetime64[ns]", copy=False)
+
+        # Пропуски в сырых данных помечены "x" - в Parquet это NaN
+        for column in CANDLE_COLUMNS[1:]:
+            values = data[column]
+            if values.dtype.kind not in "fiu":
+                values = pd.to_numeric(values, errors="coerce")
+            columns[column] = values.to_numpy(dtype=np.float64)
+
+        data = pd.DataFrame(columns)
+        data = data[~np.isnat(data["datetime"].to_numpy())]
+        data = data.drop_duplicates(subset=["datetime"], keep="last")
+
+        return data.sort_values("datetime", ignore_index=True)
+
+    def _write_part(self, day_dir: Path, table: pa.Table) -> Path:
+        day_dir.mkdir(parents=True, exist_ok=True)
+
+        name = f"part-{time.time_ns():020d}-{uuid4().hex[:8]}.parquet"
+        tmp_path = day_dir / f".{name}.tmp"
+
+        # Читатель не должен увидеть недописанный файл
+        pq.write_table(table, tmp_path, compression=self.compression)
+        os.replace(tmp_path, day_dir / name)
+
+        return day_dir / name
+
+    def last_datetime(self, coin: str, timeframe: str) -> Optional[pd.Timestamp]:
+        key = (coin, timeframe)
+
+        if key not in self._last:
+            days = self.days(coin, timeframe)
+            last = None
+
+            if days:
+                data = self.read(coin, timeframe, start=datetime.combine(days[-1], datetime.min.time()))
+                last = data["datetime"].max() if not data.empty else None
+
+            self._last[key] = last
+
+        return self._last[key]
+
+    def append(self, coin: str, timeframe: str, data: pd.DataFrame, only_new: bool = True) -> List[Path]:
+        """
+        Дописать свечи, по файлу на каждый затронутый день
+
+        only_new - отбросить свечи старее последней записанной: буфер AttParser
+        после сброса оставляет половину и отдает ее повторно. Последнюю свечу
+        пишем снова - она могла быть открытой, и новая часть перекроет ее при чтении.
+        """
+        data = self._normalize(data)
+
+        last = self.last_datetime(coin, timeframe)
+        if only_new and last is not None:
+            data = data[data["datetime"] >= last]
+
+        if data.empty:
+            return []
+
+        paths = []
+        for day, group in data.groupby(data["datetime"].dt.floor("D")):
+            table = pa.Table.from_pandas(group, schema=SCHEMA, preserve_index=False)
+            paths.append(self._write_part(self.path(coin, timeframe) / day.strftime(DAY_FORMAT), table))
+
+        newest = data["datetime"].iloc[-1]
+        self._last[(coin, timeframe)] = newest if last is None else max(last, newest)
+
+        logger.debug(f"Append {len(data)} candles {coin} {timeframe}: {len(paths)} parts")
+
+        return paths
+
+    def read(self, coin: str, timeframe: str, start: datetime = None, end: datetime = None,
+             columns: Iterable[str] = None) -> pd.DataFrame:
+        """Свечи в [start, end] по возрастанию времени"""
+        start = pd.Timestamp(start) if start is not None else None
+        end = pd.Timestamp(end) if end is not None else None
+
+        files = [str(part) for day in self.days(coin, timeframe)
+                 if (start is None or day >= start.date()) and (end is None or day <= end.date())
+                 for part in self.parts(coin, timeframe, day)]
+
+        columns = list(CANDLE_COLUMNS) if columns is None else \
+            ["datetime"] + [column for column in columns if column != "datetime"]
+
+        if not files:
+            return pd.DataFrame({column: pd.Series(dtype=SCHEMA.field(column).type.to_pandas_dtype())
+                                 for column in columns})
+
+        condition = None
+        if start is not None:
+            condition = ds.field("datetime") >= pa.scalar(start.as_unit("ns").value, type=SCHEMA.field("datetime").type)
+        if end is not None:
+            bound = ds.field("datetime") <= pa.scalar(end.as_unit("ns").value, type=SCHEMA.field("datetime").type)
+            condition = bound if condition is None else condition & bound
+
+        # to_table сохраняет порядок файлов, поэтому keep="last" - последняя запись
+        table = ds.dataset(files, schema=SCHEMA, format="parquet").to_table(columns=columns, filter=condition)
+
+        data = table.to_pandas()
+        data = data.drop_duplicates(subset=["datetime"], keep="last")
+
+        return data.sort_values("datetime", ignore_index=True)
+
+    def compact(self, coin: str = None, timeframe: str = None, before: date = None,
+                min_parts: int = 2) -> Dict[str, int]:
+        """
+        Склеить части каждого дня в один файл
+
+        Текущий день по умолчанию не трогаем (before = сегодня): в него еще
+        дописывает парсер. Новый файл появляется до удаления старых частей,
+        а его имя новее их - при сбое между шагами чтение остается верным.
+        """
+        before = before or datetime.utcnow().date()
+        stats = {"days": 0, "parts_removed": 0, "bytes_before": 0, "bytes_after": 0}
+
+        coins = [coin] if coin else sorted(path.name for path in self.root.iterdir() if path.is_dir())
+
+        for coin_name in coins:
+            coin_dir = self.root / coin_name
+            if not coin_dir.exists():
+                continue
+
+            timeframes = [timeframe] if timeframe else sorted(path.name for path in coin_dir.iterdir() if path.is_dir())
+
+            for timeframe_name in timeframes:
+                for day in self.days(coin_name, timeframe_name):
+                    if day >= before:
+                        continue
+
+                    parts = self.parts(coin_name, timeframe_name, day)
+                    if len(parts) < min_parts:
+                        continue
+
+                    start = pd.Timestamp(day)
+                    data = self.read(coin_name, timeframe_name, start=start,
+                                     end=start + pd.Timedelta(days=1) - pd.Timedelta(1, "ns"))
+
+                    table = pa.Table.from_pandas(data, schema=SCHEMA, preserve_index=False)
+                    new_part = self._write_part(parts[0].parent, table)
+
+                    stats["bytes_before"] += sum(part.stat().st_size for part in parts)
+                    stats["bytes_after"] += new_part.stat().st_size
+
+                    for part in parts:
+                        part.unlink()
+
+                    stats["days"] += 1
+                    stats["parts_removed"] += len(parts)
+
+        logger.info(f"Compact {self.root}: {stats}")
+
+        return stats
+
+    def drop(self, coin: str, timeframe: str = None) -> None:
+        path = self.path(coin, timeframe) if timeframe else self.root / coin
+
+        if path.exists():
+            shutil.rmtree(path)
+
+        for key in [key for key in self._last if key[0] == coin and (timeframe is None or key[1] == timeframe)]:
+            self._last.pop(key)
+
+    def disk_usage(self, coin: str = None, timeframe: str = None) -> int:
+        path = self.root
+        if coin:
+            path = self.path(coin, timeframe) if timeframe else self.root / coin
+
+        return sum(file.stat().st_size for file in path.rglob("*.parquet"))
@@ -1,9 +1,9 @@
 __all__ = ("Database", "db_helper",
            "Coin", "Timeseries", "News",
-           "DataTimeseries", "DataTimeseries",
+           "DataTimeseries", "DataTimeseries", "KlineCursor", "TimeseriesArchive",
            "Base")
 
-from .models import (Coin, Timeseries, DataTimeseries, News)
+from .models import (Coin, Timeseries, DataTimeseries, KlineCursor, TimeseriesArchive, News)
 from .engine import Database
 from .base import Base
 
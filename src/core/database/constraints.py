@@ -0,0 +1,87 @@
+"""
+Уникальные ключи и новые колонки для уже существующих баз
+
+create_all не меняет созданные таблицы, а ON CONFLICT в
+CoinQuery.add_data_timeseries_bulk (timeseries_id, datetime) и
+NewsQuery.add_news_batch (id_url) без такого ключа падает с ошибкой.
+Колонки, добавленные в модели позже, без ALTER TABLE ломают любой SELECT.
+"""
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from .models import DataTimeseries, News, ParsingTask
+
+import logging
+
+logger = logging.getLogger("Database.constraints")
+
+TABLE = DataTimeseries.__tablename__
+UNIQUE_CANDLE = f"uq_{TABLE}_timeseries_id_datetime"
+
+UNIQUE_KEYS = [
+    (TABLE, ("timeseries_id", "datetime"), UNIQUE_CANDLE),
+    (News.__tablename__, ("id_url",), f"uq_{News.__tablename__}_id_url"),
+]
+
+# (таблица, колонка, определение) - как в модели
+ADDED_COLUMNS = [
+    (ParsingTask.__tablename__, "stream", "boolean NOT NULL DEFAULT false"),
+]
+
+
+async def has_unique(conn: AsyncConnection, table: str, columns: tuple) -> bool:
+    """Есть ли уникальный ключ ровно по columns, под любым именем"""
+    result = await conn.execute(text(
+        "SELECT 1 FROM pg_constraint c JOIN pg_class t ON t.oid = c.conrelid "
+        "WHERE t.relname = :table AND pg_table_is_visible(t.oid) AND c.contype = 'u' "
+        "AND (SELECT array_agg(a.attname::text ORDER BY a.attname) FROM pg_attribute a "
+        "     WHERE a.attrelid = t.oid AND a.attnum = ANY(c.conkey)) = CAST(:columns AS text[])"
+    ), {"table": table, "columns": sorted(columns)})
+
+    return result.first() is not None
+
+
+async def has_unique_candle(conn: AsyncConnection, table: str = TABLE) -> bool:
+    return await has_unique(conn, table, ("timeseries_id", "datetime"))
+
+
+async def ensure_unique(conn: AsyncConnection, table: str, columns: tuple, name: str) -> int:
+    """
+    Добавить уникальный ключ, если таблица создана до него
+
+    Дубликаты по columns удаляются заранее, остается строка с наибольшим
+    id - последняя записанная. Возвращает число удаленных строк.
+    """
+    exists = (await conn.execute(text("SELECT to_regclass(:table)"), {"table": table})).scalar()
+
+    if exists is None or await has_unique(conn, table, columns):
+        return 0
+
+    same = " AND ".join(f"a.{column} = b.{column}" for column in columns)
+    result = await conn.execute(text(f"DELETE FROM {table} a USING {table} b WHERE {same} AND a.id < b.id"))
+
+    await conn.execute(text(f"ALTER TABLE {table} ADD CONSTRAINT {name} UNIQUE ({', '.join(columns)})"))
+
+    logger.info(f"Unique key {name} added, duplicates removed: {result.rowcount}")
+
+    return result.rowcount
+
+
+async def ensure_unique_candle(conn: AsyncConnection) -> int:
+    return await ensure_unique(conn, *UNIQUE_KEYS[0])
+
+
+async def ensure_unique_keys(conn: AsyncConnection) -> int:
+    """Все ключи из UNIQUE_KEYS; возвращает общее число удаленных дубликатов"""
+    removed = 0
+
+    for table, columns, name in UNIQUE_KEYS:
+        removed += await ensure_unique(conn, table, columns, name)
+
+    return removed
+
+
+async def ensure_columns(conn: AsyncConnection) -> None:
+    """Добавить колонки из ADDED_COLUMNS в таблицы, созданные до них"""
+    for table, column, definition in ADDED_COLUMNS:
+        await conn.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} {definition}"))
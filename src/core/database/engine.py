@@ -9,6 +9,8 @@ from sqlalchemy.ext.asyncio import (
 )
 
 from .models import Base
+from .partitions import ensure_partitions
+from .constraints import ensure_columns, ensure_unique_keys
 
 import logging
 
@@ -45,6 +47,25 @@ class Database:
 
     async def init_db(self):
         await self._create_tables()
+        await self.ensure_constraints()
+        await self.ensure_partitions()
+
+    async def ensure_constraints(self) -> int:
+        """Новые колонки и уникальные ключи (свечи, новости) в таблицах, созданных до них"""
+        if self.engine.dialect.name != "postgresql":
+            return 0
+
+        async with self.engine.begin() as conn:
+            await ensure_columns(conn)
+            return await ensure_unique_keys(conn)
+
+    async def ensure_partitions(self) -> list:
+        """Месячные секции свечей на текущий и два следующих месяца"""
+        if self.engine.dialect.name != "postgresql":
+            return []
+
+        async with self.engine.begin() as conn:
+            return await ensure_partitions(conn)
 
     @asynccontextmanager
     async def get_session(self) -> AsyncGenerator[AsyncSession, None]:
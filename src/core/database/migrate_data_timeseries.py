@@ -0,0 +1,190 @@
+"""
+Перенос свечей в секционированную таблицу data_timeseriess
+
+create_all не меняет существующие таблицы, поэтому базу, созданную до
+секционирования, нужно перенести один раз:
+
+    python -m src.core.database.migrate_data_timeseries --benchmark
+
+Старая таблица переименовывается в data_timeseriess_legacy и создается
+новая (секции по месяцам + DEFAULT) - одной транзакцией, DDL в PostgreSQL
+откатывается целиком. Строки копируются пачками по id - каждая пачка в
+своей транзакции, поэтому прерванный перенос продолжается с места остановки. --benchmark замеряет точечный поиск, диапазон и
+последние N свечей до и после переноса.
+"""
+from __future__ import annotations
+
+from statistics import median
+from typing import Dict
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from .engine import Database
+from .models import DataTimeseries
+from .partitions import TABLE, ensure_partitions, is_partitioned
+
+import logging
+
+logger = logging.getLogger("Database.migrate")
+
+LEGACY = f"{TABLE}_legacy"
+COLUMNS = ", ".join(column.name for column in DataTimeseries.__table__.columns)
+
+
+async def table_exists(conn: AsyncConnection, table: str) -> bool:
+    result = await conn.execute(text("SELECT to_regclass(:table)"), {"table": table})
+    return result.scalar() is not None
+
+
+async def rename_legacy(conn: AsyncConnection) -> None:
+    """Старая таблица, ее ограничения и sequence получают суффикс _legacy, чтобы имена не пересекались"""
+    constraints = await conn.execute(text(
+        "SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(:table)"
+    ), {"table": TABLE})
+
+    for (name,) in constraints.all():
+        await conn.execute(text(f'ALTER TABLE {TABLE} RENAME CONSTRAINT "{name}" TO "{name}_legacy"'))
+
+    await conn.execute(text(f"ALTER SEQUENCE IF EXISTS {TABLE}_id_seq RENAME TO {LEGACY}_id_seq"))
+    await conn.execute(text(f"ALTER TABLE {TABLE} RENAME TO {LEGACY}"))
+
+    logger.info(f"{TABLE} renamed to {LEGACY}")
+
+
+async def create_partitioned(conn: AsyncConnection) -> None:
+    await conn.run_sync(lambda sync_conn: DataTimeseries.__table__.create(sync_conn, checkfirst=True))
+
+    bounds = (await conn.execute(text(f"SELECT min(datetime), max(datetime) FROM {LEGACY}"))).first()
+    created = await ensure_partitions(conn, start=bounds[0], end=bounds[1])
+
+    logger.info(f"{TABLE} created with {len(created)} partitions")
+
+
+async def swap_tables(engine: AsyncEngine) -> None:
+    """
+    Переименование и создание новой таблицы одной транзакцией: при сбое
+    остается старая таблица, а не одна _legacy. Если _legacy уже есть, а
+    новой таблицы нет (сбой прежней версии между шагами) - только создание
+    """
+    async with engine.begin() as conn:
+        if await table_exists(conn, TABLE):
+            await rename_legacy(conn)
+
+        await create_partitioned(conn)
+
+
+async def copy_rows(engine: AsyncEngine, batch_size: int) -> int:
+    """Копирование пачками по диапазону id, продолжение с максимального уже перенесенного id"""
+    async with engine.connect() as conn:
+        last_id = (await conn.execute(text(f"SELECT coalesce(max(id), 0) FROM {TABLE}"))).scalar()
+        max_id = (await conn.execute(text(f"SELECT coalesce(max(id), 0) FROM {LEGACY}"))).scalar()
+
+    copied = 0
+    while last_id < max_id:
+        async with engine.begin() as conn:
+            result = await conn.execute(text(
+                f"INSERT INTO {TABLE} ({COLUMNS}) SELECT {COLUMNS} FROM {LEGACY} "
+                f"WHERE id > :start AND id <= :end ON CONFLICT DO NOTHING"
+            ), {"start": last_id, "end": last_id + batch_size})
+
+        copied += result.rowcount
+        last_id += batch_size
+
+        logger.info(f"Copied {copied} rows, id <= {min(last_id, max_id)} of {max_id}")
+
+    async with engine.begin() as conn:
+        await conn.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{TABLE}', 'id'), (SELECT coalesce(max(id), 1) FROM {TABLE}))"
+        ))
+
+    return copied
+
+
+async def benchmark(engine: AsyncEngine, table: str, runs: int) -> Dict[str, float]:
+    """Медиана времени (мс) трех типовых запросов к свечам одного ряда"""
+    async with engine.connect() as conn:
+        row = (await conn.execute(text(
+            f"SELECT timeseries_id, datetime FROM {table} ORDER BY id DESC LIMIT 1"
+        ))).first()
+
+        if row is None:
+            return {}
+
+        timeseries_id, last = row
+        params = {"timeseries_id": timeseries_id, "datetime": last}
+
+        queries = {
+            "point": f"SELECT * FROM {table} WHERE timeseries_id = :timeseries_id AND datetime = :datetime",
+            "range_7d": f"SELECT * FROM {table} WHERE timeseries_id = :timeseries_id "
+                        f"AND datetime > :datetime - interval '7 days' AND datetime <= :datetime",
+            "latest_100": f"SELECT * FROM {table} WHERE timeseries_id = :timeseries_id "
+                          f"ORDER BY datetime DESC LIMIT 100",
+        }
+
+        result = {}
+        for name, query in queries.items():
+            timings = []
+
+            for _ in range(runs):
+                start = time.perf_counter()
+                (await conn.execute(text(query), params)).all()
+                timings.append((time.perf_counter() - start) * 1000)
+
+            result[name] = round(median(timings), 3)
+
+    return result
+
+
+async def migrate(url: str, batch_size: int = 50_000, keep_legacy: bool = False,
+                  bench: bool = False, runs: int = 50) -> None:
+    db = Database(url=url, pool_size=1, max_overflow=0)
+    engine = db.engine
+
+    try:
+        async with engine.connect() as conn:
+            partitioned = await is_partitioned(conn)
+            exists, legacy = await table_exists(conn, TABLE), await table_exists(conn, LEGACY)
+
+        if partitioned and not legacy:
+            logger.info(f"{TABLE} is already partitioned")
+            return
+
+        if not partitioned:
+            if bench and exists:
+                logger.info(f"Before: {await benchmark(engine, TABLE, runs)}")
+
+            await swap_tables(engine)
+
+        copied = await copy_rows(engine, batch_size)
+        logger.info(f"Migration finished, {copied} rows copied")
+
+        async with engine.begin() as conn:
+            await conn.execute(text(f"ANALYZE {TABLE}"))
+
+            if not keep_legacy:
+                await conn.execute(text(f"DROP TABLE {LEGACY}"))
+
+        if bench:
+            logger.info(f"After: {await benchmark(engine, TABLE, runs)}")
+    finally:
+        await db.dispose()
+
+
+if __name__ == "__main__":
+    from src.core.settings import settings_parser
+
+    parser = argparse.ArgumentParser(description="Migrate data_timeseriess to a partitioned table")
+    parser.add_argument("--batch-size", type=int, default=50_000)
+    parser.add_argument("--keep-legacy", action="store_true", help="do not drop data_timeseriess_legacy")
+    parser.add_argument("--benchmark", action="store_true", help="time point/range/latest queries before and after")
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    asyncio.run(migrate(settings_parser.database.url, args.batch_size, args.keep_legacy,
+                        args.benchmark, args.runs))
@@ -2,7 +2,8 @@
 from pyclbr import Class
 
 from sqlalchemy import (DateTime, ForeignKey, Float, String, 
-                        BigInteger, Integer, Boolean, func, JSON)
+                        BigInteger, Integer, Boolean, func, JSON,
+                        UniqueConstraint, LargeBinary, false)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .base import Base
@@ -63,10 +64,23 @@ class Timeseries(Base):
 
 
 class DataTimeseries(Base):
+    """
+    Свечи, таблица секционирована по месяцам (RANGE по datetime)
+
+    В ключи секционированной таблицы PostgreSQL обязана входить колонка
+    секционирования, поэтому первичный ключ (id, datetime). Уникальный ключ
+    (timeseries_id, datetime) - он же индекс для точечного поиска, диапазонов
+    и последних N свечей. Секции создает src.core.database.partitions.
+    """
+
+    __table_args__ = (
+        UniqueConstraint("timeseries_id", "datetime"),
+        {"postgresql_partition_by": "RANGE (datetime)"},
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     timeseries_id: Mapped[int] = mapped_column(ForeignKey('timeseriess.id'))  
-    datetime: Mapped[DateTime] = mapped_column(DateTime, nullable=False) 
+    datetime: Mapped[DateTime] = mapped_column(DateTime, primary_key=True, nullable=False) 
     open: Mapped[float] = mapped_column(Float)
     max: Mapped[float] = mapped_column(Float)
     min: Mapped[float] = mapped_column(Float)
@@ -74,6 +88,36 @@ class DataTimeseries(Base):
     volume: Mapped[float] = mapped_column(Float)
 
 
+class TimeseriesArchive(Base):
+    """
+    Холодный диапазон свечей timeseries: блок src.core.candle_codec за месяц
+    """
+    __table_args__ = (
+        UniqueConstraint("timeseries_id", "start"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    timeseries_id: Mapped[int] = mapped_column(ForeignKey('timeseriess.id'))
+    start: Mapped[DateTime] = mapped_column(DateTime, nullable=False)
+    end: Mapped[DateTime] = mapped_column(DateTime, nullable=False)
+    count: Mapped[int] = mapped_column(Integer, nullable=False)
+    data: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+
+
+class KlineCursor(Base):
+    """
+    High-water mark загрузки свечей по паре (монета, таймфрейм)
+    """
+    __table_args__ = (
+        UniqueConstraint("coin", "timeframe"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    coin: Mapped[str] = mapped_column(String(50), nullable=False)
+    timeframe: Mapped[str] = mapped_column(String(10), nullable=False)
+    last_datetime: Mapped[DateTime] = mapped_column(DateTime, nullable=False)
+
+
 class TelegramChannel(Base):
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
@@ -94,7 +138,7 @@ class News(Base):
     
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     type: Mapped[str] = mapped_column(String(50), default="news")
-    id_url: Mapped[int] = mapped_column(BigInteger)
+    id_url: Mapped[int] = mapped_column(BigInteger, unique=True)
     title: Mapped[str] = mapped_column(String(200), nullable=False)
     text: Mapped[str] = mapped_column(String(100000), nullable=False)
     date: Mapped[DateTime] = mapped_column(DateTime, default=func.now())
@@ -196,6 +240,7 @@ class ParsingTask(Base):
     save_type: Mapped[str] = mapped_column(String(20), default="raw")
     coins: Mapped[dict] = mapped_column(JSON, default=None)  # Список монет в формате JSON
     manual_stop: Mapped[bool] = mapped_column(Boolean, default=False)
+    stream: Mapped[bool] = mapped_column(Boolean, default=False, server_default=false(), nullable=False)
     
     # Статус задачи
     status: Mapped[str] = mapped_column(String(20), default="pending", index=True)
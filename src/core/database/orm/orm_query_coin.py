@@ -1,12 +1,15 @@
 # файл для query запросов
 from typing import List, Literal, Optional, Dict, Any
 from datetime import datetime, timedelta
-from sqlalchemy import select, update, delete, insert
+from sqlalchemy import select, update, delete, insert, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
 from pydantic import BaseModel
+import pandas as pd
 
-from src.core.database.models import (Coin, Timeseries, DataTimeseries)
+from src.core.database.models import (Coin, Timeseries, DataTimeseries, KlineCursor, TimeseriesArchive)
+from src.core import candle_codec
 
 class PriceData(BaseModel):
     price_now: float
@@ -19,6 +22,9 @@ class PriceData(BaseModel):
 ORM запросы для работы с монетами и тикерами KuCoin
 """
 
+# Колонки свечи, которые пишутся в DataTimeseries
+DATA_TIMESERIES_COLUMNS = ("datetime", "open", "close", "max", "min", "volume")
+
 from src.core.database import get_db_helper
 
 class CoinQuery:
@@ -290,6 +296,21 @@ class CoinQuery:
             result = await session.execute(query)
             return result.scalars().all()
 
+    @staticmethod
+    async def get_data_timeseries_frame(timeseries_id: int, since: datetime = None) -> pd.DataFrame:
+        """Свечи timeseries (начиная с since) одним DataFrame, по возрастанию времени"""
+        async with get_db_helper().get_session() as session:
+            query = (select(*(getattr(DataTimeseries, column) for column in DATA_TIMESERIES_COLUMNS))
+                     .where(DataTimeseries.timeseries_id == timeseries_id)
+                     .order_by(DataTimeseries.datetime))
+
+            if since is not None:
+                query = query.where(DataTimeseries.datetime >= since)
+
+            result = await session.execute(query)
+
+            return pd.DataFrame(result.all(), columns=list(DATA_TIMESERIES_COLUMNS))
+
     @staticmethod
     async def get_data_timeseries_by_datetime(timeseries_id: int, datetime: datetime) -> DataTimeseries:
         async with get_db_helper().get_session() as session:
@@ -323,3 +344,182 @@ class CoinQuery:
             await session.commit()
 
             return True
+
+    @staticmethod
+    async def add_data_timeseries_bulk(timeseries_id: int, 
+                                       data: pd.DataFrame | Dict[str, Any],
+                                       upsert: bool = False) -> int:
+        """
+        Массовая вставка свечей одного timeseries за одну транзакцию
+
+        Строки с уже существующей парой (timeseries_id, datetime) пропускаются
+        через ON CONFLICT DO NOTHING, поэтому буфер можно сбрасывать целиком.
+        С upsert=True такие строки обновляются (ON CONFLICT DO UPDATE) -
+        для свечей, которые пересчитываются, пока их период не закрыт.
+
+        Args:
+            timeseries_id: ID timeseries
+            data: DataFrame или словарь массивов с колонками datetime, open, close, max, min, volume
+            upsert: обновлять существующие свечи
+
+        Returns:
+            int: Количество вставленных (и обновленных при upsert) строк
+        """
+        if not isinstance(data, pd.DataFrame):
+            data = pd.DataFrame(data)
+
+        if data.empty:
+            return 0
+
+        data = data[list(DATA_TIMESERIES_COLUMNS)].copy()
+        data["datetime"] = pd.to_datetime(data["datetime"], errors="coerce")
+
+        for column in DATA_TIMESERIES_COLUMNS[1:]:
+            data[column] = pd.to_numeric(data[column], errors="coerce")
+
+        # Пропущенные свечи (NaN, synthetic) и битые даты в БД не пишем
+        data = data.dropna().drop_duplicates(subset=["datetime"])
+
+        if data.empty:
+            return 0
+
+        rows = [
+            {"timeseries_id": timeseries_id, "datetime": dt, "open": o, 
+             "close": c, "max": mx, "min": mn, "volume": v}
+            for dt, o, c, mx, mn, v in zip(data["datetime"].dt.to_pydatetime().tolist(),
+                                           data["open"].tolist(), data["close"].tolist(),
+                                           data["max"].tolist(), data["min"].tolist(),
+                                           data["volume"].tolist())
+        ]
+
+        query = pg_insert(DataTimeseries)
+
+        if upsert:
+            query = query.on_conflict_do_update(
+                index_elements=["timeseries_id", "datetime"],
+                set_={column: query.excluded[column] for column in DATA_TIMESERIES_COLUMNS[1:]}
+            )
+        else:
+            query = query.on_conflict_do_nothing(index_elements=["timeseries_id", "datetime"])
+
+        query = query.returning(DataTimeseries.id)
+
+        async with get_db_helper().get_session() as session:
+            result = await session.execute(query, rows)
+            inserted = len(result.all())
+            await session.commit()
+
+            return inserted
+
+    @staticmethod
+    async def archive_data_timeseries(timeseries_id: int, before: datetime) -> int:
+        """
+        Перенос свечей старше before из DataTimeseries в сжатые блоки TimeseriesArchive
+
+        Блок - календарный месяц; если блок месяца уже есть, свечи объединяются
+        с ним. Все идет в одной транзакции: DELETE ... RETURNING забирает ровно
+        те строки, что попадут в архив, и перекодируются только блоки затронутых месяцев.
+
+        Returns:
+            int: Количество перенесенных свечей
+        """
+        columns = [getattr(DataTimeseries, column) for column in DATA_TIMESERIES_COLUMNS]
+
+        async with get_db_helper().get_session() as session:
+            result = await session.execute(delete(DataTimeseries).where(
+                DataTimeseries.timeseries_id == timeseries_id,
+                DataTimeseries.datetime < before).returning(*columns))
+            data = pd.DataFrame(result.all(), columns=list(DATA_TIMESERIES_COLUMNS))
+
+            if data.empty:
+                return 0
+
+            moved = len(data)
+            data["datetime"] = pd.to_datetime(data["datetime"])
+            months = set(data["datetime"].dt.to_period("M"))
+
+            result = await session.execute(
+                select(TimeseriesArchive.id, TimeseriesArchive.start, TimeseriesArchive.data)
+                .where(TimeseriesArchive.timeseries_id == timeseries_id,
+                       TimeseriesArchive.start >= min(months).start_time.to_pydatetime(),
+                       TimeseriesArchive.start < (max(months) + 1).start_time.to_pydatetime())
+                .with_for_update())
+            blocks = [block for block in result.all() if pd.Timestamp(block.start).to_period("M") in months]
+
+            if blocks:
+                archived = [candle_codec.decode_candles(block.data) for block in blocks]
+                data = (pd.concat([*archived, data], ignore_index=True)
+                        .drop_duplicates(subset=["datetime"], keep="last"))
+
+                # Начало блока месяца может сдвинуться раньше - старый блок заменяется новым
+                await session.execute(delete(TimeseriesArchive).where(
+                    TimeseriesArchive.id.in_([block.id for block in blocks])))
+
+            data = data.sort_values("datetime", ignore_index=True)
+
+            rows = []
+            for _, block in data.groupby(data["datetime"].dt.to_period("M"), sort=True):
+                rows.append({"timeseries_id": timeseries_id, "start": block["datetime"].min().to_pydatetime(),
+                             "end": block["datetime"].max().to_pydatetime(), "count": len(block),
+                             "data": candle_codec.encode_candles(block)})
+
+            await session.execute(pg_insert(TimeseriesArchive), rows)
+            await session.commit()
+
+            return moved
+
+    @staticmethod
+    async def get_archived_data_timeseries(timeseries_id: int, start: datetime = None,
+                                           end: datetime = None) -> pd.DataFrame:
+        """Свечи из архивных блоков timeseries в диапазоне [start, end), по возрастанию времени"""
+        async with get_db_helper().get_session() as session:
+            query = (select(TimeseriesArchive.data)
+                     .where(TimeseriesArchive.timeseries_id == timeseries_id)
+                     .order_by(TimeseriesArchive.start))
+
+            if start is not None:
+                query = query.where(TimeseriesArchive.end >= start)
+            if end is not None:
+                query = query.where(TimeseriesArchive.start < end)
+
+            blocks = (await session.execute(query)).scalars().all()
+
+        if not blocks:
+            return pd.DataFrame({column: [] for column in DATA_TIMESERIES_COLUMNS})
+
+        data = pd.concat([candle_codec.decode_candles(block) for block in blocks], ignore_index=True)
+
+        if start is not None:
+            data = data[data["datetime"] >= start]
+        if end is not None:
+            data = data[data["datetime"] < end]
+
+        return data.reset_index(drop=True)
+
+    @staticmethod
+    async def get_kline_cursors(timeframe: str) -> Dict[str, datetime]:
+        """Получить high-water mark загрузки свечей всех монет для таймфрейма"""
+        async with get_db_helper().get_session() as session:
+            query = select(KlineCursor).where(KlineCursor.timeframe == timeframe)
+            result = await session.execute(query)
+            return {cursor.coin: cursor.last_datetime for cursor in result.scalars().all()}
+
+    @staticmethod
+    async def set_kline_cursor(coin: str, timeframe: str, last_datetime: datetime) -> None:
+        """
+        Сдвинуть high-water mark монеты вперед
+
+        Курсор только растет: значение меньше сохраненного игнорируется.
+        """
+        query = pg_insert(KlineCursor).values(coin=coin, timeframe=timeframe, 
+                                              last_datetime=last_datetime)
+        query = query.on_conflict_do_update(
+            index_elements=["coin", "timeframe"],
+            set_={"last_datetime": func.greatest(KlineCursor.last_datetime, 
+                                                 query.excluded.last_datetime),
+                  "updated": func.now()}
+        )
+
+        async with get_db_helper().get_session() as session:
+            await session.execute(query)
+            await session.commit()
@@ -2,6 +2,7 @@
 from datetime import datetime
 from typing import List
 from sqlalchemy import select, update, delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
 from pydantic import BaseModel
@@ -35,6 +36,33 @@ class NewsQuery:
             await session.refresh(news)
             return news
 
+    @staticmethod
+    async def add_news_batch(news_list: List[NewsData]) -> int:
+        """
+        Сохранить пачку новостей одним INSERT ... ON CONFLICT (id_url) DO NOTHING
+
+        Returns:
+            int: Количество добавленных новостей
+        """
+        news_by_id = {news.id_url: news for news in news_list}
+
+        if not news_by_id:
+            return 0
+
+        rows = [{"id_url": news.id_url, "title": news.title, "text": news.text,
+                 "type": news.type.value if isinstance(news.type, NewsType) else news.type,
+                 "date": news.date}
+                for news in news_by_id.values()]
+
+        query = pg_insert(News).values(rows).on_conflict_do_nothing(index_elements=["id_url"]).returning(News.id)
+
+        async with get_db_helper().get_session() as session:
+            result = await session.execute(query)
+            inserted = len(result.all())
+            await session.commit()
+
+            return inserted
+
     @staticmethod
     async def get_telegram_channels(parsed: bool = None) -> List[TelegramChannel]:
         async with get_db_helper().get_session() as session:
@@ -23,6 +23,8 @@ class TaskQuery:
         save_type: str = "raw",
         coins: Optional[list] = None,
         manual_stop: bool = False,
+        stream: bool = False,
+        status: str = "pending",
     ) -> ParsingTask:
         """
         Создать новую задачу парсинга в БД
@@ -40,7 +42,8 @@ class TaskQuery:
             save_type=save_type,
             coins=coins,
             manual_stop=manual_stop,
-            status="pending",
+            stream=stream,
+            status=status,
         )
         async with get_db_helper().get_session() as session:
             session.add(parsing_task)
@@ -60,6 +63,35 @@ class TaskQuery:
             result = await session.execute(query)
             return result.scalar_one_or_none()
 
+    @staticmethod
+    async def get_parsing_tasks_by_task_ids(
+        task_ids: list[str]
+    ) -> list[ParsingTask]:
+        """
+        Получить задачи парсинга по списку Celery task_id
+        """
+        async with get_db_helper().get_session() as session:
+            query = select(ParsingTask).where(ParsingTask.task_id.in_(task_ids))
+            result = await session.execute(query)
+            return list(result.scalars().all())
+
+    @staticmethod
+    async def update_parsing_task_coins(
+        task_id: str,
+        coins: list
+    ) -> None:
+        """
+        Обновить список монет задачи парсинга
+        """
+        async with get_db_helper().get_session() as session:
+            query = (
+                update(ParsingTask)
+                .where(ParsingTask.task_id == task_id)
+                .values(coins=coins, updated_at=datetime.utcnow())
+            )
+            await session.execute(query)
+            await session.commit()
+
     @staticmethod
     async def get_parsing_task_by_id(
         task_db_id: int 
@@ -117,6 +149,31 @@ class TaskQuery:
             return await TaskQuery.get_parsing_task_by_task_id(task_id)
 
 
+    @staticmethod
+    async def set_parsing_task_launch_dir(task_id: str, launch_dir: str) -> None:
+        """
+        Записать папку запуска в result задачи (остальные ключи result сохраняются)
+        """
+        async with get_db_helper().get_session() as session:
+            task = (await session.execute(select(ParsingTask).where(ParsingTask.task_id == task_id))).scalar_one_or_none()
+
+            if task is None or (task.result or {}).get("launch_dir") == launch_dir:
+                return
+
+            task.result = {**(task.result or {}), "launch_dir": launch_dir}
+            await session.commit()
+
+    @staticmethod
+    async def get_active_launch_dirs() -> set[str]:
+        """
+        Папки запусков незавершенных задач парсинга - их нельзя склеивать и удалять
+        """
+        async with get_db_helper().get_session() as session:
+            query = select(ParsingTask.result).where(ParsingTask.status.in_(["pending", "in_progress", "error"]))
+            results = (await session.execute(query)).scalars().all()
+
+        return {result["launch_dir"] for result in results if result and result.get("launch_dir")}
+
     @staticmethod
     async def get_unfinished_parsing_tasks(
         include_manual_stop: bool = True
@@ -0,0 +1,122 @@
+"""
+Месячные секции таблицы свечей DataTimeseries (PostgreSQL)
+"""
+from datetime import date, datetime
+from typing import List
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from .models import DataTimeseries
+
+import logging
+
+logger = logging.getLogger("Database.partitions")
+
+TABLE = DataTimeseries.__tablename__
+DEFAULT_PARTITION = f"{TABLE}_default"
+
+
+def month_start(value: date | datetime) -> date:
+    return date(value.year, value.month, 1)
+
+
+def next_month(value: date) -> date:
+    return date(value.year + value.month // 12, value.month % 12 + 1, 1)
+
+
+def month_range(start: date | datetime, end: date | datetime) -> List[date]:
+    """Начала месяцев от start до end включительно"""
+    months, month = [], month_start(start)
+
+    while month <= month_start(end):
+        months.append(month)
+        month = next_month(month)
+
+    return months
+
+
+def partition_name(month: date) -> str:
+    return f"{TABLE}_y{month.year}m{month.month:02d}"
+
+
+async def is_partitioned(conn: AsyncConnection, table: str = TABLE) -> bool:
+    result = await conn.execute(text(
+        "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = :table AND pg_table_is_visible(c.oid)"
+    ), {"table": table})
+
+    return result.first() is not None
+
+
+async def existing_partitions(conn: AsyncConnection) -> set[str]:
+    result = await conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :table AND pg_table_is_visible(p.oid)"
+    ), {"table": TABLE})
+
+    return {row[0] for row in result}
+
+
+async def create_month_partition(conn: AsyncConnection, month: date) -> bool:
+    """
+    Создать секцию месяца, если ее нет
+
+    Если строки этого месяца уже попали в секцию по умолчанию, они
+    переносятся в новую таблицу, и только потом она подключается как секция.
+    """
+    name, start, end = partition_name(month), month, next_month(month)
+
+    if name in await existing_partitions(conn):
+        return False
+
+    bounds = {"start": start, "end": end}
+    default_rows = (await conn.execute(text(
+        f"SELECT 1 FROM {DEFAULT_PARTITION} WHERE datetime >= :start AND datetime < :end LIMIT 1"
+    ), bounds)).first() if DEFAULT_PARTITION in await existing_partitions(conn) else None
+
+    if default_rows is None:
+        await conn.execute(text(
+            f"CREATE TABLE {name} PARTITION OF {TABLE} "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        ))
+    else:
+        await conn.execute(text(f"CREATE TABLE {name} (LIKE {TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+        await conn.execute(text(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE datetime >= :start AND datetime < :end RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved"
+        ), bounds)
+        await conn.execute(text(
+            f"ALTER TABLE {TABLE} ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        ))
+
+    logger.info(f"Partition {name} created")
+
+    return True
+
+
+async def ensure_partitions(conn: AsyncConnection, start: date | datetime = None,
+                            end: date | datetime = None, months_ahead: int = 2) -> List[str]:
+    """
+    Секция по умолчанию и месячные секции от start (по умолчанию текущий месяц)
+    до end + months_ahead, чтобы вставка новых свечей не упиралась в DEFAULT
+    """
+    if not await is_partitioned(conn):
+        logger.warning(f"Table {TABLE} is not partitioned, run migrate_data_timeseries")
+        return []
+
+    today = datetime.utcnow().date()
+    end = month_start(end or today)
+    for _ in range(months_ahead):
+        end = next_month(end)
+
+    await conn.execute(text(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT"))
+
+    created = []
+    for month in month_range(start or today, end):
+        if await create_month_partition(conn, month):
+            created.append(partition_name(month))
+
+    return created
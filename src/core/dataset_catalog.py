@@ -0,0 +1,272 @@
+"""
+Каталог файлов датасетов в SQLite
+
+Вместо обхода папок при каждом поиске: путь, монета, таймфрейм, тип
+(raw/processed), запуск парсера, число строк, min/max datetime и mtime
+каждого файла. Запись обновляется при сохранении датасета, поиск идет по индексам.
+Папки запусков хранятся отдельно от файлов - пустой только что созданный
+запуск тоже последний.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from threading import Lock
+from typing import Iterable, List, Optional
+import fnmatch
+import os
+import re
+import sqlite3
+
+import pandas as pd
+
+import logging
+
+logger = logging.getLogger("DatasetCatalog")
+
+LAUNCH_PATTERN = re.compile(r"^(?P<name>.+)_(?P<number>\d+)$")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS datasets (
+    path TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    kind TEXT,
+    coin TEXT,
+    timeframe TEXT,
+    launch TEXT,
+    launch_number INTEGER,
+    rows INTEGER,
+    min_datetime TEXT,
+    max_datetime TEXT,
+    mtime REAL
+);
+CREATE INDEX IF NOT EXISTS ix_datasets_name ON datasets (name);
+CREATE INDEX IF NOT EXISTS ix_datasets_kind_coin ON datasets (kind, coin, timeframe);
+CREATE INDEX IF NOT EXISTS ix_datasets_launch_number ON datasets (kind, launch_number);
+CREATE INDEX IF NOT EXISTS ix_datasets_launch ON datasets (launch);
+CREATE TABLE IF NOT EXISTS launches (
+    path TEXT PRIMARY KEY,
+    kind TEXT,
+    number INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_launches_number ON launches (kind, number);
+"""
+
+COLUMNS = ("path", "name", "kind", "coin", "timeframe", "launch", "launch_number",
+           "rows", "min_datetime", "max_datetime", "mtime")
+
+
+class DatasetCatalog:
+    """
+    Индекс CSV датасетов в папке данных
+
+    Тип, монета, таймфрейм и запуск берутся из пути:
+    raw/<launch_parser_N>/<coin>/<coin>_<timeframe>.csv,
+    processed/<coin>/<timeframe>/<coin>_<timeframe>.csv.
+    Соединение открывается лениво в каждом процессе (Celery форкает воркеры).
+    """
+
+    def __init__(self, path: Path, data_dir: Path) -> None:
+        self.path = Path(path)
+        self.data_dir = Path(data_dir)
+
+        self._connection: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._lock = Lock()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None or self._pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+
+            self._connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.executescript(SCHEMA)
+            self._pid = os.getpid()
+
+        return self._connection
+
+    def describe(self, path: Path) -> dict:
+        """Поля каталога, которые определяются по пути файла"""
+        path = Path(path).resolve()
+        coin, timeframe = None, None
+
+        if "_" in path.stem:
+            coin, timeframe = path.stem.rsplit("_", 1)
+
+        try:
+            parts = path.relative_to(self.data_dir.resolve()).parts
+        except ValueError:
+            parts = ()
+
+        kind = parts[0] if len(parts) > 1 else None
+        launch, launch_number = None, None
+
+        if kind == "raw" and len(parts) > 2:
+            match = LAUNCH_PATTERN.match(parts[1])
+            if match:
+                launch, launch_number = str(self.data_dir.resolve() / parts[0] / parts[1]), int(match["number"])
+
+        return {"path": str(path), "name": path.name, "kind": kind, "coin": coin,
+                "timeframe": timeframe, "launch": launch, "launch_number": launch_number}
+
+    def register(self, path: Path, data: pd.DataFrame = None, stats: dict = None) -> None:
+        """
+        Добавить или обновить запись файла; data - уже записанный датасет,
+        stats - готовые rows/min_datetime/max_datetime (из индекса файла), чтобы не читать файл
+        """
+        path = Path(path)
+        record = self.describe(path)
+
+        if stats is not None:
+            record.update({"rows": stats["rows"], "min_datetime": stats["min_datetime"],
+                           "max_datetime": stats["max_datetime"]})
+        else:
+            if data is None:
+                try:
+                    data = pd.read_csv(path, usecols=["datetime"])
+                except (ValueError, FileNotFoundError):
+                    data = pd.DataFrame()
+
+            record["rows"] = len(data)
+            record["min_datetime"], record["max_datetime"] = None, None
+
+            if "datetime" in data.columns and len(data):
+                timestamp = pd.to_datetime(data["datetime"], errors="coerce")
+                record["min_datetime"] = str(timestamp.min())
+                record["max_datetime"] = str(timestamp.max())
+
+        record["mtime"] = path.stat().st_mtime if path.exists() else None
+
+        with self._lock, self.connection as connection:
+            connection.execute(f"INSERT OR REPLACE INTO datasets ({', '.join(COLUMNS)}) "
+                               f"VALUES ({', '.join('?' * len(COLUMNS))})",
+                               [record[column] for column in COLUMNS])
+
+    def add_launch(self, path: Path) -> None:
+        """Запомнить папку запуска <kind>/<name>_<N>, даже пока в ней нет файлов"""
+        path = Path(path).resolve()
+        match = LAUNCH_PATTERN.match(path.name)
+
+        if match is None:
+            return
+
+        try:
+            kind = path.relative_to(self.data_dir.resolve()).parts[0]
+        except (ValueError, IndexError):
+            kind = None
+
+        with self._lock, self.connection as connection:
+            connection.execute("INSERT OR REPLACE INTO launches (path, kind, number) VALUES (?, ?, ?)",
+                               (str(path), kind, int(match["number"])))
+
+    def remove(self, path: Path) -> None:
+        """Удалить файл или все файлы папки (и запуски в ней) из каталога"""
+        path = str(Path(path).resolve())
+        params = (path, path + os.sep, path + chr(ord(os.sep) + 1))
+
+        with self._lock, self.connection as connection:
+            for table in ("datasets", "launches"):
+                connection.execute(f"DELETE FROM {table} WHERE path = ? OR (path >= ? AND path < ?)", params)
+
+    def rebuild(self, roots: Iterable[Path]) -> int:
+        """Полная переиндексация - единственное место с обходом папок"""
+        with self._lock, self.connection as connection:
+            connection.execute("DELETE FROM datasets")
+            connection.execute("DELETE FROM launches")
+
+        count = 0
+        for root in roots:
+            if not Path(root).is_dir():
+                continue
+
+            with os.scandir(root) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        self.add_launch(Path(entry.path))
+
+            for file in Path(root).rglob("*.csv"):
+                self.register(file)
+                count += 1
+
+        logger.info(f"Catalog rebuilt: {count} files")
+
+        return count
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            return self.connection.execute("SELECT 1 FROM datasets LIMIT 1").fetchone() is None
+
+    def _select(self, where: List[str], params: list, order: str = "path") -> List[dict]:
+        query = f"SELECT {', '.join(COLUMNS)} FROM datasets"
+        if where:
+            query += " WHERE " + " AND ".join(where)
+
+        with self._lock:
+            rows = self.connection.execute(f"{query} ORDER BY {order}", params).fetchall()
+
+        return [dict(zip(COLUMNS, row)) for row in rows]
+
+    def _existing(self, rows: List[dict]) -> List[dict]:
+        """Файлы, удаленные мимо каталога, выбрасываются из него при поиске"""
+        missing = [row["path"] for row in rows if not os.path.exists(row["path"])]
+
+        if missing:
+            with self._lock, self.connection as connection:
+                connection.executemany("DELETE FROM datasets WHERE path = ?", [(path,) for path in missing])
+
+        return [row for row in rows if row["path"] not in missing]
+
+    def find(self, kind: str = None, coin: str = None, timeframe: str = None,
+             launch: Path = None, under: Path = None) -> List[dict]:
+        where, params = [], []
+
+        for column, value in (("kind", kind), ("coin", coin), ("timeframe", timeframe)):
+            if value is not None:
+                where.append(f"{column} = ?")
+                params.append(value)
+
+        if launch is not None:
+            where.append("launch = ?")
+            params.append(str(Path(launch).resolve()))
+
+        if under is not None:
+            prefix = str(Path(under).resolve())
+            where.append("path >= ? AND path < ?")
+            params.extend([prefix + os.sep, prefix + chr(ord(os.sep) + 1)])
+
+        return self._existing(self._select(where, params))
+
+    def find_name(self, pattern: str) -> List[dict]:
+        """Поиск по имени файла: точное имя - по индексу, шаблон с * - GLOB"""
+        name = os.path.basename(pattern)
+
+        if "*" in name:
+            rows = self._select(["name GLOB ?"], [name])
+        else:
+            rows = self._select(["name = ?"], [name])
+
+        if pattern != name:
+            rows = [row for row in rows if fnmatch.fnmatch(row["path"], "*" + pattern)]
+
+        return self._existing(rows)
+
+    def last_launch(self, kind: str = "raw") -> Optional[Path]:
+        """
+        Запуск с наибольшим номером: из папок запусков и из файлов (каталоги,
+        созданные до таблицы launches, знают запуски только по файлам)
+        """
+        query = ("SELECT path, number FROM launches WHERE kind = ? "
+                 "UNION SELECT launch, launch_number FROM datasets WHERE kind = ? AND launch_number IS NOT NULL "
+                 "ORDER BY number DESC LIMIT 1")
+
+        while True:
+            with self._lock:
+                row = self.connection.execute(query, (kind, kind)).fetchone()
+
+            if row is None:
+                return None
+
+            if os.path.exists(row[0]):
+                return Path(row[0])
+
+            self.remove(row[0])
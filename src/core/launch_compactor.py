@@ -0,0 +1,222 @@
+"""
+Склейка и очистка папок запусков парсера raw/launch_parser_N
+
+Каждый запуск с save создает новую папку, и они только копятся. Компактор
+переносит старые запуски (кроме последних keep_last - их читает
+_load_last_launch) в один файл на пару (монета, таймфрейм):
+raw/consolidated/<coin>/<coin>_<timeframe>.parquet. Дубликаты по datetime
+убираются, при совпадении остается значение более позднего запуска.
+Строки старше retention удаляются, только если они уже есть в processed.
+
+Запуски, в которые еще пишут (папки активных задач парсинга, свежий mtime),
+и запуски с нечитаемыми файлами или строками без разбираемого datetime не
+склеиваются и не удаляются. datetime хранится строкой "YYYY-MM-DD HH:MM:SS"
+и для дневных свечей - как в сырых файлах.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from shutil import rmtree
+from typing import Callable, Dict, Iterable, List, Optional
+import os
+import re
+import time
+
+import pandas as pd
+
+import logging
+
+logger = logging.getLogger("LaunchCompactor")
+
+LAUNCH_PATTERN = re.compile(r"^(?P<name>.+)_(?P<number>\d+)$")
+CONSOLIDATED_DIR = "consolidated"
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def dir_size(path: Path) -> int:
+    return sum(file.stat().st_size for file in Path(path).rglob("*") if file.is_file())
+
+
+def last_modified(path: Path) -> float:
+    """Самый свежий mtime папки и всего, что в ней лежит"""
+    return max([path.stat().st_mtime, *(entry.stat().st_mtime for entry in Path(path).rglob("*"))])
+
+
+def parse_datetime(values: pd.Series) -> pd.Series:
+    """Явный ISO8601, а не вывод формата по первой строке: в одной колонке бывают даты с часами и без"""
+    return pd.to_datetime(values, format="ISO8601", errors="coerce")
+
+
+def launch_dirs(raw_dir: Path) -> List[tuple[int, Path]]:
+    """Папки запусков по возрастанию номера"""
+    launches = []
+
+    with os.scandir(raw_dir) as entries:
+        for entry in entries:
+            match = LAUNCH_PATTERN.match(entry.name)
+
+            if entry.is_dir() and match:
+                launches.append((int(match["number"]), Path(entry.path)))
+
+    return sorted(launches)
+
+
+class LaunchCompactor:
+    """
+    processed_last(coin, timeframe) - последняя свеча в processed:
+    до нее сырые данные уже обработаны и их можно удалять по retention
+    """
+
+    def __init__(self, raw_dir: Path, processed_last: Callable[[str, str], Optional[pd.Timestamp]],
+                 on_remove: Callable[[Path], None] = None) -> None:
+        self.raw_dir = Path(raw_dir)
+        self.processed_last = processed_last
+        self.on_remove = on_remove
+
+    def path(self, coin: str, timeframe: str) -> Path:
+        return self.raw_dir / CONSOLIDATED_DIR / coin / f"{coin}_{timeframe}.parquet"
+
+    def read(self, coin: str, timeframe: str) -> pd.DataFrame:
+        path = self.path(coin, timeframe)
+
+        if not path.exists():
+            return pd.DataFrame()
+
+        return pd.read_parquet(path)
+
+    @staticmethod
+    def _read_launch_file(path: Path) -> pd.DataFrame:
+        # Значения как есть (строки с суффиксами K/M, "x"), без преобразования типов
+        return pd.read_csv(path, dtype=str)
+
+    def _write(self, path: Path, data: pd.DataFrame) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        data.to_parquet(tmp_path, index=False, compression="zstd")
+        os.replace(tmp_path, path)
+
+    def _merge(self, coin: str, timeframe: str, frames: List[pd.DataFrame],
+               retention_cutoff: Optional[pd.Timestamp]) -> Dict[str, int]:
+        path = self.path(coin, timeframe)
+        old_size = path.stat().st_size if path.exists() else 0
+
+        # Порядок: уже склеенное, затем запуски по возрастанию номера - keep="last" оставляет свежие значения
+        data = pd.concat([self.read(coin, timeframe), *frames], ignore_index=True)
+
+        timestamp = parse_datetime(data["datetime"])
+        data = data.assign(datetime=timestamp.dt.strftime(DATETIME_FORMAT))[timestamp.notna().to_numpy()]
+        timestamp = timestamp.dropna()
+
+        keep = ~timestamp.duplicated(keep="last").to_numpy()
+        data, timestamp = data[keep], timestamp[keep]
+
+        expired = 0
+        if retention_cutoff is not None:
+            processed_last = self.processed_last(coin, timeframe)
+
+            if processed_last is not None:
+                cutoff = min(retention_cutoff, pd.Timestamp(processed_last))
+                old = (timestamp < cutoff).to_numpy()
+                expired = int(old.sum())
+                data, timestamp = data[~old], timestamp[~old]
+
+        order = timestamp.argsort(kind="stable")
+        data = data.iloc[order].reset_index(drop=True)
+
+        if data.empty:
+            path.unlink(missing_ok=True)
+        else:
+            self._write(path, data)
+
+        return {"rows": len(data), "expired": expired,
+                "bytes": (path.stat().st_size if path.exists() else 0) - old_size}
+
+    def compact(self, keep_last: int = 1, retention_days: Optional[int] = None,
+                dry_run: bool = False, skip: Iterable[Path] = (), min_age: float = 0) -> Dict[str, int]:
+        """
+        Склеить все запуски, кроме keep_last последних, и удалить их папки
+
+        retention_days - удалить из склеенных файлов строки старше, уже попавшие в processed.
+        dry_run - только посчитать, что будет склеено.
+        skip - папки запусков активных задач (шарды одного запуска пишут в общую папку).
+        min_age - не трогать запуски, измененные меньше min_age секунд назад.
+        """
+        launches = launch_dirs(self.raw_dir)
+        launches = launches[:-keep_last] if keep_last else launches
+
+        skip = {Path(path).resolve() for path in skip}
+        now = time.time()
+
+        active = [launch for _, launch in launches
+                  if launch.resolve() in skip or now - last_modified(launch) < min_age]
+        launches = [(number, launch) for number, launch in launches if launch not in active]
+
+        retention_cutoff = None
+        if retention_days is not None:
+            retention_cutoff = pd.Timestamp.now().normalize() - pd.Timedelta(days=retention_days)
+
+        frames: Dict[tuple[str, str], List[pd.DataFrame]] = {}
+        broken = []
+        bytes_before = 0
+
+        for number, launch in list(launches):
+            launch_frames = {}
+
+            try:
+                for file in sorted(launch.glob("*/*.csv")):
+                    if "_" not in file.stem:
+                        continue
+
+                    data = self._read_launch_file(file)
+
+                    # Строки с неразобранным временем потерялись бы при склейке, а папка - при удалении
+                    if "datetime" not in data.columns or parse_datetime(data["datetime"]).isna().any():
+                        raise ValueError("datetime column is missing or not parsed")
+
+                    launch_frames[tuple(file.stem.rsplit("_", 1))] = data
+            except (pd.errors.EmptyDataError, pd.errors.ParserError, ValueError) as e:
+                # Папка остается целиком: без этого файла ее данные потерялись бы при удалении
+                logger.warning(f"Skip launch {launch}, broken file {file}: {e}")
+                broken.append(launch)
+                launches.remove((number, launch))
+                continue
+
+            bytes_before += dir_size(launch)
+
+            for key, data in launch_frames.items():
+                frames.setdefault(key, []).append(data)
+
+        report = {"launches": len(launches), "files": sum(map(len, frames.values())),
+                  "series": len(frames), "rows": 0, "expired": 0,
+                  "launches_active": len(active), "launches_broken": len(broken),
+                  "bytes_before": bytes_before, "bytes_reclaimed": 0}
+
+        if dry_run:
+            return report
+
+        # Без новых запусков retention все равно применяется к уже склеенным файлам
+        keys = set(frames)
+        if retention_cutoff is not None:
+            for file in (self.raw_dir / CONSOLIDATED_DIR).glob("*/*.parquet"):
+                keys.add((file.parent.name, file.stem[len(file.parent.name) + 1:]))
+
+        added = 0
+        for coin, timeframe in sorted(keys):
+            result = self._merge(coin, timeframe, frames.get((coin, timeframe), []), retention_cutoff)
+            report["rows"] += result["rows"]
+            report["expired"] += result["expired"]
+            added += result["bytes"]
+
+        # Папки удаляются только после записи склеенных файлов
+        for _, launch in launches:
+            rmtree(launch)
+
+            if self.on_remove is not None:
+                self.on_remove(launch)
+
+        report["bytes_reclaimed"] = bytes_before - added
+
+        logger.info(f"Raw launches compacted: {report}")
+
+        return report
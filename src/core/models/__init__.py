@@ -1,4 +1,4 @@
-__all__ = ("Dataset", "DatasetTimeseries")
+__all__ = ("Dataset", "DatasetTimeseries", "CandleRingBuffer")
 
 from .dataset import Dataset, DatasetTimeseries
-
+from .ring_buffer import CandleRingBuffer
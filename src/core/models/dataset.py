@@ -11,14 +11,19 @@ else:
 import pandas as pd
 from datetime import datetime
 from pathlib import PosixPath
-from typing import Union
-from os import walk, mkdir, path, getcwd
+from typing import Literal, Union
+from os import walk, makedirs, path, getcwd
 import re
 
 from src.core import data_manager
 from src.core.utils.clear_datasets import *
+from src.core.utils.gap_fill import fill_gaps
+from src.core.utils.numeric import coerce_ohlcv, typed_missing, SYNTHETIC_COLUMN
 from src.core.utils.tesseract_img_text import RU_EN_timetravel
 
+from src.core.ohlcv_memmap import OHLCVMemmap
+from .time_index import CSVTimeIndex
+
 import logging
 
 logger = logging.getLogger("Dataset")
@@ -116,6 +121,14 @@ class Dataset:
         if path.exists(pattern) and path.isfile(pattern):
             return pattern
 
+        # Файлы папки данных ищем в каталоге, обход root_dir - только для остальных
+        matched_files = [record["path"] for record in data_manager.catalog.find_name(str(pattern))]
+
+        if len(matched_files) == 1:
+            return matched_files[0]
+        elif matched_files:
+            return matched_files
+
         regex_pattern = '^' + '.*'.join(re.escape(part) for part in pattern.split('*')) + '$'
         regex = re.compile(regex_pattern)
         
@@ -155,18 +168,62 @@ class Dataset:
         return result
     
     def save_dataset(self, name_file: str = None) -> None:
-        if not path.exists(self.path_save):
-            mkdir(self.path_save)
+        """
+        Сохранение в CSV без перезаписи: строки позже последней в файле
+        дописываются в конец, строки, уже лежащие в файле без изменений,
+        пропускаются. Если новые данные меняют прошлое, переписывается только
+        хвост с первого измененного дня (с объединением, как concat_dataset);
+        полная перезапись - при другом наборе колонок или без индекса.
+
+        self.dataset не заменяется содержимым файла - читать файл целиком
+        ради сохранения не нужно.
+        """
+        # exist_ok: clear_datasets пишет разные файлы в одну папку из нескольких процессов
+        makedirs(self.path_save, exist_ok=True)
 
         if name_file is None:
             name_file = self.file_name
 
-        if path.exists(path.join(self.path_save, name_file)):
-            dataset = Dataset(path.join(self.path_save, name_file))
-            self.dataset = self.concat_dataset(self.get_dataset(), dataset)
+        path_file = path.join(self.path_save, name_file)
+        index = CSVTimeIndex(path_file)
+
+        if "datetime" not in self.dataset.columns:
+            if path.exists(path_file):
+                self.dataset = self.concat_dataset(self.get_dataset(), Dataset(path_file))
+
+            self.dataset.to_csv(path_file, index=False, encoding='utf-8')
+            data_manager.catalog.register(path_file, self.dataset)
+
+        elif index.load() and index.same_columns(self.dataset):
+            changed = index.first_change(self.dataset)
+
+            if changed is None:
+                written = index.append(self.dataset)
+                logger.debug(f"Appended {written} rows to {path_file}")
+            else:
+                written = index.rewrite_from(self.dataset, changed)
+                logger.debug(f"Rewrote {written} rows of {path_file} from {changed}")
+
+            data_manager.catalog.register(path_file, stats=index.stats())
+
+        else:
+            dataset = self.dataset
+            if path.exists(path_file):
+                dataset = self.concat_dataset(dataset, Dataset(path_file))
+
+            index.write(dataset)
+            data_manager.catalog.register(path_file, stats=index.stats())
+
+        logger.info(f"Dataset saved to {path_file}")
+
+    def load_range(self, start: datetime = None, end: datetime = None, name_file: str = None) -> pd.DataFrame:
+        """Строки сохраненного файла в [start, end] через индекс, без чтения всего файла"""
+        index = CSVTimeIndex(path.join(self.path_save, name_file or self.file_name))
 
-        self.dataset.to_csv(path.join(self.path_save, name_file), index=False, encoding='utf-8')
-        logger.info(f"Dataset saved to {path.join(self.path_save, name_file)}")
+        if not index.load():
+            raise FileNotFoundError(f"Dataset {index.csv_path} not found")
+
+        return index.read_range(start, end)
 
     def __iter__(self):
         for index, data in self.dataset.iterrows():
@@ -219,6 +276,11 @@ class DatasetTimeseries(Dataset):
     
         self.dataset = self.dataset.dropna(subset=["datetime"])
 
+        # OHLCV - float64 с NaN в пропущенных свечах и колонкой synthetic, старые CSV с "x" тоже
+        self.dataset = typed_missing(self.dataset)
+        self.gap_report = None
+        self.rejected = None
+
         # self.dataset["datetime"] = pd.to_datetime(self.dataset["datetime"], 
         #                                           format="%Y-%m-%d %H:%M:%S",
         #                                           errors='coerce')
@@ -227,6 +289,30 @@ class DatasetTimeseries(Dataset):
 
         self.timetravel = timetravel
 
+    @classmethod
+    def from_memmap(cls, path_or_file: Union[str, PosixPath, OHLCVMemmap],
+                    start: datetime = None, end: datetime = None) -> DatasetTimeseries:
+        """
+        Датасет поверх бинарного файла OHLCV без копирования и разбора дат
+
+        Колонки - представления memmap (только чтение), set_dataset и
+        get_dataset по-прежнему работают с копиями.
+        """
+        file = path_or_file if isinstance(path_or_file, OHLCVMemmap) else OHLCVMemmap(path_or_file)
+
+        dataset = cls.__new__(cls)
+        dataset.dataset = file.to_frame(start, end)
+        dataset.dataset[SYNTHETIC_COLUMN] = dataset.dataset["open"].isna().to_numpy()
+        dataset.timetravel = file.timetravel
+        dataset.gap_report = None
+        dataset.rejected = None
+        dataset.transforms = None
+        dataset.targets = None
+        dataset.path_save = str(file.path.parent)
+        dataset.file_name = file.path.name
+
+        return dataset
+
     def append(self, data: pd.DataFrame) -> DatasetTimeseries:
         self.dataset = self.concat_dataset(self.dataset, data)
         self.dataset.drop_duplicates(subset=['datetime'], ignore_index=True, inplace=True)
@@ -245,18 +331,17 @@ class DatasetTimeseries(Dataset):
         return self
 
     @timer
-    def clear_dataset(self) -> pd.DataFrame:
+    def clear_dataset(self, gap_fill: Literal["vectorized", "legacy"] = "vectorized") -> pd.DataFrame:
+        """
+        gap_fill - чем добавлять пропущенные свечи: fill_gaps (отчет о разрывах
+        сохраняется в self.gap_report) или старый conncat_missing_rows
+        """
         # self.dataset = clear_dataset(self.dataset, sort=True, timetravel=self.timetravel)
-        dataset = self.dataset.copy()
+        dataset, _, self.rejected = coerce_ohlcv(self.dataset)
 
-        for col in dataset.columns:
-            if col in ["datetime", "volume"]:
-                continue
-
-            dataset[col] = dataset[col].apply(str_to_float) 
-
-        dataset = convert_volume(dataset)
-        logger.debug("Volume converted to float %d", len(dataset))
+        # Как convert_volume: строки без объема (в т.ч. "x") отбрасываются
+        dataset = dataset[dataset["volume"].notna()]
+        logger.debug("Columns converted to float %d, rejected values %d", len(dataset), len(self.rejected))
 
         # dataset = dataset.drop_duplicates(subset=['datetime'], ignore_index=True)
         grouped = find_most_common_df(dataset)
@@ -266,7 +351,12 @@ class DatasetTimeseries(Dataset):
 
         dataset = dataset.drop_duplicates(subset=['datetime'], ignore_index=True)
 
-        dataset = conncat_missing_rows(dataset, timetravel=self.timetravel)
+        if gap_fill == "legacy":
+            dataset = typed_missing(conncat_missing_rows(dataset.drop(columns=SYNTHETIC_COLUMN),
+                                                         timetravel=self.timetravel))
+        else:
+            dataset, self.gap_report = fill_gaps(dataset, timetravel=self.timetravel)
+            logger.debug("Gaps %d, longest %s", self.gap_report["gaps"], self.gap_report["longest"])
         
         logger.debug("Missing rows concatenated %d", len(dataset))
 
@@ -315,10 +405,10 @@ class DatasetTimeseries(Dataset):
             plt.show()
 
     def get_dataset_Nan(self) -> pd.DataFrame:
-        return self.dataset.loc[self.dataset['open'] == "x"]
+        return self.dataset.loc[self.dataset[SYNTHETIC_COLUMN].to_numpy()]
     
     def dataset_clear(self) -> pd.DataFrame:
-        return self.dataset.loc[self.dataset['open'] != "x"]
+        return self.dataset.loc[~self.dataset[SYNTHETIC_COLUMN].to_numpy()]
     
     def get_datetime_last(self) -> datetime:
         return self.dataset['datetime'].max()
@@ -0,0 +1,202 @@
+"""
+Кольцевой буфер свечей фиксированного размера
+
+Заменяет DatasetTimeseries в буфере AttParser: массивы выделяются один раз,
+добавление стоит O(новых строк), последняя свеча берется за O(1).
+"""
+from __future__ import annotations
+
+from typing import Any, Dict
+import numpy as np
+import pandas as pd
+
+from .dataset import Dataset, DatasetTimeseries
+
+OHLCV_COLUMNS = ("open", "close", "max", "min", "volume")
+
+
+class CandleRingBuffer:
+    """
+    Свечи одной пары (монета, таймфрейм), упорядоченные по времени по возрастанию
+
+    Время хранится как datetime64[ns] (int64), OHLCV - в одном массиве float64
+    (capacity, 5). При переполнении перезаписываются самые старые свечи.
+    Повторно пришедшая свеча (то же время) обновляет значения на месте.
+    """
+
+    def __init__(self, capacity: int, timetravel: str = "5m") -> None:
+        if capacity <= 0:
+            raise ValueError(f"Invalid ring buffer capacity: {capacity}")
+
+        self.capacity = capacity
+        self.timetravel = timetravel
+
+        self._timestamp = np.zeros(capacity, dtype=np.int64)
+        self._values = np.full((capacity, len(OHLCV_COLUMNS)), np.nan, dtype=np.float64)
+
+        self._start = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def nbytes(self) -> int:
+        return self._timestamp.nbytes + self._values.nbytes
+
+    def _ordered_index(self) -> np.ndarray:
+        return (self._start + np.arange(self._size)) % self.capacity
+
+    @staticmethod
+    def _decode(data: pd.DataFrame | Dataset) -> tuple[np.ndarray, np.ndarray]:
+        if isinstance(data, Dataset):
+            data = data.get_dataset()
+
+        timestamp = data["datetime"].to_numpy()
+        if timestamp.dtype.kind != "M":
+            timestamp = pd.to_datetime(timestamp, errors="coerce").to_numpy()
+        timestamp = timestamp.astype("datetime64[ns]", copy=False)
+
+        values = np.empty((len(timestamp), len(OHLCV_COLUMNS)), dtype=np.float64)
+
+        for i, column in enumerate(OHLCV_COLUMNS):
+            column = data[column].to_numpy()
+
+            # Строки и пропуски "x" из старых CSV -> NaN
+            if column.dtype.kind not in "fiu":
+                column = pd.to_numeric(column, errors="coerce")
+
+            values[:, i] = column
+
+        mask = ~np.isnat(timestamp)
+        timestamp = timestamp[mask].view(np.int64)
+        values = values[mask]
+
+        # По возрастанию, из повторов остается последняя строка
+        order = np.argsort(timestamp, kind="stable")
+        timestamp, values = timestamp[order], values[order]
+
+        keep = np.append(timestamp[1:] != timestamp[:-1], True) if len(timestamp) else np.empty(0, dtype=bool)
+
+        return timestamp[keep], values[keep]
+
+    def _find(self, timestamp: np.ndarray) -> np.ndarray:
+        """Физические позиции свечей с таким временем, -1 если свечи нет"""
+        end = self._start + self._size
+        head = self._timestamp[self._start:min(end, self.capacity)]
+        tail = self._timestamp[:max(0, end - self.capacity)]
+
+        in_tail = (len(tail) > 0) & (timestamp >= (tail[0] if len(tail) else 0))
+
+        pos = np.where(in_tail,
+                       np.searchsorted(tail, timestamp),
+                       self._start + np.searchsorted(head, timestamp))
+
+        found = np.where(in_tail,
+                         np.minimum(pos, max(len(tail) - 1, 0)),
+                         np.minimum(pos, self.capacity - 1))
+        found = np.where(self._timestamp[found] == timestamp, found, -1)
+
+        return found
+
+    def _write(self, timestamp: np.ndarray, values: np.ndarray) -> None:
+        if len(timestamp) >= self.capacity:
+            self._timestamp[:] = timestamp[-self.capacity:]
+            self._values[:] = values[-self.capacity:]
+            self._start, self._size = 0, self.capacity
+            return
+
+        index = (self._start + self._size + np.arange(len(timestamp))) % self.capacity
+        self._timestamp[index] = timestamp
+        self._values[index] = values
+
+        self._size += len(timestamp)
+
+        if self._size > self.capacity:
+            self._start = (self._start + self._size - self.capacity) % self.capacity
+            self._size = self.capacity
+
+    def _rebuild(self, timestamp: np.ndarray, values: np.ndarray) -> None:
+        """Редкий путь: свечи внутри истории, которых нет в буфере (заполнение пропуска)"""
+        index = self._ordered_index()
+        timestamp = np.concatenate([self._timestamp[index], timestamp])
+        values = np.concatenate([self._values[index], values])
+
+        # Из повторов остается последняя (новая) строка
+        _, last = np.unique(timestamp[::-1], return_index=True)
+        last = len(timestamp) - 1 - last
+
+        self._start, self._size = 0, 0
+        self._write(timestamp[last], values[last])
+
+    def append(self, data: pd.DataFrame | Dataset) -> int:
+        """
+        Добавить свечи, вернуть количество новых (ранее не встречавшихся) свечей
+        """
+        timestamp, values = self._decode(data)
+
+        if len(timestamp) == 0:
+            return 0
+
+        if self._size == 0:
+            self._write(timestamp, values)
+            return len(timestamp)
+
+        new = timestamp > self._timestamp[(self._start + self._size - 1) % self.capacity]
+
+        if not new.all():
+            old = ~new
+            pos = self._find(timestamp[old])
+            inside = timestamp[old] >= self._timestamp[self._start]
+
+            # Неизвестная свеча внутри истории или более старая при неполном буфере
+            if (pos[inside] < 0).any() or (self._size < self.capacity and not inside.all()):
+                self._rebuild(timestamp, values)
+                return int(new.sum())
+
+            self._values[pos[inside]] = values[old][inside]
+
+        self._write(timestamp[new], values[new])
+
+        return int(new.sum())
+
+    def truncate(self, keep: int) -> CandleRingBuffer:
+        """Оставить только keep последних свечей"""
+        keep = max(0, keep)
+
+        if keep < self._size:
+            self._start = (self._start + self._size - keep) % self.capacity
+            self._size = keep
+
+        return self
+
+    def clear(self) -> None:
+        self._start, self._size = 0, 0
+
+    def get_datetime_last(self) -> pd.Timestamp | None:
+        if self._size == 0:
+            return None
+
+        return pd.Timestamp(self._timestamp[(self._start + self._size - 1) % self.capacity])
+
+    def latest(self) -> Dict[str, Any] | None:
+        """Последняя свеча в виде словаря datetime + OHLCV"""
+        if self._size == 0:
+            return None
+
+        index = (self._start + self._size - 1) % self.capacity
+
+        return {"datetime": pd.Timestamp(self._timestamp[index]),
+                **dict(zip(OHLCV_COLUMNS, self._values[index].tolist()))}
+
+    def to_frame(self, ascending: bool = True) -> pd.DataFrame:
+        index = self._ordered_index()
+
+        if not ascending:
+            index = index[::-1]
+
+        return pd.DataFrame({"datetime": self._timestamp[index].view("datetime64[ns]"),
+                             **{column: self._values[index, i] for i, column in enumerate(OHLCV_COLUMNS)}})
+
+    def to_dataset(self, ascending: bool = True) -> DatasetTimeseries:
+        return DatasetTimeseries(self.to_frame(ascending), timetravel=self.timetravel)
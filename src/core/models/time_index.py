@@ -0,0 +1,343 @@
+"""
+Дозапись CSV датасета и индекс по времени рядом с файлом (<file>.idx.json)
+
+Индекс: число строк, колонки, min/max datetime и для каждого дня смещение
+в байтах, номер первой строки и число строк. Новые свечи позже max
+дописываются в конец файла без чтения старых данных, диапазон и точечный
+поиск читают только байты нужных дней. Если новые данные меняют прошлое,
+файл обрезается по смещению первого измененного дня и переписывается хвост.
+"""
+from __future__ import annotations
+
+from datetime import datetime
+from io import BytesIO, StringIO
+from pathlib import Path
+from typing import Dict, Optional, Union
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+import logging
+
+logger = logging.getLogger("Dataset.time_index")
+
+INDEX_SUFFIX = ".idx.json"
+INDEX_VERSION = 1
+# Формат DatasetTimeseries: без него свечи в полночь пишутся как "YYYY-MM-DD" и при чтении теряются
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def parse_datetime(values: pd.Series) -> pd.Series:
+    return pd.to_datetime(values, format=DATETIME_FORMAT, errors="coerce")
+
+
+def render_csv(data: pd.DataFrame, header: bool) -> tuple[bytes, np.ndarray]:
+    """CSV в байтах и смещения начала каждой строки данных"""
+    raw = data.to_csv(index=False, header=header, encoding="utf-8", date_format=DATETIME_FORMAT).encode("utf-8")
+
+    line_starts = np.r_[0, np.flatnonzero(np.frombuffer(raw, dtype=np.uint8) == 10)[:-1] + 1]
+
+    return raw, line_starts[1:] if header else line_starts
+
+
+class CSVTimeIndex:
+    """
+    Индекс CSV файла, отсортированного по datetime
+
+    Индекс действителен, пока размер и mtime файла совпадают с записанными:
+    файл, измененный мимо индекса, переиндексируется полным чтением.
+    """
+
+    def __init__(self, csv_path: Union[str, Path]) -> None:
+        self.csv_path = Path(csv_path)
+        self.path = self.csv_path.with_name(self.csv_path.name + INDEX_SUFFIX)
+
+        self.meta: Optional[dict] = None
+
+    @property
+    def max(self) -> Optional[pd.Timestamp]:
+        return pd.Timestamp(self.meta["max"]) if self.meta and self.meta["max"] else None
+
+    @property
+    def min(self) -> Optional[pd.Timestamp]:
+        return pd.Timestamp(self.meta["min"]) if self.meta and self.meta["min"] else None
+
+    def stats(self) -> Dict[str, object]:
+        return {"rows": self.meta["rows"], "min_datetime": self.meta["min"], "max_datetime": self.meta["max"]}
+
+    def load(self) -> bool:
+        """Прочитать индекс; если его нет или он устарел - построить по файлу"""
+        if not self.csv_path.exists():
+            self.meta = None
+            return False
+
+        try:
+            with open(self.path) as f:
+                meta = json.load(f)
+
+            stat = self.csv_path.stat()
+            if (meta.get("version") == INDEX_VERSION and meta["size"] == stat.st_size
+                    and meta["mtime_ns"] == stat.st_mtime_ns):
+                self.meta = meta
+                return True
+        except (OSError, ValueError, KeyError):
+            pass
+
+        self.rebuild()
+
+        return self.meta is not None
+
+    def rebuild(self) -> None:
+        """Полное чтение файла - для файлов без индекса или измененных снаружи"""
+        with open(self.csv_path, "rb") as f:
+            raw = f.read()
+
+        data = pd.read_csv(BytesIO(raw))
+
+        newlines = np.flatnonzero(np.frombuffer(raw, dtype=np.uint8) == 10)
+        line_starts = np.r_[0, newlines + 1][1:len(data) + 1]
+
+        if "datetime" not in data.columns or len(line_starts) != len(data):
+            logger.warning(f"Can't index {self.csv_path}")
+            self.meta = None
+            return
+
+        self._set_meta(list(data.columns), parse_datetime(data["datetime"]), line_starts)
+
+    def _set_meta(self, columns: list, timestamp: pd.Series, line_starts: np.ndarray,
+                  appended: bool = False) -> None:
+        """Обновить индекс по записанным строкам: всему файлу или дописанному хвосту"""
+        timestamp = timestamp.reset_index(drop=True)
+        valid = timestamp.dropna()
+
+        base_row = self.meta["rows"] if appended else 0
+        days = self.meta["days"] if appended else {}
+
+        is_sorted = bool(timestamp.notna().all() and timestamp.is_monotonic_increasing)
+        if appended:
+            is_sorted = is_sorted and self.meta["sorted"]
+
+        if is_sorted and len(timestamp):
+            day = timestamp.dt.strftime("%Y-%m-%d").to_numpy()
+            starts = np.flatnonzero(np.r_[True, day[1:] != day[:-1]])
+            counts = np.diff(np.r_[starts, len(day)])
+
+            for start, count in zip(starts, counts):
+                if day[start] in days:
+                    days[day[start]][2] += int(count)
+                else:
+                    days[day[start]] = [int(line_starts[start]), base_row + int(start), int(count)]
+
+        bounds = [bound for bound in (self.min if appended else None, self.max if appended else None,
+                                      valid.min() if len(valid) else None,
+                                      valid.max() if len(valid) else None) if bound is not None]
+
+        self.meta = {
+            "version": INDEX_VERSION,
+            "columns": columns,
+            "rows": base_row + len(timestamp),
+            "sorted": is_sorted,
+            "min": str(min(bounds)) if bounds else None,
+            "max": str(max(bounds)) if bounds else None,
+            "days": days if is_sorted else {},
+        }
+
+        self._save_meta()
+
+    def _save_meta(self) -> None:
+        stat = self.csv_path.stat()
+        self.meta["size"], self.meta["mtime_ns"] = stat.st_size, stat.st_mtime_ns
+
+        tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self.meta, f)
+
+        os.replace(tmp_path, self.path)
+
+    def write(self, data: pd.DataFrame) -> None:
+        """Полная запись файла (по возрастанию datetime) и индекса"""
+        timestamp = parse_datetime(data["datetime"])
+        order = np.argsort(timestamp.to_numpy(), kind="stable")
+        data, timestamp = data.iloc[order], timestamp.iloc[order]
+
+        raw, line_starts = render_csv(data, header=True)
+
+        tmp_path = self.csv_path.with_name(f".{self.csv_path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(raw)
+        os.replace(tmp_path, self.csv_path)
+
+        self._set_meta(list(data.columns), timestamp, line_starts)
+
+    def append(self, data: pd.DataFrame) -> int:
+        """
+        Дописать строки позже max индекса в конец файла
+
+        Порядок колонок берется из файла. Возвращает число дописанных строк.
+        """
+        timestamp = parse_datetime(data["datetime"])
+        new = (timestamp > self.max).to_numpy() if self.max is not None else timestamp.notna().to_numpy()
+
+        data, timestamp = data[new], timestamp[new]
+
+        # Повторы времени внутри новых строк: как в concat_dataset, остается первая
+        first = ~timestamp.duplicated().to_numpy()
+        data, timestamp = data[first], timestamp[first]
+
+        if data.empty:
+            return 0
+
+        order = np.argsort(timestamp.to_numpy(), kind="stable")
+        data, timestamp = data.iloc[order][self.meta["columns"]], timestamp.iloc[order]
+
+        raw, line_starts = render_csv(data, header=False)
+
+        with open(self.csv_path, "ab") as f:
+            offset = f.tell()
+            f.write(raw)
+
+        self._set_meta(self.meta["columns"], timestamp, line_starts + offset, appended=True)
+
+        return len(data)
+
+    def _day_range(self, start: pd.Timestamp, end: pd.Timestamp) -> Optional[tuple[int, int]]:
+        """Байтовый диапазон дней, пересекающих [start, end]"""
+        first_day, last_day = start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")
+        days = sorted(key for key in self.meta["days"] if first_day <= key <= last_day)
+
+        if not days:
+            return None
+
+        first = self.meta["days"][days[0]][0]
+
+        following = [self.meta["days"][key][0] for key in self.meta["days"] if key > days[-1]]
+        last = min(following) if following else self.meta["size"]
+
+        return first, last
+
+    def read_lines(self, start: datetime, end: datetime) -> bytes:
+        """Сырые строки CSV (без заголовка) дней, пересекающих [start, end]"""
+        byte_range = self._day_range(pd.Timestamp(start), pd.Timestamp(end))
+
+        if byte_range is None:
+            return b""
+
+        with open(self.csv_path, "rb") as f:
+            f.seek(byte_range[0])
+            return f.read(byte_range[1] - byte_range[0])
+
+    def read_range(self, start: datetime = None, end: datetime = None) -> pd.DataFrame:
+        """Строки с datetime в [start, end]; без сортировки в индексе - через полное чтение"""
+        start = pd.Timestamp(start) if start is not None else self.min
+        end = pd.Timestamp(end) if end is not None else self.max
+
+        if self.meta["sorted"] and start is not None:
+            data = pd.read_csv(StringIO(self.read_lines(start, end).decode("utf-8")),
+                               header=None, names=self.meta["columns"])
+        else:
+            data = pd.read_csv(self.csv_path)
+
+        timestamp = parse_datetime(data["datetime"])
+        data = data.assign(datetime=timestamp)
+
+        return data[((timestamp >= start) & (timestamp <= end)).to_numpy()].reset_index(drop=True)
+
+    def lookup(self, moment: datetime) -> Optional[pd.Series]:
+        data = self.read_range(moment, moment)
+        return data.iloc[-1] if len(data) else None
+
+    def same_columns(self, data: pd.DataFrame) -> bool:
+        return set(data.columns) == set(self.meta["columns"])
+
+    def first_change(self, data: pd.DataFrame) -> Optional[pd.Timestamp]:
+        """
+        Время самой ранней строки data не позже max, которой нет в файле
+        в точности такой же (сравниваются строки CSV, читаются только их дни);
+        None - новые строки достаточно дописать в конец
+        """
+        timestamp = parse_datetime(data["datetime"])
+        old = (timestamp <= self.max).to_numpy() if self.max is not None else np.zeros(len(data), dtype=bool)
+
+        if not old.any():
+            return None
+
+        if not self.meta["sorted"]:
+            return timestamp[old].min()
+
+        rendered, _ = render_csv(data[old][self.meta["columns"]], header=False)
+        existing = set(self.read_lines(timestamp[old].min(), timestamp[old].max()).splitlines())
+
+        lines = rendered.splitlines()
+        if len(lines) != int(old.sum()):
+            return timestamp[old].min()
+
+        changed = np.fromiter((line not in existing for line in lines), dtype=bool, count=len(lines))
+
+        return timestamp[old][changed].min() if changed.any() else None
+
+    def covers(self, data: pd.DataFrame) -> bool:
+        """
+        Колонки совпадают, а строки data не позже max уже лежат в файле
+        в точности такими же - хватит append
+        """
+        return self.same_columns(data) and self.first_change(data) is None
+
+    def rewrite_from(self, data: pd.DataFrame, since: pd.Timestamp) -> int:
+        """
+        Переписать файл с дня since: обрезать по смещению этого дня из индекса
+        и записать хвост заново - строки data (при совпадении времени они
+        главнее, как в concat_dataset) вместе со старыми строками хвоста.
+        Без сортировки в индексе хвост - весь файл. Возвращает число строк хвоста.
+        """
+        day = pd.Timestamp(since).strftime("%Y-%m-%d")
+        days = self.meta["days"]
+        following = sorted(key for key in days if key >= day)
+
+        if self.meta["sorted"] and following:
+            offset, row = days[following[0]][:2]
+        elif self.meta["sorted"]:
+            offset, row = self.meta["size"], self.meta["rows"]
+        else:
+            with open(self.csv_path, "rb") as f:
+                offset, row = len(f.readline()), 0
+
+        timestamp = parse_datetime(data["datetime"])
+        new = timestamp.notna().to_numpy()
+        if self.meta["sorted"]:
+            new &= (timestamp >= pd.Timestamp(day)).to_numpy()
+
+        with open(self.csv_path, "rb") as f:
+            f.seek(offset)
+            # Старые строки как текст: неизмененные записываются байт в байт
+            tail = pd.read_csv(BytesIO(f.read()), header=None, names=self.meta["columns"],
+                               dtype=str, keep_default_na=False)
+
+        tail_timestamp = parse_datetime(tail["datetime"])
+
+        merged = pd.concat([data[new][self.meta["columns"]], tail], ignore_index=True)
+        merged_timestamp = pd.concat([timestamp[new], tail_timestamp], ignore_index=True)
+
+        keep = ~(merged_timestamp.duplicated() & merged_timestamp.notna()).to_numpy()
+        merged, merged_timestamp = merged[keep], merged_timestamp[keep]
+
+        order = np.argsort(merged_timestamp.to_numpy(), kind="stable")
+        merged, merged_timestamp = merged.iloc[order], merged_timestamp.iloc[order]
+
+        raw, line_starts = render_csv(merged, header=False)
+
+        with open(self.csv_path, "r+b") as f:
+            f.seek(offset)
+            f.write(raw)
+            f.truncate()
+
+        if self.meta["sorted"]:
+            self.meta["days"] = {key: value for key, value in days.items() if key < day}
+        else:
+            self.meta.update(days={}, sorted=True, min=None, max=None)
+        self.meta["rows"] = row
+
+        self._set_meta(self.meta["columns"], merged_timestamp, line_starts + offset, appended=True)
+
+        return len(merged)
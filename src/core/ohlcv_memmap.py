@@ -0,0 +1,169 @@
+"""
+Бинарный формат OHLCV для быстрого чтения истории через numpy.memmap
+
+Один файл на пару (монета, таймфрейм): заголовок 64 байта и записи
+фиксированной ширины <int64 datetime (ns), float64 open, close, max, min, volume>,
+упорядоченные по времени. Срез по времени - бинарный поиск, без разбора текста.
+"""
+from __future__ import annotations
+
+from datetime import datetime
+from pathlib import Path
+from typing import Union
+import os
+import struct
+
+import numpy as np
+import pandas as pd
+
+MAGIC = b"OHLCV\x00\x00\x00"
+VERSION = 1
+
+HEADER = struct.Struct("<8sHHIQ16s")  # magic, version, record_size, reserved, count, timetravel
+HEADER_SIZE = 64
+COUNT_OFFSET = 16
+
+RECORD = np.dtype([("datetime", "<i8"), ("open", "<f8"), ("close", "<f8"),
+                   ("max", "<f8"), ("min", "<f8"), ("volume", "<f8")])
+
+
+class OHLCVMemmap:
+    """
+    Файл свечей, открытый через numpy.memmap (только чтение)
+
+    to_frame отдает DataFrame, колонки которого - представления памяти файла:
+    копирования нет, но и изменять такие колонки на месте нельзя.
+    """
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path = Path(path)
+
+        with open(self.path, "rb") as f:
+            self.count, self.timetravel = self._read_header(f.read(HEADER_SIZE), self.path)
+
+        if self.count:
+            self.records = np.memmap(self.path, dtype=RECORD, mode="r",
+                                     offset=HEADER_SIZE, shape=(self.count,))
+        else:
+            self.records = np.empty(0, dtype=RECORD)
+
+    def __len__(self) -> int:
+        return self.count
+
+    @staticmethod
+    def _read_header(raw: bytes, path: Path) -> tuple[int, str]:
+        if len(raw) < HEADER.size:
+            raise ValueError(f"Invalid OHLCV file {path}: header too short")
+
+        magic, version, record_size, _, count, timetravel = HEADER.unpack_from(raw)
+
+        if magic != MAGIC:
+            raise ValueError(f"Invalid OHLCV file {path}: bad magic {magic!r}")
+        if version != VERSION or record_size != RECORD.itemsize:
+            raise ValueError(f"Unsupported OHLCV file {path}: version {version}, record {record_size}")
+
+        return count, timetravel.rstrip(b"\x00").decode()
+
+    @staticmethod
+    def _to_records(data: pd.DataFrame) -> np.ndarray:
+        timestamp = data["datetime"]
+        if timestamp.dtype.kind != "M":
+            timestamp = pd.to_datetime(timestamp, errors="coerce")
+
+        records = np.empty(len(data), dtype=RECORD)
+        records["datetime"] = timestamp.to_numpy().astype("datetime64[ns]").view(np.int64)
+
+        for name in RECORD.names[1:]:
+            records[name] = pd.to_numeric(data[name], errors="coerce").to_numpy(dtype=np.float64)
+
+        records = records[records["datetime"] != np.iinfo(np.int64).min]  # NaT
+
+        # Сортировка и последнее значение для повторяющегося времени
+        _, index = np.unique(records["datetime"][::-1], return_index=True)
+        return records[len(records) - 1 - index]
+
+    @classmethod
+    def write(cls, path: Union[str, Path], data: pd.DataFrame, timetravel: str = "5m") -> OHLCVMemmap:
+        """Записать файл заново (через временный файл)"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        records = cls._to_records(data)
+        header = HEADER.pack(MAGIC, VERSION, RECORD.itemsize, 0, len(records), timetravel.encode()[:16])
+
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(header.ljust(HEADER_SIZE, b"\x00"))
+            f.write(records.tobytes())
+
+        os.replace(tmp_path, path)
+
+        return cls(path)
+
+    @classmethod
+    def append(cls, path: Union[str, Path], data: pd.DataFrame, timetravel: str = "5m") -> int:
+        """
+        Дописать свечи не старее последней в файле, вернуть число записанных
+
+        Последняя свеча в файле могла быть открытой: если ее время пришло
+        снова, запись перезаписывается на месте. Сначала пишутся записи, затем
+        счетчик в заголовке - читатель, открывший файл раньше, видит прежнее
+        число записей.
+        """
+        path = Path(path)
+
+        if not path.exists():
+            return len(cls.write(path, data, timetravel))
+
+        records = cls._to_records(data)
+
+        with open(path, "r+b") as f:
+            count, _ = cls._read_header(f.read(HEADER_SIZE), path)
+            position = count
+
+            if count:
+                f.seek(HEADER_SIZE + (count - 1) * RECORD.itemsize)
+                last = np.frombuffer(f.read(RECORD.itemsize), dtype=RECORD)["datetime"][0]
+                records = records[records["datetime"] >= last]
+
+                if len(records) and records["datetime"][0] == last:
+                    position = count - 1
+
+            if not len(records):
+                return 0
+
+            f.seek(HEADER_SIZE + position * RECORD.itemsize)
+            f.write(records.tobytes())
+            f.flush()
+
+            if position + len(records) != count:
+                f.seek(COUNT_OFFSET)
+                f.write(struct.pack("<Q", position + len(records)))
+
+        return len(records)
+
+    def search(self, start: datetime = None, end: datetime = None) -> slice:
+        """Индексы записей в [start, end]: два бинарных поиска по времени"""
+        timestamp = self.records["datetime"]
+
+        left = 0 if start is None else int(np.searchsorted(timestamp, pd.Timestamp(start).as_unit("ns").value, "left"))
+        right = self.count if end is None else int(np.searchsorted(timestamp, pd.Timestamp(end).as_unit("ns").value, "right"))
+
+        return slice(left, right)
+
+    def slice(self, start: datetime = None, end: datetime = None) -> np.ndarray:
+        return self.records[self.search(start, end)]
+
+    def to_frame(self, start: datetime = None, end: datetime = None) -> pd.DataFrame:
+        records = self.slice(start, end)
+
+        columns = {"datetime": records["datetime"].view("datetime64[ns]")}
+        columns.update((name, records[name]) for name in RECORD.names[1:])
+
+        return pd.DataFrame(columns, copy=False)
+
+    def get_datetime_last(self) -> pd.Timestamp | None:
+        if not self.count:
+            return None
+
+        return pd.Timestamp(int(self.records["datetime"][-1]))
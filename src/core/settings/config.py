@@ -1,4 +1,4 @@
-from typing import Literal
+from typing import List, Literal
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pathlib import Path
@@ -95,6 +95,34 @@ class KucoinConfig(BaseSettings):
     api_secret: str = Field(default=...)
     api_passphrase: str = Field(default=...)
 
+    # Общий для всех процессов хоста лимит веса публичных запросов
+    rate_limit_capacity: int = Field(default=2000)
+    rate_limit_window: int = Field(default=30)
+
+
+class PipelineConfig(BaseSettings):
+
+    model_config = SettingsConfigDict(**AppBaseConfig.__dict__, 
+                                      env_prefix="PIPELINE__")
+    
+    # Размер очереди перед каждой стадией и число воркеров стадии
+    queue_size: int = Field(default=100)
+    fetch_concurrency: int = Field(default=32)
+    decode_concurrency: int = Field(default=2)
+    buffer_concurrency: int = Field(default=8)
+    db_concurrency: int = Field(default=4)
+
+
+class RollupConfig(BaseSettings):
+
+    model_config = SettingsConfigDict(**AppBaseConfig.__dict__, 
+                                      env_prefix="ROLLUP__")
+    
+    # Старшие таймфреймы собираются из базового, парсеру достаточно качать base
+    enabled: bool = Field(default=True)
+    base: str = Field(default="5m")
+    timeframes: List[str] = Field(default=["15m", "1h", "4h", "1d"])
+
 
 class CoindeskConfig(BaseSettings):
 
@@ -111,6 +139,8 @@ class ConfigParser(BaseSettings):
     )
 
     kucoin: KucoinConfig = Field(default_factory=KucoinConfig)
+    pipeline: PipelineConfig = Field(default_factory=PipelineConfig)
+    rollup: RollupConfig = Field(default_factory=RollupConfig)
 
     logging: LoggingConfig = Field(default_factory=LoggingConfig)
     driver: ConfigParserDriver = Field(default_factory=ConfigParserDriver)
@@ -0,0 +1,170 @@
+"""
+Адаптивный лимит одновременных запросов (gradient + multiplicative decrease)
+
+Лимит растет, пока задержка держится около базовой, уменьшается
+пропорционально росту задержки и резко падает на 429/таймаутах.
+"""
+from __future__ import annotations
+
+from collections import deque
+from contextlib import asynccontextmanager
+from math import sqrt
+from typing import AsyncIterator
+import asyncio
+import time
+
+import numpy as np
+
+from .metrics import concurrency_limit, concurrency_inflight, request_latency_seconds, request_latency_quantile
+
+import logging
+
+logger = logging.getLogger("AdaptiveLimiter")
+
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+def is_overload_error(error: BaseException) -> bool:
+    """429 / таймаут - сигнал, что сервер перегружен, а не ошибка запроса"""
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError)):
+        return True
+
+    status = getattr(error, "status", None) or getattr(error, "status_code", None)
+    if status in (429, 503):
+        return True
+
+    message = str(error)
+    return "429" in message or "Too Many Requests" in message
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Ограничитель одновременных запросов с подстройкой лимита
+
+    min_latency - минимальная задержка с медленным дрейфом вверх (базовая линия,
+    как RTT без очереди), каждая удачная выборка дает
+    gradient = min_latency * tolerance / latency в [0.5, 1].
+    Новый лимит limit * gradient + sqrt(limit) сглаживается с текущим.
+    Ошибка перегрузки умножает лимит на backoff, но не чаще одного раза на
+    поколение запросов (начатых до предыдущего уменьшения).
+    """
+
+    def __init__(self, name: str = "kucoin", initial_limit: int = 20, min_limit: int = 1,
+                 max_limit: int = 500, tolerance: float = 1.5, smoothing: float = 0.2,
+                 backoff: float = 0.7, drift: float = 0.001, window: int = 200) -> None:
+        self.name = name
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        self.backoff = backoff
+        self.drift = drift
+
+        self.limit = float(initial_limit)
+        self.inflight = 0
+        self.min_latency: float | None = None
+
+        self.latencies: deque[float] = deque(maxlen=window)
+        self._last_decrease = 0.0
+        self._samples = 0
+
+        self._condition: asyncio.Condition | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+        concurrency_limit.labels(limiter=name).set(self.limit)
+
+    @property
+    def current_limit(self) -> int:
+        return max(self.min_limit, int(self.limit))
+
+    def _get_condition(self) -> asyncio.Condition:
+        # Celery запускает каждую задачу в новом event loop
+        loop = asyncio.get_running_loop()
+
+        if self._condition is None or self._loop is not loop:
+            self._condition, self._loop = asyncio.Condition(), loop
+
+        return self._condition
+
+    def _set_limit(self, limit: float) -> None:
+        self.limit = min(float(self.max_limit), max(float(self.min_limit), limit))
+        concurrency_limit.labels(limiter=self.name).set(self.limit)
+
+    def on_success(self, latency: float, inflight: int) -> None:
+        self.latencies.append(latency)
+        request_latency_seconds.labels(limiter=self.name).observe(latency)
+
+        # Дрейф вверх, чтобы базовая линия догоняла устойчивое замедление сервера
+        if self.min_latency is None:
+            self.min_latency = latency
+        else:
+            self.min_latency = min(self.min_latency * (1 + self.drift), latency)
+
+        # Лимит меняется только если он реально используется
+        if inflight >= self.limit / 2:
+            gradient = max(0.5, min(1.0, self.tolerance * self.min_latency / max(latency, 1e-6)))
+            new_limit = self.limit * gradient + sqrt(self.limit)
+
+            self._set_limit(self.limit * (1 - self.smoothing) + new_limit * self.smoothing)
+
+        self._samples += 1
+        if self._samples % 50 == 0:
+            self._export_quantiles()
+
+    def on_overload(self, started: float) -> None:
+        if started < self._last_decrease:
+            return
+
+        self._last_decrease = time.monotonic()
+        self._set_limit(self.limit * self.backoff)
+
+        logger.debug(f"Limiter {self.name} overloaded, limit -> {self.current_limit}")
+
+    def percentiles(self) -> dict[float, float]:
+        if not self.latencies:
+            return {}
+
+        return dict(zip(QUANTILES, np.quantile(np.fromiter(self.latencies, dtype=np.float64), QUANTILES).tolist()))
+
+    def _export_quantiles(self) -> None:
+        for quantile, value in self.percentiles().items():
+            request_latency_quantile.labels(limiter=self.name, quantile=str(quantile)).set(value)
+
+    async def _acquire(self) -> None:
+        condition = self._get_condition()
+
+        async with condition:
+            await condition.wait_for(lambda: self.inflight < self.current_limit)
+            self.inflight += 1
+
+        concurrency_inflight.labels(limiter=self.name).set(self.inflight)
+
+    async def _release(self) -> None:
+        condition = self._get_condition()
+
+        async with condition:
+            self.inflight -= 1
+            # Будим только тех, кто поместится в лимит: notify_all на каждом
+            # освобождении будит всю очередь, и задержка растет от самого ожидания
+            condition.notify(max(1, self.current_limit - self.inflight))
+
+        concurrency_inflight.labels(limiter=self.name).set(self.inflight)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """async with limiter.slot(): один запрос под лимитом, с замером задержки"""
+        await self._acquire()
+
+        started = time.monotonic()
+        inflight = self.inflight
+
+        try:
+            yield
+        except Exception as e:
+            if is_overload_error(e):
+                self.on_overload(started)
+            raise
+        else:
+            self.on_success(time.monotonic() - started, inflight)
+        finally:
+            await self._release()
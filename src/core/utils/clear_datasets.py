@@ -1,7 +1,12 @@
 import pandas as pd
 from datetime import datetime, timedelta
+import logging
 
 from .tesseract_img_text import timetravel_seconds_int
+from .numeric import coerce_ohlcv
+from .consensus import consensus_merge
+
+logger = logging.getLogger("process_logger.clear_datasets")
 
 def volume_to_float(item: str) -> float:
     if item == "x":
@@ -82,7 +87,6 @@ def str_to_float(item: str) -> float | None:
         return item
     
     if not isinstance(item, str):
-        print(item)
         return None
     
     elif item == "x":
@@ -94,7 +98,7 @@ def str_to_float(item: str) -> float | None:
         return float(result)
     except ValueError:
         pass
-    print(item, result)
+
     return None
     
 def clear_datetime_false(df: pd.DataFrame, datetime_column: str = "datetime") -> pd.DataFrame:
@@ -191,7 +195,23 @@ def conncat_missing_rows(df, timetravel: str = "5m", datetime_column: str='datet
     
     return df
 
-def check_dt(dfs: list[pd.DataFrame], datetime_column: str = "datetime") -> bool:
+def check_dt(dfs: list[pd.DataFrame], datetime_column: str = "datetime", 
+             threshold: float = 0.8) -> pd.DataFrame:
+    """
+    Свечи, по которым согласны не меньше threshold источников, по убыванию времени
+
+    Несогласные datetime отбрасываются и пишутся в лог (отчет consensus_merge).
+    """
+    result, report = consensus_merge(dfs, threshold=threshold, datetime_column=datetime_column)
+
+    if len(report):
+        logger.warning(f"check_dt: no consensus for {len(report)} of {len(report) + len(result)} datetimes, "
+                       f"lowest agreement {report['agreement'].min():.2f}")
+        logger.debug(f"check_dt disagreement report:\n{report.to_string(index=False)}")
+
+    return result.sort_values(datetime_column, ascending=False, ignore_index=True)
+
+def check_dt_legacy(dfs: list[pd.DataFrame], datetime_column: str = "datetime") -> pd.DataFrame:
     # Объединяем все DataFrame в один
     combined_df = pd.concat(dfs, ignore_index=True)
 
@@ -242,13 +262,8 @@ def check_dt(dfs: list[pd.DataFrame], datetime_column: str = "datetime") -> bool
 def clear_dataset(dataset: pd.DataFrame, timetravel: str = None, sort: bool = False) -> pd.DataFrame:
     dataset = clear_datetime_false(dataset)
 
-    for col in dataset.columns:
-        if col in ["datetime", "volume"]:
-            continue
-
-        dataset[col] = dataset[col].apply(str_to_float) 
-
-    dataset = convert_volume(dataset)
+    dataset, _, _ = coerce_ohlcv(dataset)
+    dataset = dataset[dataset["volume"].notna()]
     dataset = dataset.drop_duplicates(subset=['datetime'], ignore_index=True)
 
     if timetravel:
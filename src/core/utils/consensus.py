@@ -0,0 +1,61 @@
+"""
+Векторное слияние свечей из нескольких источников по согласию (замена цикла check_dt)
+
+Для каждого datetime выбирается набор OHLCV, который дали не меньше
+threshold источников (доля от всех строк с этим временем). Наборы
+сравниваются по хешу кортежа OHLCV (pd.util.hash_pandas_object), счет -
+один groupby по (datetime, хеш) вместо цикла по группам и комбинациям.
+"""
+from __future__ import annotations
+
+from typing import Iterable, Sequence, Tuple
+import numpy as np
+import pandas as pd
+
+CONSENSUS_COLUMNS = ("open", "max", "min", "close", "volume")
+
+
+def consensus_merge(dfs: Sequence[pd.DataFrame], threshold: float = 0.8, datetime_column: str = "datetime",
+                    columns: Iterable[str] = CONSENSUS_COLUMNS) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Возвращает (свечи, по которым есть согласие - первая строка с выбранным
+    набором, по возрастанию времени; отчет о несогласных datetime: sources -
+    строк с этим временем, best - сколько из них дали самый частый набор,
+    agreement - доля best)
+
+    Как и в check_dt, строки с пропусками в OHLCV не голосуют, но входят в sources.
+    """
+    columns = list(columns)
+    combined = pd.concat(dfs, ignore_index=True)
+
+    timestamp = combined[datetime_column]
+    sources = timestamp.value_counts(sort=False)
+
+    voting = combined[columns].notna().all(axis=1).to_numpy()
+    votes = combined[voting]
+
+    votes = pd.DataFrame({
+        datetime_column: votes[datetime_column].to_numpy(),
+        "key": pd.util.hash_pandas_object(votes[columns], index=False).to_numpy(),
+        "row": np.flatnonzero(voting),
+    })
+
+    counts = votes.groupby([datetime_column, "key"], sort=False).agg(count=("row", "size"), row=("row", "min"))
+
+    # Самый частый набор для каждого времени (при равенстве - первый встреченный)
+    counts = counts.reset_index().sort_values([datetime_column, "count", "row"],
+                                              ascending=[True, False, True], kind="stable")
+    best = counts.drop_duplicates(subset=[datetime_column]).set_index(datetime_column)
+
+    total = sources.reindex(best.index).to_numpy()
+    agreed = best["count"].to_numpy() >= threshold * total
+
+    result = combined.iloc[best["row"].to_numpy()[agreed]][[datetime_column, *columns]]
+    result = result.sort_values(datetime_column, ignore_index=True)
+
+    report = pd.DataFrame({"sources": sources}).rename_axis(datetime_column)
+    report["best"] = best["count"].reindex(report.index).fillna(0).astype(np.int64)
+    report["agreement"] = report["best"] / report["sources"]
+    report = report[report["best"] < threshold * report["sources"]].sort_index().reset_index()
+
+    return result, report
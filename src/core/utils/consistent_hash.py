@@ -0,0 +1,54 @@
+from bisect import bisect
+from hashlib import md5
+from typing import Dict, Iterable, List
+
+
+class ConsistentHashRing:
+    """
+    Кольцо консистентного хеширования с виртуальными узлами
+
+    Хеш md5, а не hash(): раскладка одинакова во всех процессах и после
+    рестарта. При изменении числа узлов переезжает ~1/N ключей.
+    """
+
+    def __init__(self, nodes: Iterable[str] = (), replicas: int = 100) -> None:
+        self.replicas = replicas
+        self._ring: Dict[int, str] = {}
+        self._keys: List[int] = []
+
+        for node in nodes:
+            self.add_node(node)
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int.from_bytes(md5(key.encode()).digest()[:8], "big")
+
+    @property
+    def nodes(self) -> List[str]:
+        return sorted(set(self._ring.values()))
+
+    def add_node(self, node: str) -> None:
+        for i in range(self.replicas):
+            self._ring[self._hash(f"{node}#{i}")] = node
+
+        self._keys = sorted(self._ring)
+
+    def remove_node(self, node: str) -> None:
+        self._ring = {key: value for key, value in self._ring.items() if value != node}
+        self._keys = sorted(self._ring)
+
+    def get_node(self, key: str) -> str:
+        if not self._keys:
+            raise ValueError("Hash ring is empty")
+
+        index = bisect(self._keys, self._hash(key)) % len(self._keys)
+        return self._ring[self._keys[index]]
+
+    def partition(self, keys: Iterable[str]) -> Dict[str, List[str]]:
+        """Разложить ключи по узлам, в результате есть все узлы (в т.ч. пустые)"""
+        result = {node: [] for node in self.nodes}
+
+        for key in keys:
+            result[self.get_node(key)].append(key)
+
+        return result
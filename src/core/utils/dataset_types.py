@@ -1,14 +1,13 @@
 import pandas as pd
 
-from core.models.dataset import Dataset, DatasetTimeseries, NewsDataset
+from src.core.models.dataset import Dataset, DatasetTimeseries
 
 def get_dataset_type(dataset: pd.DataFrame | str) -> type[Dataset]:
     if isinstance(dataset, str):
-        dataset = pd.read_csv(dataset)
+        # Для выбора типа достаточно заголовка
+        dataset = pd.read_csv(dataset, nrows=0)
         
     if "max" in dataset.columns and "min" in dataset.columns and "volume" in dataset.columns:
         return DatasetTimeseries
-    elif "news" in dataset.columns:
-        return NewsDataset
     else:
-        return Dataset
\ No newline at end of file
+        return Dataset
@@ -0,0 +1,155 @@
+"""
+Колоночный декодер свечей KuCoin
+
+Сырой ответ биржи (список списков строк) за один проход превращается
+в типизированные numpy-массивы: int64 epoch в секундах и float64 OHLCV.
+"""
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Sequence
+import numpy as np
+import pandas as pd
+
+# Порядок полей в ответе KuCoin, "_" - поле, которое не сохраняем
+SPOT_KLINE_COLUMNS = ("datetime", "open", "close", "max", "min", "_", "volume")
+FUTURES_KLINE_COLUMNS = ("datetime", "open", "max", "min", "close", "_", "volume")
+
+OHLCV_COLUMNS = ("open", "close", "max", "min", "volume")
+
+# Значения больше этого порога - миллисекунды (фьючерсы)
+MS_THRESHOLD = 10**12
+
+
+def to_kucoin_kline_type(time: str) -> str:
+    """Перевести таймфрейм вида 5m/1H/1D/1W в тип свечей KuCoin (5min/1hour/1day/1week)"""
+    if not time[:-1].isdigit():
+        return time
+
+    if time[-1] == "m":
+        return time.replace("m", "min")
+    elif time[-1] in ("h", "H"):
+        return time[:-1] + "hour"
+    elif time[-1] in ("d", "D"):
+        return time[:-1] + "day"
+    elif time[-1] in ("w", "W"):
+        return time[:-1] + "week"
+
+    return time
+
+
+def datetime_to_epoch(value: datetime | pd.Timestamp) -> int:
+    """Наивное локальное время -> epoch в секундах (обратно datetime.fromtimestamp)"""
+    if isinstance(value, pd.Timestamp):
+        value = value.to_pydatetime()
+
+    return int(value.timestamp())
+
+
+def epoch_to_datetime64(timestamp: np.ndarray) -> np.ndarray:
+    """
+    epoch в секундах -> datetime64[ns] в локальном времени без таймзоны
+
+    Совпадает с datetime.fromtimestamp, но считается векторно: смещение
+    берется один раз на пачку, поэлементно только если пачка пересекает
+    переход на летнее/зимнее время.
+    """
+    if len(timestamp) == 0:
+        return np.empty(0, dtype="datetime64[ns]")
+
+    first, last = int(timestamp.min()), int(timestamp.max())
+    offset_first = datetime.fromtimestamp(first).astimezone().utcoffset()
+    offset_last = datetime.fromtimestamp(last).astimezone().utcoffset()
+
+    if offset_first == offset_last:
+        local = timestamp + int(offset_first.total_seconds())
+        return local.astype("datetime64[s]").astype("datetime64[ns]")
+
+    return np.array([datetime.fromtimestamp(int(x)) for x in timestamp], dtype="datetime64[ns]")
+
+
+class KlineBatch:
+    """Пачка свечей в колоночном виде, отсортированная по времени по возрастанию"""
+
+    __slots__ = ("timestamp", "open", "close", "max", "min", "volume")
+
+    def __init__(self, timestamp: np.ndarray, open: np.ndarray, close: np.ndarray,
+                 max: np.ndarray, min: np.ndarray, volume: np.ndarray) -> None:
+        self.timestamp = timestamp
+        self.open = open
+        self.close = close
+        self.max = max
+        self.min = min
+        self.volume = volume
+
+    @classmethod
+    def empty(cls) -> KlineBatch:
+        return cls(np.empty(0, dtype=np.int64),
+                   *(np.empty(0, dtype=np.float64) for _ in OHLCV_COLUMNS))
+
+    @classmethod
+    def concat(cls, batches: Sequence[KlineBatch]) -> KlineBatch:
+        """Склеить пачки, убрав повторяющиеся по времени свечи (остается первая)"""
+        batches = [batch for batch in batches if len(batch)]
+
+        if not batches:
+            return cls.empty()
+
+        batch = cls(*(np.concatenate([getattr(b, name) for b in batches]) for name in cls.__slots__))
+        _, index = np.unique(batch.timestamp, return_index=True)
+
+        return batch.take(index)
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    def take(self, index: np.ndarray) -> KlineBatch:
+        return KlineBatch(*(getattr(self, name)[index] for name in self.__slots__))
+
+    def since(self, last_datetime: datetime | pd.Timestamp | None) -> KlineBatch:
+        """Оставить свечи с datetime >= last_datetime"""
+        if last_datetime is None:
+            return self
+
+        return self.take(self.timestamp >= datetime_to_epoch(last_datetime))
+
+    def get_datetime(self, day: bool = False) -> np.ndarray:
+        values = epoch_to_datetime64(self.timestamp)
+
+        if day:
+            values = values.astype("datetime64[D]").astype("datetime64[ns]")
+
+        return values
+
+    def to_frame(self, day: bool = False) -> pd.DataFrame:
+        """DataFrame с колонками datetime (datetime64[ns]) и OHLCV (float64)"""
+        return pd.DataFrame({"datetime": self.get_datetime(day),
+                             **{name: getattr(self, name) for name in OHLCV_COLUMNS}})
+
+    def to_records(self, day: bool = False) -> list[dict[str, Any]]:
+        return self.to_frame(day).to_dict("records")
+
+
+def decode_kline(data: Sequence[Sequence[Any]] | None,
+                 columns: Sequence[str] = SPOT_KLINE_COLUMNS) -> KlineBatch:
+    """
+    Декодировать сырой ответ KuCoin kline в KlineBatch
+
+    :param data: список свечей в виде списков строк/чисел
+    :param columns: порядок полей в свече (SPOT_KLINE_COLUMNS или FUTURES_KLINE_COLUMNS)
+    """
+    if not data:
+        return KlineBatch.empty()
+
+    raw = np.asarray(data, dtype=np.float64)
+
+    if raw.ndim != 2 or raw.shape[1] < len(columns):
+        raise ValueError(f"Invalid kline payload shape {raw.shape}")
+
+    timestamp = raw[:, columns.index("datetime")].astype(np.int64)
+    timestamp = np.where(timestamp > MS_THRESHOLD, timestamp // 1000, timestamp)
+
+    order = np.argsort(timestamp, kind="stable")
+
+    return KlineBatch(timestamp[order],
+                      *(np.ascontiguousarray(raw[order, columns.index(name)]) for name in OHLCV_COLUMNS))
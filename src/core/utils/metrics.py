@@ -0,0 +1,55 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+# Метрики парсеров (воркеры Celery и CLI), метрики HTTP - в app.configuration.monitoring.
+# Импорт только как src.core.utils.metrics: второй экземпляр модуля (core.utils.metrics
+# при PYTHONPATH=src:.) повторно регистрирует метрики и падает
+
+rate_limit_wait_seconds = Histogram(
+    'kucoin_rate_limit_wait_seconds',
+    'Time spent waiting for KuCoin rate limiter tokens',
+    ['endpoint'],
+    buckets=(0, 0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30)
+)
+
+pipeline_queue_depth = Gauge(
+    'parser_pipeline_queue_depth',
+    'Items waiting in the input queue of a parser pipeline stage',
+    ['pipeline', 'stage']
+)
+
+pipeline_items_total = Counter(
+    'parser_pipeline_items_total',
+    'Items processed by a parser pipeline stage',
+    ['pipeline', 'stage', 'status']
+)
+
+concurrency_limit = Gauge(
+    'adaptive_concurrency_limit',
+    'Current in-flight limit of an adaptive concurrency limiter',
+    ['limiter']
+)
+
+concurrency_inflight = Gauge(
+    'adaptive_concurrency_inflight',
+    'Requests currently in flight under an adaptive concurrency limiter',
+    ['limiter']
+)
+
+request_latency_seconds = Histogram(
+    'adaptive_concurrency_latency_seconds',
+    'Latency of requests under an adaptive concurrency limiter',
+    ['limiter'],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30)
+)
+
+request_latency_quantile = Gauge(
+    'adaptive_concurrency_latency_quantile_seconds',
+    'Latency percentiles over the recent window of an adaptive concurrency limiter',
+    ['limiter', 'quantile']
+)
+
+cache_events_total = Counter(
+    'data_cache_events_total',
+    'DataManager cache events (hit, miss, eviction, expired, corrupted) by tier',
+    ['tier', 'event']
+)
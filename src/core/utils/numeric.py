@@ -0,0 +1,181 @@
+"""
+Векторное приведение колонок OHLCV к float64 (замена str_to_float / convert_volume)
+
+Цены: пробелы - разделители разрядов, запятая - десятичная ("1 234,5").
+Объем: запятая - разделитель разрядов, суффиксы K/M/B ("1,234.5K").
+"x" - маркер пропущенной свечи: NaN, но не ошибка разбора.
+Строки разбираются целой колонкой функциями pyarrow.compute,
+строки, которые не удалось разобрать, попадают в отчет, а не в stdout.
+"""
+from __future__ import annotations
+
+from typing import Iterable, Tuple
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+OHLCV_COLUMNS = ("open", "close", "max", "min", "volume")
+SYNTHETIC_COLUMN = "synthetic"
+
+VOLUME_SUFFIXES = {"K": 10**3, "M": 10**6, "B": 10**9}
+MISSING_MARKERS = ("x",)
+
+WHITESPACE = (" ", "\t", "\u00a0", "\u202f")  # в том числе неразрывные пробелы
+NUMBER = r"^[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$"
+
+
+def _try_cast(text: pa.Array) -> np.ndarray | None:
+    """Вся колонка за один cast - обычный случай, без регулярных выражений"""
+    try:
+        return pc.cast(text, pa.float64()).to_numpy(zero_copy_only=False, writable=True)
+    except pa.ArrowInvalid:
+        return None
+
+
+def _cast_float(text: pa.Array) -> np.ndarray:
+    """Строки -> float64, неразобранные -> NaN (cast pyarrow без errors='coerce')"""
+    result = _try_cast(text)
+    if result is not None:
+        return result
+
+    result = np.full(len(text), np.nan)
+
+    ok = pc.fill_null(pc.match_substring_regex(text, NUMBER), False)
+    mask = ok.to_numpy(zero_copy_only=False)
+
+    if mask.any():
+        result[mask] = pc.cast(pc.filter(text, ok), pa.float64()).to_numpy(zero_copy_only=False)
+
+    return result
+
+
+def _parse_strings(text: pa.Array, volume: bool) -> np.ndarray:
+    result = None if volume else _try_cast(text)
+    if result is not None:
+        return result
+
+    for space in WHITESPACE:
+        text = pc.replace_substring(text, space, "")
+
+    if not volume:
+        return _cast_float(pc.replace_substring(text, ",", "."))
+
+    text = pc.replace_substring(text, ",", "")
+
+    suffix = pc.index_in(pc.utf8_slice_codeunits(text, -1), value_set=pa.array(list(VOLUME_SUFFIXES)))
+    suffix = pc.fill_null(suffix, -1).to_numpy(zero_copy_only=False)
+    has_suffix = suffix >= 0
+
+    text = pc.if_else(pa.array(has_suffix), pc.utf8_slice_codeunits(text, 0, -1), text)
+    parsed = _cast_float(text)
+
+    multiplier = np.array(list(VOLUME_SUFFIXES.values()), dtype=np.float64)[suffix[has_suffix]]
+    parsed[has_suffix] = np.round(parsed[has_suffix] * multiplier, 2)
+
+    return parsed
+
+
+def parse_numbers(values: pd.Series, volume: bool = False,
+                  missing: Iterable[str] = MISSING_MARKERS) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Колонка -> (float64 значения, маска разобранных, маска маркеров пропуска)
+
+    volume=True - правила объема (запятая - разряды, суффиксы K/M/B, округление
+    до 2 знаков после умножения на суффикс, как volume_to_float).
+    """
+    if values.dtype.kind in "iufb":
+        result = values.to_numpy(dtype=np.float64)
+        return result, ~np.isnan(result), np.zeros(len(values), dtype=bool)
+
+    is_missing = values.isin(list(missing)).to_numpy()
+
+    if pd.api.types.infer_dtype(values, skipna=True) in ("string", "empty"):
+        # Маркеры пропуска -> null, чтобы не мешать разбору всей колонки за один cast
+        text = pa.array(values.where(~is_missing), type=pa.string(), from_pandas=True)
+        result = _parse_strings(text, volume)
+    else:
+        # Числа вперемешку со строками: числа как есть, строки - тем же разбором
+        is_string = values.map(type).eq(str).to_numpy()
+        result = pd.to_numeric(values.where(~is_string), errors="coerce").to_numpy(dtype=np.float64)
+
+        if is_string.any():
+            result[is_string] = _parse_strings(pa.array(values[is_string], type=pa.string()), volume)
+
+    result[is_missing] = np.nan
+
+    return result, ~np.isnan(result), is_missing
+
+
+def coerce_ohlcv(data: pd.DataFrame, volume_column: str = "volume",
+                 exclude: Iterable[str] = ("datetime", SYNTHETIC_COLUMN)) -> Tuple[pd.DataFrame, pd.Series, pd.DataFrame]:
+    """
+    Все колонки, кроме exclude, -> float64
+
+    Возвращает: новый DataFrame, маску строк, где разобраны все колонки,
+    и отчет об отброшенных значениях (row - индекс строки, column, value -
+    исходное значение); маркеры пропуска в отчет не попадают.
+    """
+    result = data.copy()
+    valid = np.ones(len(data), dtype=bool)
+    rejected = []
+
+    for column in data.columns:
+        if column in exclude:
+            continue
+
+        values, parsed, is_missing = parse_numbers(data[column], volume=column == volume_column)
+        result[column] = values
+        valid &= parsed
+
+        bad = ~parsed & ~is_missing & data[column].notna().to_numpy()
+        if bad.any():
+            rejected.append(pd.DataFrame({"row": data.index[bad], "column": column,
+                                          "value": data[column].to_numpy()[bad]}))
+
+    if rejected:
+        rejected = pd.concat(rejected, ignore_index=True)
+    else:
+        rejected = pd.DataFrame({"row": [], "column": [], "value": []})
+
+    return result, pd.Series(valid, index=data.index), rejected
+
+
+def typed_missing(data: pd.DataFrame, marker: str = "x") -> pd.DataFrame:
+    """
+    Пропущенные свечи: NaN в OHLCV и булева колонка synthetic
+
+    Совместимость со старыми CSV, где пропуски помечены строкой "x": маркер
+    заменяется на NaN, колонки, где после этого остались только числа,
+    приводятся к float64 (сырые строки вроде "1.2K" остаются до clear_dataset).
+    Если колонки synthetic нет, ей становится "open пропущен" - как в
+    прежнем get_dataset_Nan.
+    """
+    columns = [column for column in OHLCV_COLUMNS if column in data.columns]
+    is_marker = {}
+
+    for column in columns:
+        if data[column].dtype == object:
+            is_marker[column] = (data[column] == marker).to_numpy()
+
+    if any(mask.any() for mask in is_marker.values()) or SYNTHETIC_COLUMN not in data.columns:
+        data = data.copy()
+
+    for column, mask in is_marker.items():
+        values = data[column].mask(mask) if mask.any() else data[column]
+
+        try:
+            data[column] = pd.to_numeric(values).astype(np.float64)
+        except (ValueError, TypeError):
+            data[column] = values
+
+    if SYNTHETIC_COLUMN not in data.columns:
+        synthetic = is_marker.get("open", np.zeros(len(data), dtype=bool))
+        if "open" in data.columns:
+            synthetic = synthetic | data["open"].isna().to_numpy()
+
+        data[SYNTHETIC_COLUMN] = synthetic
+    else:
+        data[SYNTHETIC_COLUMN] = data[SYNTHETIC_COLUMN].fillna(False).astype(bool)
+
+    return data
@@ -0,0 +1,137 @@
+"""
+Межпроцессный token bucket для REST запросов KuCoin
+
+Состояние корзины (токены, время обновления) лежит в маленьком файле
+и меняется под fcntl.flock, поэтому лимит общий для всех воркеров
+Celery и CLI-парсеров на одном хосте.
+"""
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Generator
+import asyncio
+import fcntl
+import os
+import struct
+import time
+
+from .metrics import rate_limit_wait_seconds
+
+import logging
+
+logger = logging.getLogger("RateLimiter")
+
+_STATE = struct.Struct("<dd")  # tokens, updated (unix time)
+
+# Вес запросов по публичным пулам KuCoin: endpoint -> (пул, вес)
+KUCOIN_ENDPOINT_WEIGHTS = {
+    "spot_kline": ("spot", 3),
+    "futures_kline": ("futures", 3),
+    "stats_24hr": ("spot", 15),
+    "order_book": ("spot", 3),
+}
+
+
+class TokenBucket:
+    """
+    Token bucket с резервированием: запрос сразу списывает вес (баланс может
+    уйти в минус) и ждет, пока корзина его отработает. Так ожидающие
+    обслуживаются по порядку, без гонки за освободившимися токенами.
+    """
+
+    def __init__(self, path: Path, capacity: float, refill_per_second: float) -> None:
+        self.path = Path(path)
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    @contextmanager
+    def _locked(self) -> Generator[int, None, None]:
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield fd
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    def reserve(self, weight: float = 1) -> float:
+        """Списать weight токенов, вернуть сколько секунд нужно подождать"""
+        with self._locked() as fd:
+            now = time.time()
+            data = os.pread(fd, _STATE.size, 0)
+
+            if len(data) == _STATE.size:
+                tokens, updated = _STATE.unpack(data)
+                tokens = min(self.capacity, tokens + max(0.0, now - updated) * self.refill_per_second)
+            else:
+                tokens = self.capacity
+
+            tokens -= weight
+            os.pwrite(fd, _STATE.pack(tokens, now), 0)
+
+        return max(0.0, -tokens / self.refill_per_second)
+
+    async def acquire(self, weight: float = 1) -> float:
+        wait = self.reserve(weight)
+        if wait:
+            await asyncio.sleep(wait)
+        return wait
+
+    def acquire_sync(self, weight: float = 1) -> float:
+        wait = self.reserve(weight)
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+class KucoinRateLimiter:
+    """Взвешенный по endpoint лимитер поверх корзин публичных пулов KuCoin"""
+
+    def __init__(self, path_dir: Path, capacity: float = 2000, window: float = 30,
+                 weights: dict[str, tuple[str, float]] = KUCOIN_ENDPOINT_WEIGHTS) -> None:
+        self.weights = weights
+        self.buckets = {
+            pool: TokenBucket(Path(path_dir) / f"kucoin_{pool}.bucket", capacity, capacity / window)
+            for pool in {pool for pool, _ in weights.values()}
+        }
+
+    def _bucket(self, endpoint: str) -> tuple[TokenBucket, float]:
+        if endpoint not in self.weights:
+            raise ValueError(f"Unknown KuCoin endpoint for rate limiter: {endpoint}")
+
+        pool, weight = self.weights[endpoint]
+        return self.buckets[pool], weight
+
+    def _observe(self, endpoint: str, wait: float) -> float:
+        rate_limit_wait_seconds.labels(endpoint=endpoint).observe(wait)
+
+        if wait > 1:
+            logger.debug(f"Rate limiter {endpoint} wait {wait:.2f}s")
+
+        return wait
+
+    async def acquire(self, endpoint: str) -> float:
+        bucket, weight = self._bucket(endpoint)
+        return self._observe(endpoint, await bucket.acquire(weight))
+
+    def acquire_sync(self, endpoint: str) -> float:
+        bucket, weight = self._bucket(endpoint)
+        return self._observe(endpoint, bucket.acquire_sync(weight))
+
+
+_kucoin_rate_limiter: KucoinRateLimiter | None = None
+
+def get_kucoin_rate_limiter() -> KucoinRateLimiter:
+    global _kucoin_rate_limiter
+
+    if _kucoin_rate_limiter is None:
+        from src.core import data_manager, settings_parser
+
+        _kucoin_rate_limiter = KucoinRateLimiter(
+            path_dir=data_manager["cached"] / "rate_limit",
+            capacity=settings_parser.kucoin.rate_limit_capacity,
+            window=settings_parser.kucoin.rate_limit_window,
+        )
+
+    return _kucoin_rate_limiter
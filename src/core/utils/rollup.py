@@ -0,0 +1,97 @@
+"""
+Векторная агрегация свечей базового таймфрейма в старшие (5m -> 15m/1h/4h/1d)
+
+Корзины выравниваются от эпохи UTC, как у бирж: 4h - 00:00, 04:00, ...,
+1d - полночь. Последняя корзина может быть неполной - ее пересчитывают
+при следующем обновлении.
+"""
+from __future__ import annotations
+
+from typing import Iterable
+import numpy as np
+import pandas as pd
+
+OHLCV_COLUMNS = ("open", "close", "max", "min", "volume")
+
+TIMEFRAME_UNITS = {"m": 60, "h": 3600, "H": 3600, "d": 86400, "D": 86400, "w": 604800, "W": 604800}
+
+
+def timeframe_to_ns(timeframe: str) -> int:
+    """5m / 1h / 4h / 1d -> длительность свечи в наносекундах"""
+    if not timeframe[:-1].isdigit() or timeframe[-1] not in TIMEFRAME_UNITS:
+        raise ValueError(f"Unsupported timeframe: {timeframe}")
+
+    return int(timeframe[:-1]) * TIMEFRAME_UNITS[timeframe[-1]] * 10**9
+
+
+def bucket_start(timestamp: pd.Timestamp, timeframe: str) -> pd.Timestamp:
+    """Начало корзины таймфрейма, в которую попадает timestamp"""
+    step = timeframe_to_ns(timeframe)
+    value = pd.Timestamp(timestamp).as_unit("ns").value
+
+    return pd.Timestamp(value - value % step)
+
+
+def tail_start(data: pd.DataFrame, timeframes: Iterable[str]) -> pd.Timestamp | None:
+    """
+    С какого момента нужны базовые свечи, чтобы пересчитать все корзины,
+    затронутые data: начало корзины самого крупного таймфрейма
+    """
+    if data.empty:
+        return None
+
+    first = pd.to_datetime(data["datetime"]).min()
+    return min(bucket_start(first, timeframe) for timeframe in timeframes)
+
+
+def rollup(data: pd.DataFrame, timeframe: str, base: str = "5m", since: pd.Timestamp = None) -> pd.DataFrame:
+    """
+    Свечи timeframe из свечей base: open - первая, close - последняя,
+    max/min - экстремумы, volume - сумма; count - число базовых свечей
+    и complete - корзина заполнена целиком
+
+    since - отбросить корзины, начинающиеся раньше (они посчитаны не полностью).
+    """
+    step, base_step = timeframe_to_ns(timeframe), timeframe_to_ns(base)
+
+    if step % base_step:
+        raise ValueError(f"Timeframe {timeframe} is not a multiple of {base}")
+
+    columns = ("datetime", *OHLCV_COLUMNS, "count", "complete")
+
+    values = {column: pd.to_numeric(data[column], errors="coerce").to_numpy(dtype=np.float64)
+              for column in OHLCV_COLUMNS}
+    timestamp = pd.to_datetime(data["datetime"]).to_numpy().astype("datetime64[ns]").view(np.int64)
+
+    # Пропущенные свечи не участвуют в агрегации
+    valid = ~np.isnan(np.column_stack([values[column] for column in OHLCV_COLUMNS])).any(axis=1)
+    if not valid.all():
+        timestamp = timestamp[valid]
+        values = {column: value[valid] for column, value in values.items()}
+
+    if not len(timestamp):
+        return pd.DataFrame({column: [] for column in columns})
+
+    order = np.argsort(timestamp, kind="stable")
+    timestamp = timestamp[order]
+    values = {column: value[order] for column, value in values.items()}
+
+    buckets = timestamp - timestamp % step
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(buckets)] - 1
+
+    result = pd.DataFrame({
+        "datetime": buckets[starts].view("datetime64[ns]"),
+        "open": values["open"][starts],
+        "close": values["close"][ends],
+        "max": np.maximum.reduceat(values["max"], starts),
+        "min": np.minimum.reduceat(values["min"], starts),
+        "volume": np.add.reduceat(values["volume"], starts),
+        "count": ends - starts + 1,
+    })
+    result["complete"] = result["count"] == step // base_step
+
+    if since is not None:
+        result = result[result["datetime"] >= pd.Timestamp(since)].reset_index(drop=True)
+
+    return result
@@ -10,17 +10,26 @@ import os
 
 from src.parser_driver import (ParserApi, KuCoinAPI, ParserNewsApi, 
                            ParserKucoin, TelegramParser)
-from src.core.models import Dataset, DatasetTimeseries
-from src.core.database.orm import (NewsData, PriceData, CoinQuery, NewsQuery)
+from src.core.models import Dataset, DatasetTimeseries, CandleRingBuffer
+from src.core.database.orm import (NewsData, PriceData, CoinQuery, NewsQuery, TaskQuery)
 from src.core.utils import AutoDecorator
 from src.core.utils.tesseract_img_text import image_to_text
-from src.core import data_manager, Database, telegram_settings
+from src.core.utils.kline_decoder import KlineBatch
+from src.parser_driver.parsers.kucoin_stream import KuCoinCandleStream
+from src.handlers.pipeline import Pipeline, Stage
+from src.handlers.rollup import RollupEngine
+from src.parser_driver.http_client import get_http_client
+from src.core import data_manager, Database, telegram_settings, settings_parser
 
 import logging
 
 logger = logging.getLogger("parser_logger.att")
 
 BUFFER_SIZE = 100
+BUFFER_CAPACITY = BUFFER_SIZE * 2  # Запас под свечи одного опроса сверх BUFFER_SIZE
+
+STREAM_CHECK_INTERVAL = 5  # Секунд между проверками websocket свечей на разрыв
+STREAM_STALE_TIMEOUT = 60  # Минимум секунд без сообщений до переподключения
 
 class AttParser:
 
@@ -40,11 +49,17 @@ class AttParser:
         self.save_type = "raw"
 
         self.path_save = None
+        self.launch_dir = None  # Папка запуска, заданная снаружи (общая для шардов)
 
         self.api = api
         self.db = None
         self.task_instance = None  # Ссылка на Celery задачу для проверки остановки
         self.manual_stop = False  # Режим ручной остановки
+        self.stream = False  # Свечи через websocket вместо опроса REST
+
+        # Старшие таймфреймы из базового, см. settings_parser.rollup
+        self.rollup = RollupEngine(settings_parser.rollup.base, settings_parser.rollup.timeframes) \
+            if settings_parser.rollup.enabled else None
 
     async def update_coin_list(self, db: Database):
         """Update coin list from database"""
@@ -93,11 +108,12 @@ class AttParser:
         tasks = {}
         if self.path_save:
             logger.info(f"Last launch: {self.path_save}")
-            for coin in data_manager.get_path_from(self.path_save):
-                for csv_file in data_manager.get_path_from(coin, filter_path=lambda x: time_parser in str(x.name)):
-                    dt = DatasetTimeseries(csv_file, timetravel=time_parser)
-                    task = asyncio.create_task(self.add_buffer_dataTimeseries(coin, dt, time_parser))
-                    tasks[coin] = task
+            # Файлы запуска из каталога, без обхода папок на каждую монету
+            for record in data_manager.catalog.find(launch=self.path_save, timeframe=time_parser):
+                coin = record["coin"]
+                dt = DatasetTimeseries(record["path"], timetravel=time_parser)
+                task = asyncio.create_task(self.add_buffer_dataTimeseries(coin, dt, time_parser))
+                tasks[coin] = task
         if tasks:
             [data for data in await asyncio.gather(*tasks.values())]
 
@@ -109,6 +125,11 @@ class AttParser:
             self.path_save = None
         else:
             await self._load_last_launch(time_parser)
+
+        if self.launch_dir is not None:
+            self.path_save = self.launch_dir
+
+        await self._record_launch_dir()
         
         if isinstance(self.api, KuCoinAPI):
             if miss:
@@ -188,10 +209,15 @@ class AttParser:
     async def parse(self, count: int = 10, miss: bool = False,
                     last_launch: bool = False, time_parser="5m", 
                     save: bool = False, save_type: str = "raw",
-                    manual_stop: bool = False, *input_args) -> dict[str, pd.DataFrame]:
+                    manual_stop: bool = False, stream: bool = False, *input_args) -> dict[str, pd.DataFrame]:
         
         self.manual_stop = manual_stop
 
+        if stream and not isinstance(self.api, KuCoinAPI):
+            raise ValueError("Stream mode is supported only for kucoin_api parser")
+
+        self.stream = stream
+
         if isinstance(self.api, KuCoinAPI) or isinstance(self.api, ParserKucoin):
             func_parser, check_stop, input_args = await self._init_kucoin_parsers(miss, last_launch, time_parser, count, *input_args)
         
@@ -241,20 +267,31 @@ class AttParser:
 
         return queue
 
-    async def dataset_clear(self, coin: str, time_parser: str, dataset: Dataset, processed_dir, filename):
+    async def dataset_clear(self, coin: str, time_parser: str, dataset: Dataset):
         
         new_dataset = self.clear_dataset(dataset, coin, time_parser)
+
+        store = data_manager.candle_store("processed")
         
         dataset.set_dataset(new_dataset.get_dataset())
-        dataset.set_path_save(processed_dir)
-        dataset.set_filename(filename)
+        dataset.set_path_save(store.path(coin, time_parser))
 
         await self.update_db_timeseries_path(coin, dataset, time_parser)
 
-        dataset.save_dataset()
+        data_manager.append_candles(coin, time_parser, dataset.get_dataset(), "processed")
 
         logger.debug("Save clear data for coin: %s, count: %d in %s", coin, len(dataset), dataset.get_path_save())
     
+    async def _record_launch_dir(self) -> None:
+        """Папка запуска в result задачи: склейка запусков пропускает папки активных задач"""
+        if self.task_instance is None or self.path_save is None:
+            return
+
+        try:
+            await TaskQuery.set_parsing_task_launch_dir(self.task_instance.request.id, str(self.path_save))
+        except Exception as e:
+            logger.error(f"Error recording launch dir {self.path_save}: {e}")
+
     async def save_data(self, dataset: DatasetTimeseries, path_type: str = "raw", 
                   coin: str = "coin", time_parser: str = "5m") -> dict[str, Dataset]:
         """Save data to file"""
@@ -266,6 +303,7 @@ class AttParser:
                 path_save = self.api.create_launch_dir()
 
             self.path_save = path_save
+            await self._record_launch_dir()
         else:
             path_save = self.path_save
             
@@ -278,14 +316,15 @@ class AttParser:
 
             dataset.save_dataset()
 
+            # CSV в папке запуска - основная запись, копия в Parquet только по настройке
+            if data_manager.settings.CANDLES_RAW_PARQUET:
+                data_manager.append_candles(coin, time_parser, dataset.get_dataset(), "raw")
+
             await self.update_db_timeseries_path(coin, dataset, path_save_coin)
 
             logger.info("Save data for coin: %s, count: %d in %s", coin, len(dataset), dataset.get_path_save())
         else:
-            path_save = data_manager["processed"]
-            path_save = data_manager.create_dir("processed", coin)
-            path_save = data_manager.create_dir("processed", coin + "/" + time_parser)
-            await self.dataset_clear(coin, time_parser, dataset, path_save, filename)
+            await self.dataset_clear(coin, time_parser, dataset)
 
         return dataset
 
@@ -298,21 +337,26 @@ class AttParser:
             dataset.set_path_save(data_manager["processed"] / coin)
             ts = await CoinQuery.add_timeseries(coin=coin, timestamp=time_parser,
                                             path_dataset=str(dataset.get_path_save()))
-        dataset.sort(ascending=False)
-
-        for data in dataset:
-
-            data = {
-                "datetime": data.get("datetime"),
-                "open": float(data.get("open")),
-                "close": float(data.get("close")),
-                "max": float(data.get("max")),
-                "min": float(data.get("min")),
-                "volume": float(data.get("volume"))
-            }
-            
-            if not await CoinQuery.add_data_timeseries(timeseries_id=ts.id, data_timeseries=data):
-                break
+        else:
+            ts = ts[0]
+
+        inserted = await CoinQuery.add_data_timeseries_bulk(timeseries_id=ts.id, 
+                                                            data=dataset.get_dataset())
+
+        logger.debug("Insert data timeseries for coin: %s, time: %s, inserted: %d", 
+                     coin, time_parser, inserted)
+
+        if self.rollup is not None and time_parser == self.rollup.base and len(dataset):
+            try:
+                await self.rollup.update(coin, dataset.get_dataset(), ts.id)
+            except Exception as e:
+                logger.error(f"Rollup error for coin {coin}: {e}")
+
+        if len(dataset):
+            await CoinQuery.set_kline_cursor(coin=coin, timeframe=time_parser,
+                                             last_datetime=pd.Timestamp(dataset.get_datetime_last()).to_pydatetime())
+
+        return inserted
 
     async def update_db_timeseries_path(self, coin: str, dataset: DatasetTimeseries, time_parser: str):
         if self.flag_save:    
@@ -326,7 +370,8 @@ class AttParser:
         #     async with self.db.get_session() as session:
         data = dataset.get_last_row()
 
-        if isinstance(data["close"].item(), str) and data["close"].item() == "x":
+        # Последняя свеча пропущена (synthetic, NaN) - цену не обновляем
+        if pd.isna(data["close"].item()) or ("synthetic" in data and data["synthetic"].item()):
             return False
         
         price_data = PriceData(
@@ -349,7 +394,8 @@ class AttParser:
         if len(self.buffer_data) > BUFFER_SIZE:
             self.buffer_data.pop(list(self.buffer_data.keys())[0])
 
-    async def add_buffer_dataTimeseries(self, coin: str, data: DatasetTimeseries, time_parser: str = "5m"):
+    async def add_buffer_dataTimeseries(self, coin: str, data: DatasetTimeseries, time_parser: str = "5m",
+                                        update_db: bool = True) -> DatasetTimeseries | None:
 
         logger.info(f"Add buffer data for coin: {coin}, time_parser: {time_parser}")
         logger.info(f"Data: {len(data)}")
@@ -358,7 +404,7 @@ class AttParser:
         self.buffer_data[coin].setdefault(time_parser, None)
 
         if data is None:
-            return
+            return None
 
         await self.update_db_last_price(coin, data)
 
@@ -369,20 +415,31 @@ class AttParser:
         data.set_dataset(data_pd)
 
         if self.buffer_data[coin][time_parser] is None:
-            self.buffer_data[coin][time_parser] = data
-            # logger.debug(f"{coin} - {data.get_datetime_last()=}")
+            self.buffer_data[coin][time_parser] = CandleRingBuffer(BUFFER_CAPACITY, timetravel=time_parser)
+
+        buffer: CandleRingBuffer = self.buffer_data[coin][time_parser]
+
+        # Большая догрузка не помещается в буфер - сохраняем ее целиком, до вытеснения
+        if self.flag_save and len(buffer) + len(data) > buffer.capacity:
+            await self.save_data(DatasetTimeseries(Dataset.concat_dataset(data_pd, buffer.to_frame(ascending=False)), 
+                                                   timetravel=time_parser), 
+                                 self.save_type, coin, time_parser)
+            buffer.append(data)
+            buffer.truncate(BUFFER_SIZE // 2)
         else:
-            self.buffer_data[coin][time_parser].append(data)
-            # self.buffer_data[coin][time_parser] = DatasetTimeseries(DatasetTimeseries.concat_dataset(self.buffer_data[coin][time_parser], data))
+            buffer.append(data)
 
-        await self.update_db_timeseries(coin, self.buffer_data[coin][time_parser], time_parser)
+        # В БД уходят только пришедшие свечи, буфер целиком не пересылаем
+        if update_db:
+            await self.update_db_timeseries(coin, data, time_parser)
 
-        if len(self.buffer_data[coin][time_parser]) >= BUFFER_SIZE:
+        if len(buffer) >= BUFFER_SIZE:
             if self.flag_save:
-                await self.save_data(self.buffer_data[coin][time_parser], self.save_type, coin, time_parser)
+                await self.save_data(buffer.to_dataset(ascending=False), self.save_type, coin, time_parser)
             
-            self.buffer_data[coin][time_parser].pop_last_row(BUFFER_SIZE // 2)
+            buffer.truncate(BUFFER_SIZE // 2)
 
+        return data
 
         # self.buffer_data.setdefault(coin, {})
         # self.buffer_data[coin].setdefault(time_parser, None)
@@ -434,6 +491,9 @@ class AttParser:
         return coins
     
     async def start_manager_kucoin(self, check_stop, func_parser, time_parser, count, *args):
+        if isinstance(self.api, KuCoinAPI):
+            return await self.start_pipeline_kucoin(check_stop, time_parser, count, *args)
+
         # Инициализируем словарь coins из coin_list
         coins = {}
         if self.coin_list:
@@ -502,6 +562,161 @@ class AttParser:
         #     # input_task.cancel()
         #     self._cleanup_processes(buffer_processes)
 
+    def _create_pipeline_kucoin(self, time_parser: str, currency: str, cursors: Dict[str, datetime],
+                                processed: Dict[str, DatasetTimeseries]) -> Pipeline:
+        """Стадии загрузка -> декодирование -> буфер -> БД для KuCoinAPI"""
+        config = settings_parser.pipeline
+
+        async def fetch(coin: str):
+            buffer = self.get_data_from_buffer(coin, time_parser)
+            # Монеты без буфера продолжают с сохраненного high-water mark (рестарт воркера)
+            last_datetime = buffer.get_datetime_last() if buffer else cursors.get(coin)
+
+            payloads = await self.api.async_fetch_kline_payloads(coin, last_datetime, self.api.limiter,
+                                                                 currency, time_parser)
+            return coin, last_datetime, payloads
+
+        async def decode(item):
+            coin, last_datetime, payloads = item
+            dataset = self.api.decode_kline_payloads(coin, payloads, last_datetime, time_parser)
+
+            if dataset is None:
+                logger.warning(f"Data for coin {coin} is None")
+                return None
+
+            return coin, dataset
+
+        async def buffer(item):
+            coin, dataset = item
+            data = await self.add_buffer_dataTimeseries(coin, dataset, time_parser, update_db=False)
+            processed[coin] = data
+
+            return (coin, data) if data is not None and len(data) else None
+
+        async def write_db(item):
+            coin, data = item
+            await self.update_db_timeseries(coin, data, time_parser)
+
+        return Pipeline("kucoin_api", [
+            Stage("fetch", fetch, config.fetch_concurrency, config.queue_size),
+            Stage("decode", decode, config.decode_concurrency, config.queue_size),
+            Stage("buffer", buffer, config.buffer_concurrency, config.queue_size),
+            Stage("db", write_db, config.db_concurrency, config.queue_size),
+        ])
+
+    async def start_pipeline_kucoin(self, check_stop, time_parser, count, currency: str = "USDT", *args):
+        """
+        Опрос KuCoinAPI через asyncio конвейер вместо mp.Queue
+
+        Все стадии работают в одном процессе и передают объекты по ссылке, без
+        pickle. Цикл ждет прохождения всех монет через конвейер (join), поэтому
+        одна монета не обрабатывается двумя воркерами одновременно.
+        """
+        if not self.coin_list:
+            await self.update_coin_list(self.db)
+
+        coins = {coin: None for coin in self.coin_list}
+        cursors = await self.api.load_kline_cursors(time_parser)
+        all_dataframes = {}
+
+        async with self._create_pipeline_kucoin(time_parser, currency, cursors, all_dataframes) as pipeline:
+            while check_stop(**{"stop_event": None, 
+                                "count": count, "all_dataframes": all_dataframes}):
+                try:
+                    coins = await self.update_coins(coins)
+                    due = [coin for coin, last_time in coins.items() 
+                           if self._should_process_coin(last_time, self.pause)]
+
+                    if not due:
+                        await asyncio.sleep(5)
+                        continue
+
+                    logger.info(f"Start pipeline cycle - {len(due)} coins {datetime.now()}")
+
+                    for coin in due:
+                        await pipeline.put(coin)
+                        coins[coin] = datetime.now()
+
+                    await pipeline.join()
+
+                    await asyncio.sleep(5)
+
+                except Exception as e:
+                    logger.error(f"Error in Att parser: {e}")
+                    await asyncio.sleep(5)
+
+    async def _backfill_kucoin_stream(self, func_parser, coins: List[str], time_parser, *args):
+        """Догрузить через REST свечи, пропущенные до подписки или во время разрыва"""
+        coin_last_datetimes = {coin: self.get_data_from_buffer(coin, time_parser).get_datetime_last() if self.get_data_from_buffer(coin, time_parser) else None
+                               for coin in coins}
+
+        results = await func_parser(coin_last_datetimes, *args)
+
+        tasks = [asyncio.create_task(self.add_buffer_dataTimeseries(result[0], result[1], time_parser))
+                 for result in results
+                 if isinstance(result, tuple) and result[1] is not None]
+
+        if tasks:
+            await asyncio.gather(*tasks)
+
+        logger.info(f"Stream backfill: {len(tasks)}/{len(coins)} coins")
+
+    async def start_manager_kucoin_stream(self, check_stop, func_parser, time_parser, count, *args):
+        """
+        Свечи из websocket KuCoin вместо опроса REST каждые pause минут
+
+        Свеча считается закрытой, когда по монете приходит свеча с новым временем:
+        в буфер уходит пара [закрытая, текущая], текущая только обновляет цену,
+        в БД пишется только закрытая.
+        При старте и после каждого переподключения пропуск догружается через REST.
+        """
+        if not self.coin_list:
+            await self.update_coin_list(self.db)
+
+        coins = [coin for coin in self.coin_list if "FUTURE" not in coin]
+
+        if len(coins) != len(self.coin_list):
+            logger.warning(f"Futures are not streamed, skipped: {set(self.coin_list) - set(coins)}")
+
+        last_candles: Dict[str, KlineBatch] = {}
+        day = time_parser[-1] in ("d", "D", "w", "W")
+
+        async def on_candle(coin: str, candle: KlineBatch):
+            last = last_candles.get(coin)
+            last_candles[coin] = candle
+
+            if last is None or candle.timestamp[-1] <= last.timestamp[-1]:
+                return
+
+            data = DatasetTimeseries(KlineBatch.concat([last, candle]).to_frame(day=day))
+            await self.add_buffer_dataTimeseries(coin, data, time_parser, update_db=False)
+
+            # В БД только закрытая свеча: ON CONFLICT DO NOTHING не обновит текущую при закрытии,
+            # и курсор не должен вставать на еще открытую свечу
+            await self.update_db_timeseries(coin, DatasetTimeseries(last.to_frame(day=day)), time_parser)
+
+        stream = KuCoinCandleStream(on_candle, currency=args[0], time=time_parser,
+                                    stale_timeout=max(STREAM_STALE_TIMEOUT, self.pause * 60))
+
+        await self._backfill_kucoin_stream(func_parser, coins, time_parser, *args)
+        await stream.connect(coins)
+
+        try:
+            while check_stop(**{"stop_event": None, "count": count, "all_dataframes": {}}):
+                await asyncio.sleep(STREAM_CHECK_INTERVAL)
+
+                if not stream.is_stale():
+                    continue
+
+                try:
+                    last_candles.clear()
+                    await stream.reconnect()
+                    await self._backfill_kucoin_stream(func_parser, coins, time_parser, *args)
+                except Exception as e:
+                    logger.error(f"Error reconnecting candle stream: {e}")
+        finally:
+            await stream.close()
+
     async def _manage_processes_telegram(self, func_parser, *args):
         result_queue = mp.Queue()
 
@@ -578,7 +793,11 @@ class AttParser:
                             check_stop: Callable, count: int = -1, 
                            time_parser: str ="5m", *args) -> List[pd.DataFrame]:
 
-        if isinstance(self.api, ParserKucoin) or isinstance(self.api, KuCoinAPI):
+        if isinstance(self.api, KuCoinAPI) and self.stream:
+            await self.start_manager_kucoin_stream(check_stop, func_parser, time_parser,
+                                                   count, *args)
+
+        elif isinstance(self.api, ParserKucoin) or isinstance(self.api, KuCoinAPI):
             print(args)
             await self.start_manager_kucoin(check_stop, func_parser, time_parser, 
                                             count, *args)
@@ -590,6 +809,8 @@ class AttParser:
         else:
             raise Exception("Unknown api")
 
+        await get_http_client().close()
+
         logger.info("End parser  - %s", datetime.now())
     
     def _check_stop_parser(self, stop_event, count, all_dataframes, len_coins):
@@ -684,7 +905,7 @@ class AttParser:
         
             if self._should_process_coin(last_time, self.pause):
                 if self.get_data_from_buffer(coin, time_parser):
-                    dataset: DatasetTimeseries = self.get_data_from_buffer(coin, time_parser)
+                    dataset: CandleRingBuffer = self.get_data_from_buffer(coin, time_parser)
                     last_datetime = dataset.get_datetime_last() - timedelta(minutes=self.pause % 5 * 5 + self.pause)
                     logger.debug("Start coin: %s with data from buffer %s last_datetime: %s", coin, len(dataset), last_datetime)
                 else:
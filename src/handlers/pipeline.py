@@ -0,0 +1,116 @@
+import asyncio
+from concurrent.futures import Executor
+from typing import Any, Awaitable, Callable, List
+
+from src.core.utils.metrics import pipeline_queue_depth, pipeline_items_total
+
+import logging
+
+logger = logging.getLogger("parser_logger.Pipeline")
+
+
+class Stage:
+    """
+    Стадия конвейера: concurrency воркеров читают из своей ограниченной очереди
+
+    func - корутина item -> результат. Если задан executor, func синхронная
+    и выполняется в нем (процессы - только для тяжелых CPU стадий).
+    Результат None дальше не передается.
+    """
+
+    def __init__(self, name: str, func: Callable[[Any], Awaitable[Any] | Any],
+                 concurrency: int = 1, maxsize: int = 100, executor: Executor = None) -> None:
+        self.name = name
+        self.func = func
+        self.concurrency = max(1, concurrency)
+        self.executor = executor
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+
+    async def process(self, item: Any) -> Any:
+        if self.executor is not None:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, self.func, item)
+
+        return await self.func(item)
+
+
+class Pipeline:
+    """
+    Цепочка стадий, соединенных ограниченными asyncio.Queue
+
+    Полная очередь блокирует put у предыдущей стадии - так медленный writer
+    в БД притормаживает загрузку, а не копит данные в памяти.
+    """
+
+    def __init__(self, name: str, stages: List[Stage]) -> None:
+        if not stages:
+            raise ValueError("Pipeline needs at least one stage")
+
+        self.name = name
+        self.stages = stages
+        self.workers: List[asyncio.Task] = []
+
+    def _observe(self, stage: Stage) -> None:
+        pipeline_queue_depth.labels(pipeline=self.name, stage=stage.name).set(stage.queue.qsize())
+
+    async def _worker(self, index: int) -> None:
+        stage = self.stages[index]
+        next_stage = self.stages[index + 1] if index + 1 < len(self.stages) else None
+
+        while True:
+            item = await stage.queue.get()
+            self._observe(stage)
+
+            try:
+                result = await stage.process(item)
+
+                if result is not None and next_stage is not None:
+                    await next_stage.queue.put(result)
+                    self._observe(next_stage)
+
+                pipeline_items_total.labels(pipeline=self.name, stage=stage.name, status="ok").inc()
+            except Exception as e:
+                pipeline_items_total.labels(pipeline=self.name, stage=stage.name, status="error").inc()
+                logger.error(f"Error in {self.name} stage {stage.name}: {e}")
+            finally:
+                stage.queue.task_done()
+
+    def start(self) -> "Pipeline":
+        if self.workers:
+            return self
+
+        for index, stage in enumerate(self.stages):
+            self.workers.extend(asyncio.create_task(self._worker(index), name=f"{self.name}:{stage.name}")
+                                for _ in range(stage.concurrency))
+
+        logger.info(f"Pipeline {self.name} started: " +
+                    ", ".join(f"{stage.name}x{stage.concurrency}" for stage in self.stages))
+
+        return self
+
+    async def put(self, item: Any) -> None:
+        """Положить элемент в первую стадию, ждет, если очередь заполнена"""
+        stage = self.stages[0]
+        await stage.queue.put(item)
+        self._observe(stage)
+
+    async def join(self) -> None:
+        """Дождаться, пока все положенные элементы пройдут все стадии"""
+        # Стадия кладет результат дальше до task_done, поэтому join по порядку достаточно
+        for stage in self.stages:
+            await stage.queue.join()
+
+    async def stop(self) -> None:
+        for worker in self.workers:
+            worker.cancel()
+
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+
+        for stage in self.stages:
+            self._observe(stage)
+
+    async def __aenter__(self) -> "Pipeline":
+        return self.start()
+
+    async def __aexit__(self, *exc) -> None:
+        await self.stop()
@@ -1,11 +1,17 @@
 import zipfile
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from datetime import datetime
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterable, List
+import multiprocessing as mp
 import shutil
 import os
 
-from core import DataManager
-from apps.data_processing.dataset import Dataset, DatasetTimeseries, NewsDataset
-from .dataset_types import get_dataset_type
+from src.core import data_manager
+from src.core.models.dataset import Dataset, DatasetTimeseries
+from src.core.utils.dataset_types import get_dataset_type
+from src.core.utils.rollup import timeframe_to_ns
 
 import logging
 
@@ -19,6 +25,60 @@ def try_catch(func):
             logger.error(f"Error in {func.__name__}: {type(e)}-{e}")
     return wrapper
 
+
+OUTPUT_PREFIXES = ("clear_", "concat_")
+
+
+def find_datasets(paths: Iterable[str | Path]) -> List[str]:
+    """CSV файлы по путям (папки - рекурсивно), кроме результатов прошлых очисток и склеек"""
+    files = []
+
+    for path in map(Path, paths):
+        if path.is_dir():
+            files.extend(str(file) for file in sorted(path.rglob("*.csv"))
+                         if not file.name.startswith(OUTPUT_PREFIXES))
+        elif path.is_file():
+            files.append(str(path))
+        else:
+            logger.warning(f"Path {path} does not exist")
+
+    return files
+
+
+def output_key(path_dataset: str) -> tuple[str, str]:
+    """
+    Куда clear_dataset сохранит результат (как Dataset: папка - имя
+    родительской папки, файл - clear_<имя>), без чтения файла
+    """
+    path_dataset = Path(path_dataset)
+    return path_dataset.parent.name, f"clear_{path_dataset.name}"
+
+
+def _clear_files(paths_dataset: List[str], save: bool) -> List[Dict[str, Any]]:
+    """
+    Задача пула: файлы с общим выходным файлом, по очереди в исходном порядке
+
+    Возвращается отчет, а не Dataset - DataFrame не передается между процессами.
+    """
+    reports = []
+
+    for path_dataset in paths_dataset:
+        start = perf_counter()
+        report = {"path": path_dataset, "output": None, "rows": None, "error": None, "pid": os.getpid()}
+
+        try:
+            dataset = Handler.clear(path_dataset, save=save)
+            report["rows"] = len(dataset)
+            report["output"] = os.path.join(dataset.get_path_save(), dataset.get_filename())
+        except Exception as e:
+            report["error"] = f"{type(e).__name__}: {e}"
+
+        report["seconds"] = perf_counter() - start
+        reports.append(report)
+
+    return reports
+
+
 class Handler:
 
     @classmethod
@@ -56,25 +116,127 @@ class Handler:
         return dataset
     
     @classmethod
-    @try_catch
-    def clear_dataset(cls, path_dataset: str, save: bool = True, backup: bool = False) -> Dataset:
+    def clear(cls, path_dataset: str, save: bool = True) -> Dataset:
+        """Очистка одного файла без перехвата ошибок - общая для clear_dataset и clear_datasets"""
         dataset = get_dataset_type(path_dataset)(path_dataset)
 
         logger.info(f"Clear {dataset.get_filename()}")
 
-        dataset.clear_dataset()
+        if isinstance(dataset, DatasetTimeseries):
+            # Файлы хранятся как <coin>_<timeframe>.csv; таймфрейм проверяется так же, как в fill_gaps
+            timetravel = Path(path_dataset).stem.rsplit("_", 1)[-1]
+            try:
+                timeframe_to_ns(timetravel)
+            except ValueError:
+                logger.warning(f"Unknown timeframe in {path_dataset}, using {dataset.timetravel}")
+            else:
+                dataset.timetravel = timetravel
+
+        dataset.set_dataset(dataset.clear_dataset())
 
         if save:
             dataset.set_filename(f"clear_{dataset.get_filename()}")
             dataset.save_dataset()
 
+        return dataset
+
+    @classmethod
+    @try_catch
+    def clear_dataset(cls, path_dataset: str, save: bool = True, backup: bool = False) -> Dataset:
+        dataset = cls.clear(path_dataset, save=save)
+
         if backup:
             cls.backup_dataset([path_dataset])
 
         return dataset
 
+    @staticmethod
+    def _executor(workers: int) -> Executor:
+        # Воркер Celery - демон, ему нельзя порождать процессы
+        if mp.current_process().daemon:
+            return ThreadPoolExecutor(workers)
+
+        return ProcessPoolExecutor(workers)
+
+    @staticmethod
+    def _log_progress(report: Dict[str, Any], done: int, total: int) -> None:
+        if report["error"]:
+            logger.error(f"[{done}/{total}] {report['path']}: {report['error']}")
+        else:
+            logger.info(f"[{done}/{total}] {report['path']} -> {report['output']}: "
+                        f"{report['rows']} rows in {report['seconds']:.2f}s")
+
+    @classmethod
+    def clear_datasets(cls, paths: Iterable[str | Path], workers: int = None, save: bool = True,
+                       backup: bool = False,
+                       progress: Callable[[Dict[str, Any], int, int], None] = None) -> Dict[str, Any]:
+        """
+        Очистка многих файлов (папки - рекурсивно) в пуле процессов
+
+        Файлы с одним выходным файлом (одинаковые <coin>_<timeframe>.csv из разных
+        запусков) идут одной задачей в исходном порядке - как при последовательном
+        clear_dataset, поэтому результат совпадает с ним. Крупные задачи
+        запускаются первыми. progress(отчет файла, готово, всего) вызывается по
+        мере готовности, по умолчанию - в лог. workers=1 - без пула, в этом процессе.
+
+        Возвращает отчет: files, failed, rows, seconds (по часам), cpu_seconds
+        (сумма по файлам) и results - отчеты файлов (path, output, rows, seconds,
+        error, pid) в исходном порядке. backup - бэкап исходных файлов, если все
+        файлы очищены без ошибок.
+        """
+        files = find_datasets(paths)
+        progress = progress or cls._log_progress
+        start = perf_counter()
+
+        groups: Dict[tuple[str, str], List[str]] = {}
+        for path_dataset in files:
+            groups.setdefault(output_key(path_dataset), []).append(path_dataset)
+
+        tasks = sorted(groups.values(), key=lambda group: sum(os.path.getsize(file) for file in group),
+                       reverse=True)
+
+        workers = min(workers or os.cpu_count() or 1, len(tasks)) if tasks else 1
+        logger.info(f"Clear {len(files)} files ({len(tasks)} outputs) with {workers} workers")
+
+        reports: Dict[str, Dict[str, Any]] = {}
+
+        def collect(task_reports: List[Dict[str, Any]]) -> None:
+            for report in task_reports:
+                reports[report["path"]] = report
+                progress(report, len(reports), len(files))
+
+        if workers == 1:
+            for task in tasks:
+                collect(_clear_files(task, save))
+        else:
+            with cls._executor(workers) as executor:
+                futures = [executor.submit(_clear_files, task, save) for task in tasks]
+
+                for future in as_completed(futures):
+                    collect(future.result())
+
+        results = [reports[path_dataset] for path_dataset in files]
+        failed = sum(1 for report in results if report["error"])
+
+        summary = {
+            "files": len(files),
+            "failed": failed,
+            "rows": sum(report["rows"] or 0 for report in results),
+            "seconds": perf_counter() - start,
+            "cpu_seconds": sum(report["seconds"] for report in results),
+            "results": results,
+        }
+
+        logger.info(f"Cleared {len(files) - failed}/{len(files)} files in {summary['seconds']:.2f}s "
+                    f"(files total {summary['cpu_seconds']:.2f}s)")
+
+        if backup and files and not failed:
+            cls.backup_dataset(files)
+
+        return summary
+
     @classmethod
-    def backup_dataset(cls, paths_dataset: list, backup_dir: str = DataManager()["backup"]) -> None:
+    def backup_dataset(cls, paths_dataset: list, backup_dir: str = data_manager["backup"]) -> None:
         """Создает ZIP-архив с CSV-файлами из указанных путей"""
     
         # Создаем имя архива с временной меткой
@@ -116,4 +278,27 @@ class Handler:
                 logger.error(f"Error backup dataset: {type(e)}-{e}")
                 return None
 
-        return backup_path
\ No newline at end of file
+        return backup_path
+
+
+if __name__ == "__main__":
+    # python -m src.handlers.process_handler data/processed --workers 8
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Очистка CSV датасетов в пуле процессов")
+    parser.add_argument("paths", nargs="+", help="файлы или папки (рекурсивно)")
+    parser.add_argument("--workers", type=int, default=None, help="процессов (по умолчанию - число CPU, 1 - без пула)")
+    parser.add_argument("--no-save", action="store_true", help="не сохранять clear_ файлы")
+    parser.add_argument("--backup", action="store_true", help="бэкап исходных файлов после очистки")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    summary = Handler.clear_datasets(args.paths, workers=args.workers, save=not args.no_save, backup=args.backup)
+
+    for report in sorted(summary["results"], key=lambda report: report["seconds"], reverse=True):
+        status = report["error"] or f"{report['rows']} rows"
+        print(f"{report['seconds']:8.2f}s  {report['path']}  {status}")
+
+    print(f"{summary['files']} files, failed {summary['failed']}, {summary['seconds']:.2f}s "
+          f"(files total {summary['cpu_seconds']:.2f}s)")
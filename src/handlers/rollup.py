@@ -0,0 +1,77 @@
+from typing import Dict, Iterable, Tuple
+import pandas as pd
+
+from src.core.database.orm import CoinQuery
+from src.core.utils.rollup import rollup, tail_start, bucket_start, OHLCV_COLUMNS
+from src.core import data_manager
+
+import logging
+
+logger = logging.getLogger("parser_logger.Rollup")
+
+
+class RollupEngine:
+    """
+    Поддерживает старшие таймфреймы в DataTimeseries по свечам базового
+
+    На каждую порцию новых базовых свечей из БД читается только хвост от
+    начала самой крупной затронутой корзины, пересчитываются корзины,
+    в которые попали новые свечи, и записываются через upsert
+    (незакрытая корзина обновляется, пока не заполнится).
+
+    Базовые свечи пишутся в БД с DO NOTHING, поэтому повторно присланная
+    открытая свеча там остается старой - значения из порции перекрывают БД.
+    """
+
+    def __init__(self, base: str = "5m", timeframes: Iterable[str] = ("15m", "1h", "4h", "1d")) -> None:
+        self.base = base
+        self.timeframes = [timeframe for timeframe in timeframes if timeframe != base]
+
+        self._timeseries: Dict[Tuple[str, str], int] = {}
+
+    async def _timeseries_id(self, coin: str, timeframe: str) -> int:
+        key = (coin, timeframe)
+
+        if key not in self._timeseries:
+            ts = await CoinQuery.get_timeseries_by_coin(coin=coin, timestamp=timeframe)
+
+            if ts:
+                ts = ts[0]
+            else:
+                ts = await CoinQuery.add_timeseries(coin=coin, timestamp=timeframe,
+                                                    path_dataset=str(data_manager.candle_store("processed").path(coin, timeframe)))
+
+            self._timeseries[key] = ts.id
+
+        return self._timeseries[key]
+
+    async def update(self, coin: str, data: pd.DataFrame, base_timeseries_id: int) -> Dict[str, int]:
+        """
+        data - только что записанные базовые свечи, base_timeseries_id - их timeseries
+        Возвращает число записанных свечей по таймфреймам
+        """
+        since = tail_start(data, self.timeframes)
+
+        if since is None or not self.timeframes:
+            return {}
+
+        fresh = data[["datetime", *OHLCV_COLUMNS]].assign(datetime=pd.to_datetime(data["datetime"]))
+        first_new = fresh["datetime"].min()
+
+        base = await CoinQuery.get_data_timeseries_frame(base_timeseries_id, since=since.to_pydatetime())
+        base = pd.concat([base.assign(datetime=pd.to_datetime(base["datetime"])), fresh], ignore_index=True)
+        base = base.drop_duplicates(subset=["datetime"], keep="last")
+
+        result = {}
+        for timeframe in self.timeframes:
+            candles = rollup(base, timeframe, self.base, since=bucket_start(first_new, timeframe))
+
+            if candles.empty:
+                continue
+
+            result[timeframe] = await CoinQuery.add_data_timeseries_bulk(await self._timeseries_id(coin, timeframe),
+                                                                         candles, upsert=True)
+
+        logger.debug(f"Rollup {coin} from {since}: {result}")
+
+        return result
@@ -1,10 +1,11 @@
 __all__ = ("DataParser", "ParserNewsApi", "TelegramParser",
            "ParserApi", "ParserNews", "ParserKucoin", 
-           "KuCoinAPI"
+           "KuCoinAPI", "HttpClient", "HttpClientError", "get_http_client"
            )
 
 from .data import DataParser
 from .api import ParserApi
+from .http_client import HttpClient, HttpClientError, get_http_client
 from .parsers import KuCoinAPI, ParserNewsApi, TelegramParser, ParserKucoin
     
 # from handlers.parser_handler import Handler as HandlerParser
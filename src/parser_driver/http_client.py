@@ -0,0 +1,81 @@
+import asyncio
+from typing import Any, Dict
+import aiohttp
+
+import logging
+
+logger = logging.getLogger("parser_logger.HttpClient")
+
+
+class HttpClientError(Exception):
+    """Ответ API с кодом, отличным от 200"""
+
+    def __init__(self, url: str, status: int, reason: str | None = None) -> None:
+        super().__init__(f"Error GET {url} {status} {reason}")
+        self.url = url
+        self.status = status
+        self.reason = reason
+
+
+class HttpClient:
+    """
+    Общий для API-парсеров пул HTTP соединений
+
+    Одна ClientSession на event loop: keep-alive, кэш DNS, лимиты соединений
+    (всего и на хост) и таймауты. Celery запускает задачу в новом loop,
+    поэтому сессия пересоздается, если loop сменился.
+    """
+
+    def __init__(self, limit: int = 100, limit_per_host: int = 10,
+                 total_timeout: float = 30, connect_timeout: float = 10,
+                 keepalive_timeout: float = 60, ttl_dns_cache: int = 300) -> None:
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.timeout = aiohttp.ClientTimeout(total=total_timeout, connect=connect_timeout)
+        self.keepalive_timeout = keepalive_timeout
+        self.ttl_dns_cache = ttl_dns_cache
+
+        self._session: aiohttp.ClientSession | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def get_session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+
+        if self._session is None or self._session.closed or self._loop is not loop:
+            connector = aiohttp.TCPConnector(limit=self.limit,
+                                             limit_per_host=self.limit_per_host,
+                                             keepalive_timeout=self.keepalive_timeout,
+                                             ttl_dns_cache=self.ttl_dns_cache)
+
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+            self._loop = loop
+
+            logger.debug(f"HTTP session created, limit={self.limit}, limit_per_host={self.limit_per_host}")
+
+        return self._session
+
+    async def get_json(self, url: str, params: Dict[str, Any] = None,
+                       headers: Dict[str, str] = None) -> Any:
+        async with self.get_session().get(url, params=params, headers=headers) as response:
+            if response.status != 200:
+                raise HttpClientError(url, response.status, response.reason)
+
+            return await response.json()
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed and self._loop is asyncio.get_running_loop():
+            await self._session.close()
+
+        self._session = None
+        self._loop = None
+
+
+_http_client: HttpClient | None = None
+
+def get_http_client() -> HttpClient:
+    global _http_client
+
+    if _http_client is None:
+        _http_client = HttpClient()
+
+    return _http_client
@@ -0,0 +1,201 @@
+import asyncio
+import json
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable
+from uuid import uuid4
+
+import websockets
+from kucoin.ws_token.token import GetToken
+
+from src.core.utils.kline_decoder import (KlineBatch, decode_kline, to_kucoin_kline_type,
+                                          SPOT_KLINE_COLUMNS)
+
+import logging
+
+logger = logging.getLogger("parser_logger.KuCoinStream")
+
+CANDLE_TOPIC = "/market/candles"
+CANDLE_SUBJECT = "trade.candles.update"
+
+
+class KuCoinWsConnection:
+    """
+    Websocket соединение KuCoin, которым владеет стрим
+
+    Держит сокет, задачу чтения и задачу ping и закрывает их в close().
+    Само не переподключается - разрыв замечает KuCoinCandleStream.is_stale
+    и делает reconnect() с новым соединением. create() совместим с
+    ws_factory (сигнатура KucoinWsClient.create).
+    """
+
+    def __init__(self, socket, callback: Callable[[Dict[str, Any]], Awaitable[None]],
+                 ping_interval: float, private: bool = False) -> None:
+        self.socket = socket
+        self.callback = callback
+        self.ping_interval = ping_interval
+        self.private = private
+
+        self.reader = asyncio.create_task(self._read())
+        self.keepalive = asyncio.create_task(self._ping())
+
+    @classmethod
+    async def connect(cls, url: str, callback: Callable[[Dict[str, Any]], Awaitable[None]],
+                      ping_interval: float = 18, private: bool = False) -> "KuCoinWsConnection":
+        return cls(await websockets.connect(url), callback, ping_interval, private)
+
+    @classmethod
+    async def create(cls, loop: asyncio.AbstractEventLoop = None, client: Any = None,
+                     callback: Callable[[Dict[str, Any]], Awaitable[None]] = None,
+                     private: bool = False) -> "KuCoinWsConnection":
+        """Токен через REST (client с get_ws_token, по умолчанию публичный GetToken) и подключение"""
+        details = await asyncio.to_thread((client or GetToken()).get_ws_token, private)
+        server = details["instanceServers"][0]
+
+        url = f"{server['endpoint']}?token={details['token']}&connectId={uuid4().hex}"
+
+        return await cls.connect(url, callback, server["pingInterval"] / 1000, private)
+
+    async def _read(self) -> None:
+        try:
+            async for raw in self.socket:
+                message = json.loads(raw)
+
+                # welcome, ack и pong без data
+                if "data" in message:
+                    await self.callback(message)
+        except websockets.ConnectionClosed as e:
+            logger.warning(f"Candle websocket closed - {e}")
+
+    async def _ping(self) -> None:
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            await self.send({"type": "ping"})
+
+    async def send(self, message: Dict[str, Any]) -> None:
+        await self.socket.send(json.dumps({"id": uuid4().hex, **message}))
+
+    async def subscribe(self, topic: str) -> None:
+        await self.send({"type": "subscribe", "topic": topic, "privateChannel": self.private, "response": True})
+
+    async def unsubscribe(self, topic: str) -> None:
+        await self.send({"type": "unsubscribe", "topic": topic, "privateChannel": self.private, "response": True})
+
+    @property
+    def closed(self) -> bool:
+        return self.reader.done() and self.keepalive.done()
+
+    async def close(self) -> None:
+        """Остановить чтение и ping и закрыть сокет; повторный вызов ничего не делает"""
+        for task in (self.reader, self.keepalive):
+            task.cancel()
+
+        await asyncio.gather(self.reader, self.keepalive, return_exceptions=True)
+        await self.socket.close()
+
+
+class KuCoinCandleStream:
+    """
+    Подписка на свечи KuCoin (spot) через KuCoinWsConnection
+
+    Каждое обновление свечи декодируется в KlineBatch из одной строки и
+    передается в on_candle(coin, batch). Отсутствие сообщений дольше
+    stale_timeout считается разрывом соединения - тогда вызывающая сторона
+    делает reconnect() и догружает пропуск через REST.
+    """
+
+    max_topics = 100  # Монет в одной подписке
+
+    def __init__(self, on_candle: Callable[[str, KlineBatch], Awaitable[None]],
+                 currency: str = "USDT", time: str = "5m",
+                 stale_timeout: float = 60, ws_factory: Callable[..., Awaitable[Any]] = None) -> None:
+        self.on_candle = on_candle
+        self.currency = currency
+        self.kline_type = to_kucoin_kline_type(time)
+        self.stale_timeout = stale_timeout
+        self.ws_factory = ws_factory or KuCoinWsConnection.create
+
+        self.ws_client = None
+        self.coins: list[str] = []
+        self.last_message = 0.0
+        self.reconnects = 0
+
+    def topics(self, coins: Iterable[str]) -> list[str]:
+        coins = list(coins)
+        return [
+            f"{CANDLE_TOPIC}:" + ",".join(f"{coin}-{self.currency}_{self.kline_type}"
+                                          for coin in coins[i:i + self.max_topics])
+            for i in range(0, len(coins), self.max_topics)
+        ]
+
+    def parse_message(self, message: Dict[str, Any]) -> tuple[str, KlineBatch] | None:
+        if message.get("subject") != CANDLE_SUBJECT:
+            return None
+
+        data = message.get("data") or {}
+        symbol = data.get("symbol", "")
+        suffix = f"-{self.currency}"
+
+        if not symbol.endswith(suffix) or not data.get("candles"):
+            return None
+
+        return symbol[:-len(suffix)], decode_kline([data["candles"]], SPOT_KLINE_COLUMNS)
+
+    async def handle_message(self, message: Dict[str, Any]) -> None:
+        self.last_message = time.monotonic()
+
+        try:
+            candle = self.parse_message(message)
+            if candle is not None:
+                await self.on_candle(*candle)
+        except Exception as e:
+            logger.error(f"Error handling candle message {message.get('topic')} - {e}")
+
+    async def connect(self, coins: Iterable[str]) -> None:
+        self.coins = [coin for coin in coins if "FUTURE" not in coin]
+
+        ws_client = None
+
+        async def callback(message: Dict[str, Any]) -> None:
+            # Сообщения клиента, который уже закрыт, не обрабатываем
+            if ws_client is not None and ws_client is self.ws_client:
+                await self.handle_message(message)
+
+        ws_client = self.ws_client = await self.ws_factory(
+            loop=asyncio.get_running_loop(),
+            client=None,  # Публичный токен без ключей API
+            callback=callback,
+            private=False
+        )
+
+        for topic in self.topics(self.coins):
+            await self.ws_client.subscribe(topic)
+
+        self.last_message = time.monotonic()
+        logger.info(f"Subscribed to candles {self.kline_type} for {len(self.coins)} coins")
+
+    async def close(self) -> None:
+        if self.ws_client is None:
+            return
+
+        for topic in self.topics(self.coins):
+            try:
+                await self.ws_client.unsubscribe(topic)
+            except Exception as e:
+                logger.warning(f"Error unsubscribing from {topic} - {e}")
+
+        ws_client, self.ws_client = self.ws_client, None
+
+        try:
+            await ws_client.close()
+        except Exception as e:
+            logger.warning(f"Error closing candle websocket - {e}")
+
+    async def reconnect(self) -> None:
+        self.reconnects += 1
+        logger.warning(f"Candle stream is stale, reconnecting (#{self.reconnects})")
+
+        await self.close()
+        await self.connect(self.coins)
+
+    def is_stale(self) -> bool:
+        return time.monotonic() - self.last_message > self.stale_timeout
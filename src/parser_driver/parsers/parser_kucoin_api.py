@@ -7,6 +7,11 @@ import asyncio
 from src.parser_driver.api import ParserApi
 from src.core import settings_parser
 from src.core.models.dataset import DatasetTimeseries
+from src.core.database.orm import CoinQuery
+from src.core.utils.kline_decoder import (KlineBatch, decode_kline, to_kucoin_kline_type, datetime_to_epoch,
+                                          SPOT_KLINE_COLUMNS, FUTURES_KLINE_COLUMNS)
+from src.core.utils.rate_limiter import get_kucoin_rate_limiter
+from src.core.utils.adaptive_limiter import AdaptiveConcurrencyLimiter
 
 import logging
 
@@ -48,7 +53,13 @@ class KuCoinAPI(ParserApi):
 
     logger = logging.getLogger("parser_logger.KuCoinAPI")
 
-    max_concurrent = 100  # Максимальное количество одновременных запросов
+    max_concurrent = 500  # Верхняя граница адаптивного лимита одновременных запросов
+
+    # Лимит подстраивается по задержке и 429/таймаутам, общий для всех вызовов процесса
+    limiter = AdaptiveConcurrencyLimiter("kucoin_api", initial_limit=20, max_limit=max_concurrent)
+
+    max_candles_spot = 1500  # Максимум свечей в одном ответе spot kline
+    max_candles_futures = 500  # Максимум свечей в одном ответе futures kline
 
     def get_account_summary_info(self):
         return self.user.get_account_summary_info()
@@ -75,39 +86,164 @@ class KuCoinAPI(ParserApi):
             "makerCoefficient": "1" // Maker Fee Coefficient
         }
         """
+        get_kucoin_rate_limiter().acquire_sync("stats_24hr")
         return cls.market.get_24hr_stats(f"{symbol}-{currency}")
     
     @classmethod
     def get_orders_market(cls, symbol: str, currency: str = "USDT"):
+        get_kucoin_rate_limiter().acquire_sync("order_book")
         return cls.market.get_order_book(f"{symbol}-{currency}")
 
+    @staticmethod
+    def timeframe_minutes(time: str | int) -> int:
+        if isinstance(time, str):
+            return time_in_int[time.lower()] if time.lower() in time_in_int else int(time)
+        
+        return int(time)
+
+    @classmethod
+    def kline_windows(cls, start: datetime, end: datetime, time: str | int,
+                      max_candles: int) -> list[tuple[int, int]]:
+        """
+        Разбить диапазон [start, end] на окна startAt/endAt (epoch в секундах),
+        каждое не больше max_candles свечей
+        """
+        step = cls.timeframe_minutes(time) * 60 * max_candles
+        start_at, end_at = datetime_to_epoch(start), datetime_to_epoch(end)
+
+        return [(t, min(t + step, end_at)) for t in range(start_at, end_at, step)]
+
+    @staticmethod
+    def kline_columns(symbol: str) -> tuple[str, ...]:
+        return FUTURES_KLINE_COLUMNS if "FUTURE" in symbol else SPOT_KLINE_COLUMNS
+
+    @classmethod
+    async def async_request_kline(cls, symbol: str, currency: str, time: str | int,
+                                  start_at: int = None, end_at: int = None) -> list:
+        """Один запрос kline, сырые строки. Без окна - последние свечи по умолчанию"""
+        if "FUTURE" in symbol:
+            window = {} if start_at is None else {"begin_t": start_at * 1000, "end_t": end_at * 1000}
+
+            await get_kucoin_rate_limiter().acquire("futures_kline")
+            return await cls.market.async_get_kline_future(symbol.replace("FUTURE_", ""),
+                                                           cls.timeframe_minutes(time), **window)
+
+        window = {} if start_at is None else {"startAt": start_at, "endAt": end_at}
+
+        await get_kucoin_rate_limiter().acquire("spot_kline")
+        return await cls.market.async_get_kline(f"{symbol}-{currency}", to_kucoin_kline_type(time), **window)
+
+    @classmethod
+    async def async_fetch_kline_range(cls, symbol: str, currency: str, time: str | int,
+                                      start_at: int, end_at: int) -> KlineBatch:
+        """Загрузить одно окно свечей [start_at, end_at]"""
+        data = await cls.async_request_kline(symbol, currency, time, start_at, end_at)
+        return decode_kline(data, cls.kline_columns(symbol))
+
+    @classmethod
+    async def async_fetch_kline_payloads(cls, symbol: str, last_datetime: datetime | None,
+                                         limiter: AdaptiveConcurrencyLimiter = None,
+                                         currency: str = "USDT",
+                                         time: str | int = "5m") -> list[list]:
+        """
+        Сырые ответы kline монеты без декодирования (стадия загрузки)
+
+        Без last_datetime - один запрос последних свечей, иначе разрыв режется
+        на окна, окна грузятся параллельно под общим лимитом. Если окно упало,
+        возвращаются только окна до него, чтобы high-water mark не перескочил
+        через дыру и следующий запуск догрузил ее.
+        """
+        limiter = limiter or cls.limiter
+
+        if last_datetime is None:
+            async with limiter.slot():
+                return [await cls.async_request_kline(symbol, currency, time)]
+
+        max_candles = cls.max_candles_futures if "FUTURE" in symbol else cls.max_candles_spot
+        windows = cls.kline_windows(last_datetime, datetime.now(), time, max_candles)
+
+        async def fetch_window(start_at, end_at):
+            async with limiter.slot():
+                return await cls.async_request_kline(symbol, currency, time, start_at, end_at)
+
+        results = await asyncio.gather(*[fetch_window(*window) for window in windows], 
+                                       return_exceptions=True)
+
+        payloads = []
+        for window, result in zip(windows, results):
+            if isinstance(result, Exception):
+                cls.logger.error(f"Error backfill kline {symbol}-{currency} window {window} - {result}")
+                break
+
+            payloads.append(result)
+
+        return payloads
+
+    @classmethod
+    def decode_kline_payloads(cls, symbol: str, payloads: list[list],
+                              last_datetime: datetime | None = None,
+                              time: str | int = "5m") -> DatasetTimeseries | None:
+        """Сырые ответы kline -> DatasetTimeseries со свечами от last_datetime (стадия декодирования)"""
+        columns = cls.kline_columns(symbol)
+        batch = KlineBatch.concat([decode_kline(data, columns) for data in payloads]).since(last_datetime)
+
+        if len(batch) == 0:
+            return None
+
+        day = "day" in to_kucoin_kline_type(str(time)) or "week" in to_kucoin_kline_type(str(time))
+
+        return DatasetTimeseries(batch.to_frame(day=day))
+
+    @classmethod
+    async def async_backfill_kline(cls, symbol: str, last_datetime: datetime,
+                                   limiter: AdaptiveConcurrencyLimiter = None,
+                                   currency: str = "USDT",
+                                   time: str | int = "5m") -> tuple[str, DatasetTimeseries] | None:
+        """Догрузить свечи монеты начиная с last_datetime"""
+        payloads = await cls.async_fetch_kline_payloads(symbol, last_datetime, limiter, currency, time)
+        dataset = cls.decode_kline_payloads(symbol, payloads, last_datetime, time)
+
+        if dataset is None:
+            cls.logger.error(f"Error backfill kline {symbol}-{currency} - empty")
+            return None
+
+        return symbol, dataset
+
+    @classmethod
+    async def load_kline_cursors(cls, time: str | int) -> dict[str, datetime]:
+        try:
+            return await CoinQuery.get_kline_cursors(str(time))
+        except Exception as e:
+            cls.logger.error(f"Error load kline cursors {time} - {e}")
+            return {}
+
     @classmethod
     async def async_parsed_coins(cls, coins_last_datetime: dict[str, datetime],
                                  currency: str = "USDT",
                                 time: str | int = "5m") -> dict[str, DatasetTimeseries | None]:
 
-        semaphore = asyncio.Semaphore(cls.max_concurrent)
+        # Монеты без буфера продолжают с сохраненного high-water mark (рестарт воркера)
+        cursors = {}
+        if any(dt is None for dt in coins_last_datetime.values()):
+            cursors = await cls.load_kline_cursors(time)
         
         async def fetch(symbol, last_dt, time):
-            async with semaphore:
-                try:
-                    if "FUTURE" in symbol:
-
-                        if isinstance(time, str):
-                            time = time_in_int[time]
-                        else:
-                            time = int(time)
-
-                        result = await cls.get_kline_futures(symbol, time, last_dt)
-                    else:
-                        result = await cls.get_kline(symbol, currency, time, last_dt)
-                except Exception as e:
-                    cls.logger.error(f"Error get kline {symbol}-{currency} - {e}")
-                    result = None
-                return result
+            last_dt = last_dt if last_dt is not None else cursors.get(symbol)
+
+            try:
+                if last_dt is not None:
+                    return await cls.async_backfill_kline(symbol, last_dt, cls.limiter, currency, time)
+
+                # Ошибки запроса должны дойти до лимитера (429/таймаут), поэтому не get_kline
+                payloads = await cls.async_fetch_kline_payloads(symbol, None, cls.limiter, currency, time)
+                dataset = cls.decode_kline_payloads(symbol, payloads, None, time)
+
+                result = (symbol, dataset) if dataset is not None else None
+            except Exception as e:
+                cls.logger.error(f"Error get kline {symbol}-{currency} - {e}")
+                result = None
+            return result
         
-            # tasks = [fetch(session, sym, dt) for sym, dt in coins_last_datetime.items()]
-        # async with aiohttp.ClientSession() as session:    
         results = await asyncio.gather(*[fetch(sym, dt, time) for sym, dt in coins_last_datetime.items()], return_exceptions=True)
             
         return results
@@ -120,44 +256,24 @@ class KuCoinAPI(ParserApi):
 
         # cls.logger.info(f"Get coin: {symbol} time: {time=} last_datetime: {last_datetime=}")
         
-        if time[-1] == "m":
-            time = time.replace("m", "min")
-        elif time[-1] == "H":
-            time = time.replace("H", "hour")
-        elif time[-1] == "D":
-            time = time.replace("D", "day")
-        elif time[-1] == "W":
-            time = time.replace("W", "week")
+        time = to_kucoin_kline_type(time)
 
         try:
+            await get_kucoin_rate_limiter().acquire("spot_kline")
             data = await cls.market.async_get_kline(f"{symbol}-{currency}", time)
         except Exception as e:
             cls.logger.error(f"Error get kline {symbol}-{currency} - {e}")
             return None
 
-        colums = ["datetime", "open", "close", "max", "min", "_", "volume"]
-
-        df = pd.DataFrame(data, columns=colums).drop("_", axis=1)
+        batch = decode_kline(data, SPOT_KLINE_COLUMNS)
 
-        if len(df) == 0:
-            cls.logger.error(f"Error get kline {symbol}-{currency} - {len(df)=}")
+        if len(batch) == 0:
+            cls.logger.error(f"Error get kline {symbol}-{currency} - {len(batch)=}")
             return None
 
-        df["datetime"] = df["datetime"].apply(formating_datetime)
-        
-        df["datetime"] = pd.to_datetime(df['datetime'])
-
-        if last_datetime is not None:
-            df = df[df["datetime"] >= last_datetime]
-
-        if "day" in time or "week" in time:
-            df["datetime"] = df["datetime"].dt.strftime('%Y-%m-%d')
-        else:
-            df["datetime"] = df["datetime"].dt.strftime('%Y-%m-%d %H:%M:%S')
+        batch = batch.since(last_datetime)
 
-        df["volume"] = df["volume"].apply(float)
-
-        df = DatasetTimeseries(df)
+        df = DatasetTimeseries(batch.to_frame(day="day" in time or "week" in time))
 
         return symbol, df
 
@@ -166,6 +282,7 @@ class KuCoinAPI(ParserApi):
                              time: int = 1,
                              last_datetime: datetime = None) -> DatasetTimeseries | None:
         try:
+            await get_kucoin_rate_limiter().acquire("futures_kline")
             data = await cls.market.async_get_kline_future(symbol.replace("FUTURE_", ""), time)
         except Exception as e:
             cls.logger.error(f"Error get kline futures {symbol} - {e}")
@@ -173,26 +290,15 @@ class KuCoinAPI(ParserApi):
 
         # cls.logger.info(f"Get kline futures {symbol} - {data=}")
 
-        colums = ["datetime", "open", "max", "min", "close", "_", "volume"]
-
-        df = pd.DataFrame(data, columns=colums).drop("_", axis=1)
+        batch = decode_kline(data, FUTURES_KLINE_COLUMNS)
 
-        if len(df) == 0:
-            cls.logger.error(f"Error get kline {symbol} - {len(df)=}")
+        if len(batch) == 0:
+            cls.logger.error(f"Error get kline {symbol} - {len(batch)=}")
             return None
 
-        df["datetime"] = df["datetime"].apply(formating_datetime)
-        
-        df["datetime"] = pd.to_datetime(df['datetime'])
-
-        if last_datetime is not None:
-            df = df[df["datetime"] >= last_datetime]
-
-        df["datetime"] = df["datetime"].dt.strftime('%Y-%m-%d %H:%M:%S')
-
-        df["volume"] = df["volume"].apply(float)
+        batch = batch.since(last_datetime)
 
-        df = DatasetTimeseries(df)
+        df = DatasetTimeseries(batch.to_frame())
 
         return symbol, df
 
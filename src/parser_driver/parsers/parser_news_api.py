@@ -1,9 +1,10 @@
 import asyncio
-import aiohttp
 import time
+import aiohttp
 from datetime import datetime 
 
 from src.parser_driver.api import ParserApi
+from src.parser_driver.http_client import get_http_client, HttpClientError
 from src.core.database.orm import NewsData, NewsQuery
 from src.core.settings import settings_parser 
 
@@ -27,17 +28,10 @@ class ParserNewsApi(ParserApi):
                             last_publish: datetime = None) -> list[NewsData] | None:
 
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f"{self.URL_API}/news/v1/article/list",
-                                        params={"lang":"EN","limit":limit,"api_key": self.api_key},
-                                        headers={"Content-type":"application/json; charset=UTF-8"}) as response:
-                    
-                    if response.status != 200:
-                        raise Exception(f"Error get_last_news {response.status} {response}")
-                    
-                    json_response = await response.json()
-
-        except Exception as e:
+            json_response = await get_http_client().get_json(f"{self.URL_API}/news/v1/article/list",
+                                                             params={"lang":"EN","limit":limit,"api_key": self.api_key},
+                                                             headers={"Content-type":"application/json; charset=UTF-8"})
+        except (HttpClientError, aiohttp.ClientError, asyncio.TimeoutError) as e:
             logger.error(f"Error get_last_news {e}")
             return None
         
@@ -58,7 +52,9 @@ class ParserNewsApi(ParserApi):
 
             news_list.append(news)
 
-            if self.db:
-                await NewsQuery.add_news(news)
+        # Вся страница одной транзакцией, уже сохраненные id_url пропускаются
+        if self.db and news_list:
+            inserted = await NewsQuery.add_news_batch(news_list)
+            logger.debug(f"News inserted: {inserted}/{len(news_list)}")
 
         return news_list
\ No newline at end of file
@@ -0,0 +1,23 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Как PYTHONPATH в Makefile: корень проекта и src
+ROOT = Path(__file__).resolve().parent.parent
+
+for path in (ROOT, ROOT / "src"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+
+@pytest.fixture(autouse=True)
+def catalog(tmp_path_factory, monkeypatch):
+    """Каталог датасетов в отдельной временной папке: save_dataset и create_launch_dir пишут в него, не в src/data/cached"""
+    from src.core import data_manager
+    from src.core.dataset_catalog import DatasetCatalog
+
+    root = tmp_path_factory.mktemp("catalog")
+    catalog = DatasetCatalog(root / "catalog.sqlite", root)
+    monkeypatch.setitem(data_manager.__dict__, "catalog", catalog)
+    return catalog
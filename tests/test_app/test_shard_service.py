@@ -0,0 +1,104 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.app.services import shard_service
+from src.app.services.shard_service import SHARDED_STATUS, TASK_PARAMS, ShardedParsingService
+
+COINS = [f"COIN{i}-USDT" for i in range(400)]
+
+
+@pytest.fixture
+def calls(monkeypatch) -> SimpleNamespace:
+    """Фейковые Celery и TaskQuery: шарды получают task_id по порядку запуска"""
+    calls = SimpleNamespace(started=[], stopped=[], coins=None)
+
+    async def start_shard(params, coins, launch_dir=None):
+        calls.started.append((coins, launch_dir))
+        return f"task-{len(calls.started)}"
+
+    async def stop_shard(task_id, message):
+        calls.stopped.append(task_id)
+
+    async def update_parsing_task_coins(task_id, coins):
+        calls.coins = coins
+
+    async def update_parsing_task_status(task_id, status, result=None, **kwargs):
+        return SimpleNamespace(task_id=task_id, status=status, result=result)
+
+    monkeypatch.setattr(ShardedParsingService, "_start_shard", staticmethod(start_shard))
+    monkeypatch.setattr(ShardedParsingService, "_stop_shard", staticmethod(stop_shard))
+    monkeypatch.setattr(shard_service.TaskQuery, "update_parsing_task_coins", staticmethod(update_parsing_task_coins))
+    monkeypatch.setattr(shard_service.TaskQuery, "update_parsing_task_status", staticmethod(update_parsing_task_status))
+    return calls
+
+
+def sharded_parent(coins: list, shards: int) -> SimpleNamespace:
+    shard_map = {name: {"task_id": f"old-{name}", "coins": shard_coins}
+                 for name, shard_coins in ShardedParsingService.partition(coins, shards).items() if shard_coins}
+
+    return SimpleNamespace(task_id="sharded-1", coins=coins, **{name: None for name in TASK_PARAMS},
+                           result={"shards": shard_map, "shard_count": shards, "launch_dir": "launch_parser_1"})
+
+
+def test_partition_is_deterministic_and_complete():
+    partition = ShardedParsingService.partition(COINS, 4)
+
+    assert list(partition) == ShardedParsingService.shard_names(4)
+    assert partition == ShardedParsingService.partition(list(COINS), 4)
+    assert sorted(coin for coins in partition.values() for coin in coins) == sorted(COINS)
+
+    # Шард монеты не зависит от остальных монет в списке
+    assert ShardedParsingService.partition(COINS[:10], 4) == \
+           {name: [coin for coin in coins if coin in COINS[:10]] for name, coins in partition.items()}
+
+
+def test_adding_shard_moves_about_one_nth():
+    before = {coin: name for name, coins in ShardedParsingService.partition(COINS, 4).items() for coin in coins}
+    after = {coin: name for name, coins in ShardedParsingService.partition(COINS, 5).items() for coin in coins}
+
+    moved = [coin for coin in COINS if before[coin] != after[coin]]
+
+    assert {after[coin] for coin in moved} == {"shard-4"}
+    assert len(moved) / len(COINS) == pytest.approx(1 / 5, abs=0.08)
+
+
+def test_add_coin_restarts_only_its_shard(calls):
+    parent = sharded_parent(COINS[:100], 4)
+    old_map = {name: dict(shard) for name, shard in parent.result["shards"].items()}
+
+    task = asyncio.run(ShardedParsingService.add_coins(parent, [COINS[0], "NEW-USDT"]))
+
+    target, = [name for name, coins in ShardedParsingService.partition(["NEW-USDT"], 4).items() if coins]
+
+    assert calls.stopped == [f"old-{target}"]
+    (coins, launch_dir), = calls.started
+    assert sorted(coins) == sorted(old_map[target]["coins"] + ["NEW-USDT"])
+    assert launch_dir == "launch_parser_1"
+    assert calls.coins == COINS[:100] + ["NEW-USDT"]
+
+    shards = task.result["shards"]
+    assert task.status == SHARDED_STATUS and shards[target]["task_id"] == "task-1"
+    assert all(shards[name] == shard for name, shard in old_map.items() if name != target)
+
+
+def test_add_shard_restarts_shards_that_gave_coins(calls):
+    parent = sharded_parent(COINS, 4)
+    old_map = {name: list(shard["coins"]) for name, shard in parent.result["shards"].items()}
+
+    task = asyncio.run(ShardedParsingService.add_coins(parent, [], shards=5))
+    shards = task.result["shards"]
+
+    assert task.result["shard_count"] == 5
+    assert sorted(coin for shard in shards.values() for coin in shard["coins"]) == sorted(COINS)
+
+    # Новый шард забрал монеты у старых, остальные монеты остались на месте
+    assert set(shards) == set(ShardedParsingService.shard_names(5))
+    assert all(set(shards[name]["coins"]) <= set(coins) for name, coins in old_map.items())
+    assert len(shards["shard-4"]["coins"]) == sum(len(coins) - len(shards[name]["coins"])
+                                                   for name, coins in old_map.items())
+
+    changed = [name for name, coins in old_map.items() if shards[name]["coins"] != coins]
+    assert sorted(calls.stopped) == sorted(f"old-{name}" for name in changed)
+    assert len(calls.started) == len(changed) + 1
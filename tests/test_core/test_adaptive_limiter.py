@@ -0,0 +1,101 @@
+import asyncio
+import time
+
+import pytest
+
+from src.core.utils.adaptive_limiter import AdaptiveConcurrencyLimiter, is_overload_error
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int) -> None:
+        super().__init__(f"status {status}")
+        self.status = status
+
+
+@pytest.mark.parametrize("error, overload", [(asyncio.TimeoutError(), True), (HTTPError(429), True),
+                                             (HTTPError(503), True), (Exception("429 Too Many Requests"), True),
+                                             (HTTPError(404), False), (ValueError("bad json"), False)])
+def test_is_overload_error(error, overload):
+    assert is_overload_error(error) is overload
+
+
+def test_limit_grows_at_baseline_latency_and_shrinks_when_latency_grows():
+    limiter = AdaptiveConcurrencyLimiter(name="test_grow", initial_limit=10, max_limit=100)
+
+    for _ in range(50):
+        limiter.on_success(0.05, inflight=limiter.current_limit)
+    grown = limiter.limit
+    assert grown > 10
+
+    for _ in range(50):
+        limiter.on_success(0.5, inflight=limiter.current_limit)
+    assert limiter.limit < grown
+
+
+def test_limit_is_kept_when_not_used():
+    limiter = AdaptiveConcurrencyLimiter(name="test_idle", initial_limit=40)
+
+    for _ in range(20):
+        limiter.on_success(0.05, inflight=1)
+
+    assert limiter.limit == 40
+
+
+def test_overload_backs_off_once_per_generation():
+    limiter = AdaptiveConcurrencyLimiter(name="test_backoff", initial_limit=100, backoff=0.5)
+
+    started = time.monotonic()
+    limiter.on_overload(started)
+    limiter.on_overload(started)  # Запрос того же поколения - лимит уже уменьшен
+    assert limiter.limit == 50
+
+    limiter.on_overload(time.monotonic())
+    assert limiter.limit == 25
+
+
+def test_limit_bounds():
+    limiter = AdaptiveConcurrencyLimiter(name="test_bounds", initial_limit=2, min_limit=2, max_limit=3)
+
+    for _ in range(10):
+        limiter.on_overload(time.monotonic())
+    assert limiter.current_limit == 2
+
+    for _ in range(100):
+        limiter.on_success(0.01, inflight=3)
+    assert limiter.current_limit == 3
+
+
+def test_slot_caps_concurrency_and_reports_errors():
+    limiter = AdaptiveConcurrencyLimiter(name="test_slot", initial_limit=3, max_limit=3)
+    peak = 0
+
+    async def request(fail: bool):
+        nonlocal peak
+        async with limiter.slot():
+            peak = max(peak, limiter.inflight)
+            await asyncio.sleep(0.01)
+            if fail:
+                raise HTTPError(429)
+
+    async def scenario():
+        results = await asyncio.gather(*[request(i % 10 == 0) for i in range(40)], return_exceptions=True)
+        return sum(isinstance(result, HTTPError) for result in results)
+
+    assert asyncio.run(scenario()) == 4
+    assert peak <= 3
+    assert limiter.inflight == 0
+    assert len(limiter.latencies) == 36
+    assert set(limiter.percentiles()) == {0.5, 0.9, 0.99}
+
+
+def test_slot_works_across_event_loops():
+    limiter = AdaptiveConcurrencyLimiter(name="test_loops", initial_limit=2)
+
+    async def scenario():
+        async with limiter.slot():
+            await asyncio.sleep(0)
+
+    asyncio.run(scenario())
+    asyncio.run(scenario())
+
+    assert limiter.inflight == 0
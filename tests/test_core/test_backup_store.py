@@ -0,0 +1,114 @@
+import os
+import zlib
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src.core.backup_store import BackupStore, chunk_boundaries
+
+
+def random_bytes(size: int, seed: int = 0) -> bytes:
+    return np.random.default_rng(seed).integers(0, 256, size, dtype=np.uint8).tobytes()
+
+
+def chunks(data: bytes, **kwargs) -> list:
+    start, result = 0, []
+    for end in chunk_boundaries(data, **kwargs):
+        result.append(data[start:end])
+        start = end
+    return result
+
+
+def test_chunk_boundaries_cover_data_within_limits():
+    data = random_bytes(2**20)
+
+    parts = chunks(data, mask_bits=12, min_size=2**10, max_size=2**14)
+
+    assert b"".join(parts) == data
+    assert all(len(part) <= 2**14 for part in parts)
+    assert all(len(part) >= 2**10 for part in parts[:-1])
+    assert chunk_boundaries(b"") == [] and chunk_boundaries(b"abc") == [3]
+
+
+def test_insert_at_start_keeps_later_chunks():
+    data = random_bytes(2**20)
+    kwargs = dict(mask_bits=12, min_size=2**10, max_size=2**16)
+
+    before = set(chunks(data, **kwargs))
+    after = chunks(random_bytes(5000, seed=1) + data, **kwargs)
+
+    assert sum(part in before for part in after) >= len(after) - 2
+
+
+def make_store(tmp_path: Path) -> tuple[BackupStore, Path]:
+    data_dir = tmp_path / "data"
+    (data_dir / "raw").mkdir(parents=True)
+    (data_dir / "processed").mkdir()
+
+    (data_dir / "raw" / "a.csv").write_bytes(random_bytes(200_000, seed=2))
+    (data_dir / "processed" / "b.csv").write_bytes(random_bytes(50_000, seed=3))
+
+    return BackupStore(tmp_path / "backup", data_dir, workers=1, mask_bits=12, min_chunk=2**10), data_dir
+
+
+def test_backup_and_restore_round_trip(tmp_path):
+    store, data_dir = make_store(tmp_path)
+
+    manifest = store.backup([data_dir])
+    restored = store.restore(manifest, target=tmp_path / "restore")
+
+    assert sorted(path.relative_to(tmp_path / "restore").as_posix() for path in restored) == \
+        ["processed/b.csv", "raw/a.csv"]
+    for path in restored:
+        original = data_dir / path.relative_to(tmp_path / "restore")
+        assert path.read_bytes() == original.read_bytes()
+        assert path.stat().st_mtime == original.stat().st_mtime
+
+    assert len(store.restore(manifest, target=tmp_path / "prefix", prefix="raw")) == 1
+
+
+def test_incremental_backup_reads_only_changed_files(tmp_path):
+    store, data_dir = make_store(tmp_path)
+    first = store.backup([data_dir])
+
+    changed = data_dir / "raw" / "a.csv"
+    original = changed.read_bytes()
+    changed.write_bytes(b"new,row\n" + original)
+
+    second = store.backup([data_dir])
+    stats = store.load_manifest(second)["stats"]
+
+    assert stats["files"] == 2 and stats["files_changed"] == 1
+    assert stats["chunks_new"] < stats["chunks"]
+    assert store.load_manifest(second)["parent"] == first.stem
+
+    # Восстановление первой версии по имени манифеста
+    restored = store.restore(first, target=tmp_path / "old", prefix="raw")
+    assert restored[0].read_bytes() == original
+
+
+def test_prune_removes_unreferenced_chunks(tmp_path):
+    store, data_dir = make_store(tmp_path)
+    store.backup([data_dir])
+
+    (data_dir / "raw" / "a.csv").write_bytes(random_bytes(200_000, seed=4))
+    os.utime(data_dir / "raw" / "a.csv", (1, 1))
+    latest = store.backup([data_dir])
+
+    stats = store.prune(keep=1)
+
+    assert stats["manifests_removed"] == 1 and stats["chunks_removed"] > 0
+    assert store.manifests() == [latest]
+    assert len(store.restore(latest, target=tmp_path / "restore")) == 2
+
+
+def test_corrupted_chunk_is_detected(tmp_path):
+    store, data_dir = make_store(tmp_path)
+    manifest = store.backup([data_dir / "processed"])
+
+    digest = store.load_manifest(manifest)["files"]["processed/b.csv"]["chunks"][0][0]
+    store.chunk_path(digest).write_bytes(zlib.compress(b"broken"))
+
+    with pytest.raises(ValueError, match="corrupted"):
+        store.restore(manifest, target=tmp_path / "restore")
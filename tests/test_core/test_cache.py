@@ -0,0 +1,177 @@
+import asyncio
+import os
+import pickle
+from types import SimpleNamespace
+
+import pytest
+
+from src.core import cache as cache_module
+from src.core.cache import MISSING, DiskCache, MemoryLRU, TwoTierCache, make_key
+
+
+@pytest.fixture
+def clock(monkeypatch) -> list:
+    now = [1_000_000.0]
+    monkeypatch.setattr(cache_module, "time", SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+@pytest.fixture
+def cache(tmp_path) -> TwoTierCache:
+    return TwoTierCache(tmp_path / "cache", memory_max_bytes=10_000, disk_max_bytes=100_000)
+
+
+def payload(value) -> bytes:
+    return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def test_memory_lru_evicts_least_recently_read_at_byte_cap():
+    memory = MemoryLRU(max_bytes=30)
+
+    assert memory.set("a", 1, 10) == 0
+    assert memory.set("b", 2, 10) == 0
+    assert memory.set("c", 3, 10) == 0
+
+    # a прочитан последним - вытесняется b
+    assert memory.get("a") == 1
+    assert memory.set("d", 4, 10) == 1
+
+    assert memory.get("b") is MISSING
+    assert [memory.get(key) for key in "acd"] == [1, 3, 4]
+    assert memory.size == 30
+
+    # Больше лимита - не кладется и ничего не вытесняет
+    assert memory.set("huge", 5, 31) == 0
+    assert memory.get("huge") is MISSING and len(memory) == 3
+
+    # Замена ключа учитывает старый размер
+    memory.set("a", 10, 5)
+    assert memory.size == 25 and memory.get("a") == 10
+
+
+def test_ttl_expires_in_memory_and_on_disk(cache, clock):
+    cache.set("key", {"value": 1}, ttl=60)
+    cache.set("forever", "value", ttl=0)
+
+    clock[0] += 59
+    assert cache.get("key") == {"value": 1}
+
+    clock[0] += 2
+    assert cache.get("key") is None
+
+    # На диске срок тот же - просроченный файл удален, а не поднят в память
+    assert cache.disk.get(make_key("key")) is MISSING
+    assert not cache.disk._path(make_key("key")).exists()
+
+    clock[0] += 10 ** 6
+    assert cache.get("forever") == "value"
+
+
+def test_default_ttl(tmp_path, clock):
+    cache = TwoTierCache(tmp_path, memory_max_bytes=10_000, disk_max_bytes=100_000, default_ttl=10)
+    cache.set("key", 1)
+
+    clock[0] += 11
+    assert cache.get("key", "missing") == "missing"
+
+
+def test_disk_evicts_oldest_mtime_at_byte_cap(tmp_path):
+    disk = DiskCache(tmp_path, max_bytes=3 * (len(payload("x" * 100)) + 44) + 10)
+
+    for number, key in enumerate(("a", "b", "c")):
+        assert disk.set(key, payload("x" * 100)) == 0
+        # mtime по порядку записи, a - самый старый
+        os.utime(disk._path(key), (1000 + number, 1000 + number))
+
+    # Чтение обновляет mtime - a становится самым свежим
+    assert disk.get("a") is not MISSING
+    assert disk.set("d", payload("x" * 100)) == 1
+
+    assert disk.get("b") is MISSING
+    assert all(disk.get(key) is not MISSING for key in "acd")
+    assert disk.size == sum(file.stat().st_size for file in tmp_path.glob("*/*.cache"))
+
+
+def test_corrupted_disk_file_is_rejected_and_removed(cache):
+    cache.set("key", [1, 2, 3], disk=True)
+    cache.memory.clear()
+
+    path = cache.disk._path(make_key("key"))
+    raw = bytearray(path.read_bytes())
+    raw[-1] ^= 0xFF
+    path.write_bytes(bytes(raw))
+
+    assert cache.get("key") is None
+    assert not path.exists()
+
+    # Обрезанный заголовок - тоже промах, а не исключение
+    cache.set("short", 1)
+    cache.memory.clear()
+    short = cache.disk._path(make_key("short"))
+    short.write_bytes(b"DMC1")
+
+    assert cache.get("short", "missing") == "missing"
+
+
+def test_disk_hit_is_promoted_to_memory(cache):
+    cache.set("key", {"rows": 10})
+    cache.memory.clear()
+
+    assert cache.get("key") == {"rows": 10}
+    assert cache.counters["disk_hits"] == 1 and len(cache.memory) == 1
+
+    # Повторное чтение - из памяти, тот же объект
+    first = cache.get("key")
+    assert cache.get("key") is first
+    assert cache.counters["memory_hits"] == 2 and cache.counters["disk_hits"] == 1
+
+
+def test_memory_only_set_does_not_touch_disk(cache):
+    cache.set("key", 1, disk=False)
+
+    assert cache.disk.size == 0
+    cache.memory.clear()
+    assert cache.get("key") is None and cache.counters["misses"] == 1
+
+
+def test_memoize_key_includes_function_args_and_kwargs(cache):
+    calls = []
+
+    @cache.memoize(ttl=60)
+    def load(coin, timeframe="5m", *, limit=100):
+        calls.append((coin, timeframe, limit))
+        return len(calls)
+
+    @cache.memoize(ttl=60)
+    def other(coin, timeframe="5m", *, limit=100):
+        return "other"
+
+    assert load("BTC") == 1
+    assert load("BTC") == 1
+    assert load("BTC", "1h") == 2
+    assert load("BTC", limit=10) == 3
+    assert load("ETH") == 4
+    assert load("BTC", limit=10) == 3
+
+    # Одинаковые аргументы другой функции - другой ключ
+    assert other("BTC") == "other"
+
+    # kwargs в любом порядке - один ключ
+    assert load("SOL", limit=1) == load("SOL", limit=1) == 5
+    assert len(calls) == 5
+
+
+def test_memoize_async(cache):
+    calls = []
+
+    @cache.memoize()
+    async def fetch(coin):
+        calls.append(coin)
+        await asyncio.sleep(0)
+        return {"coin": coin}
+
+    async def scenario():
+        return [await fetch("BTC"), await fetch("BTC"), await fetch("ETH")]
+
+    assert asyncio.run(scenario()) == [{"coin": "BTC"}, {"coin": "BTC"}, {"coin": "ETH"}]
+    assert calls == ["BTC", "ETH"]
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.core.candle_codec import (CANDLE_COLUMNS, encode_candles, decode_candles, zigzag_encode, zigzag_decode,
+                                   varint_encode, varint_decode, write_archive, read_archive, iter_archive)
+
+
+def candles(periods: int, seed: int = 0, start: str = "2024-01-01") -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = np.round(100 + np.cumsum(rng.normal(0, 0.05, periods)), 4)
+    return pd.DataFrame({
+        "datetime": pd.date_range(start, periods=periods, freq="5min"),
+        "open": np.round(close + rng.normal(0, 0.01, periods), 4), "close": close,
+        "max": np.round(close + rng.random(periods) * 0.1, 4), "min": np.round(close - rng.random(periods) * 0.1, 4),
+        "volume": np.round(rng.random(periods) * 1e4, 2),
+    })
+
+
+def assert_same(decoded: pd.DataFrame, expected: pd.DataFrame) -> None:
+    assert decoded["datetime"].tolist() == expected["datetime"].tolist()
+    for column in CANDLE_COLUMNS[1:]:
+        assert np.array_equal(decoded[column].to_numpy(), expected[column].to_numpy(dtype=np.float64), equal_nan=True)
+
+
+def test_zigzag_and_varint_round_trip():
+    values = np.array([0, -1, 1, -2**40, 2**40, 2**62, -2**63], dtype=np.int64)
+
+    assert np.array_equal(zigzag_decode(zigzag_encode(values)), values)
+
+    unsigned = zigzag_encode(values)
+    assert np.array_equal(varint_decode(varint_encode(unsigned), len(unsigned)), unsigned)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_decimal_candles_round_trip(seed):
+    data = candles(5000, seed)
+
+    block = encode_candles(data)
+
+    assert_same(decode_candles(block), data)
+    assert len(block) < len(data) * 48 / 3
+
+
+def test_noisy_floats_and_missing_candles_round_trip():
+    rng = np.random.default_rng(1)
+    data = candles(3000)
+    data[list(CANDLE_COLUMNS[1:])] *= np.pi
+    data.loc[rng.choice(len(data), 100, replace=False), list(CANDLE_COLUMNS[1:])] = np.nan
+    data.loc[0, "volume"] = np.nan
+
+    assert_same(decode_candles(encode_candles(data)), data)
+
+
+def test_irregular_timestamps_round_trip():
+    data = candles(100)
+    data = data.drop(index=[3, 4, 50]).reset_index(drop=True)
+    data.loc[10, "datetime"] += pd.Timedelta(seconds=7)
+
+    assert_same(decode_candles(encode_candles(data)), data)
+
+
+def test_archive_file_blocks_and_range(tmp_path):
+    data = candles(3 * 288 * 31, start="2024-01-15")
+    path = tmp_path / "BTC_5m.archive"
+
+    blocks = write_archive(path, data)
+
+    assert blocks == len(list(iter_archive(path))) == 4
+    assert_same(read_archive(path), data)
+
+    part = read_archive(path, start="2024-02-01", end="2024-02-01 01:00")
+    assert len(part) == 13 and part["datetime"].iloc[0] == pd.Timestamp("2024-02-01")
+
+
+def test_invalid_archive(tmp_path):
+    path = tmp_path / "bad.archive"
+    path.write_bytes(b"not an archive")
+
+    with pytest.raises(ValueError):
+        list(iter_archive(path))
@@ -0,0 +1,103 @@
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.core import data_manager
+from src.core.candle_store import CandleStore
+
+
+def candles(start: str, periods: int, close: float = 1.0) -> pd.DataFrame:
+    return pd.DataFrame({
+        "datetime": pd.date_range(start, periods=periods, freq="5min"),
+        "open": np.full(periods, 1.0),
+        "close": np.full(periods, close),
+        "max": np.full(periods, 2.0),
+        "min": np.full(periods, 0.5),
+        "volume": np.arange(periods, dtype=float),
+    })
+
+
+def test_append_and_read_range(tmp_path):
+    store = CandleStore(tmp_path)
+    data = candles("2024-01-01 23:00", 48)
+
+    paths = store.append("BTC", "5m", data)
+
+    assert len(paths) == 2  # Свечи двух дней - по части на день
+    assert store.days("BTC", "5m") == [date(2024, 1, 1), date(2024, 1, 2)]
+    assert store.read("BTC", "5m")["volume"].tolist() == data["volume"].tolist()
+
+    part = store.read("BTC", "5m", start=datetime(2024, 1, 2), end=datetime(2024, 1, 2, 0, 30))
+    assert len(part) == 7 and part["datetime"].iloc[0] == pd.Timestamp("2024-01-02")
+
+
+def test_resent_last_candle_overwrites_open_values(tmp_path):
+    store = CandleStore(tmp_path)
+    store.append("BTC", "5m", candles("2024-01-01", 3, close=1.0))
+
+    # Буфер отдает хвост повторно: последняя свеча была открытой и изменилась
+    tail = candles("2024-01-01 00:05", 3, close=5.0)
+    store.append("BTC", "5m", tail)
+
+    data = store.read("BTC", "5m")
+    assert len(data) == 4
+    assert data["close"].tolist() == [1.0, 1.0, 5.0, 5.0]
+
+
+def test_only_new_drops_older_candles(tmp_path):
+    store = CandleStore(tmp_path)
+    store.append("BTC", "5m", candles("2024-01-01", 10))
+
+    assert store.append("BTC", "5m", candles("2024-01-01", 5, close=9.0)) == []
+    assert store.read("BTC", "5m")["close"].eq(1.0).all()
+
+    store.append("BTC", "5m", candles("2024-01-01", 5, close=9.0), only_new=False)
+    assert store.read("BTC", "5m")["close"].tolist() == [9.0] * 5 + [1.0] * 5
+
+
+def test_last_datetime_is_read_from_disk(tmp_path):
+    CandleStore(tmp_path).append("BTC", "5m", candles("2024-01-01", 10))
+
+    store = CandleStore(tmp_path)
+    assert store.last_datetime("BTC", "5m") == pd.Timestamp("2024-01-01 00:45")
+    assert store.last_datetime("ETH", "5m") is None
+
+
+def test_compact_keeps_latest_values(tmp_path):
+    store = CandleStore(tmp_path)
+    store.append("BTC", "5m", candles("2024-01-01", 10, close=1.0))
+    store.append("BTC", "5m", candles("2024-01-01 00:45", 3, close=3.0))
+    store.append("BTC", "5m", candles("2024-01-02", 3))
+    before = store.read("BTC", "5m")
+
+    stats = store.compact(before=date(2024, 1, 2))
+
+    assert stats["days"] == 1 and stats["parts_removed"] == 2
+    assert len(store.parts("BTC", "5m", date(2024, 1, 1))) == 1
+    pd.testing.assert_frame_equal(store.read("BTC", "5m"), before)
+
+
+def test_missing_values_and_drop(tmp_path):
+    store = CandleStore(tmp_path)
+    data = candles("2024-01-01", 3).astype({"volume": object})
+    data.loc[1, "volume"] = "x"
+
+    store.append("BTC", "5m", data)
+    assert np.isnan(store.read("BTC", "5m")["volume"].iloc[1])
+
+    store.drop("BTC")
+    assert store.read("BTC", "5m").empty and store.last_datetime("BTC", "5m") is None
+
+
+@pytest.mark.parametrize("memmap", [False, True])
+def test_append_candles_writes_ohlcv_only_when_enabled(tmp_path, monkeypatch, memmap):
+    monkeypatch.setitem(data_manager.required_dirs, "candles", tmp_path)
+    monkeypatch.setattr(data_manager, "_candle_stores", {})
+    monkeypatch.setattr(data_manager.settings, "CANDLES_OHLCV_MEMMAP", memmap)
+
+    data_manager.append_candles("BTC", "5m", candles("2024-01-01", 3))
+
+    assert len(data_manager.candle_store("processed").read("BTC", "5m")) == 3
+    assert data_manager.ohlcv_path("BTC", "5m").exists() is memmap
@@ -0,0 +1,84 @@
+import logging
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.core.utils.clear_datasets import check_dt, check_dt_legacy
+from src.core.utils.consensus import CONSENSUS_COLUMNS, consensus_merge
+
+
+def sources(rows: int, count: int = 5, noise: float = 0.1, seed: int = 0) -> list[pd.DataFrame]:
+    rng = np.random.default_rng(seed)
+    base = pd.DataFrame({
+        "datetime": pd.date_range("2024-01-01", periods=rows, freq="5min"),
+        **{column: np.round(rng.random(rows) * 100, 2) for column in CONSENSUS_COLUMNS},
+    })
+
+    frames = []
+    for _ in range(count):
+        frame = base.copy()
+        frame.loc[rng.random(rows) < noise, "close"] += 0.01
+        frames.append(frame.sample(frac=0.95, random_state=int(rng.integers(1 << 31))))
+
+    return frames
+
+
+def frame(datetime: str, *rows: tuple) -> pd.DataFrame:
+    return pd.DataFrame([(pd.Timestamp(datetime), *row) for row in rows], columns=["datetime", *CONSENSUS_COLUMNS])
+
+
+@pytest.mark.parametrize("seed, noise", [(0, 0.1), (1, 0.3), (2, 0.0)])
+def test_check_dt_matches_legacy(seed, noise):
+    dfs = sources(500, noise=noise, seed=seed)
+
+    legacy = check_dt_legacy(dfs)
+    result = check_dt(dfs)
+
+    assert len(result) > 0
+    pd.testing.assert_frame_equal(result, legacy[result.columns].reset_index(drop=True), check_dtype=False)
+
+
+def test_report_lists_datetimes_dropped_by_legacy():
+    dfs = sources(500, noise=0.3, seed=1)
+
+    result, report = consensus_merge(dfs)
+    legacy = check_dt_legacy(dfs)
+
+    all_datetimes = set(pd.concat(dfs)["datetime"])
+    assert set(report["datetime"]) == all_datetimes - set(legacy["datetime"])
+    assert len(result) + len(report) == len(all_datetimes)
+    assert (report["agreement"] < 0.8).all()
+
+
+def test_most_common_set_wins_and_ties_keep_first_seen():
+    dfs = [
+        frame("2024-01-01 00:00", (1, 2, 0, 1, 10), (1, 2, 0, 1, 10), (1, 2, 0, 1, 10), (1, 2, 0, 1, 10)),
+        frame("2024-01-01 00:05", (1, 2, 0, 1, 10), (1, 2, 0, 1, 20)),
+    ]
+
+    result, report = consensus_merge(dfs, threshold=0.5)
+
+    assert result["volume"].tolist() == [10, 10]
+    assert report.empty
+
+
+def test_rows_with_gaps_do_not_vote_but_count_as_sources():
+    dfs = [frame("2024-01-01 00:00", (1, 2, 0, 1, 10), (1, 2, 0, 1, 10), (1, 2, 0, 1, 10), (1, 2, 0, np.nan, 10)),
+           frame("2024-01-01 00:05", (1, 2, 0, 1, 10))]
+
+    result, report = consensus_merge(dfs)
+
+    assert result["datetime"].tolist() == check_dt_legacy(dfs)["datetime"].tolist() == [pd.Timestamp("2024-01-01 00:05")]
+    assert report[["sources", "best"]].values.tolist() == [[4, 3]]
+
+
+def test_check_dt_logs_disagreement(caplog):
+    dfs = [frame("2024-01-01 00:00", (1, 2, 0, 1, 10), (1, 2, 0, 1, 10)),
+           frame("2024-01-01 00:05", (1, 2, 0, 1, 10), (1, 2, 0, 1, 20))]
+
+    with caplog.at_level(logging.WARNING, logger="process_logger.clear_datasets"):
+        result = check_dt(dfs)
+
+    assert len(result) == 1
+    assert "no consensus for 1 of 2 datetimes" in caplog.text
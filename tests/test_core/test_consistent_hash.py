@@ -0,0 +1,57 @@
+import pytest
+
+from src.core.utils.consistent_hash import ConsistentHashRing
+
+KEYS = [f"COIN{i}-USDT" for i in range(2000)]
+
+
+def owners(ring: ConsistentHashRing) -> dict:
+    return {key: node for node, keys in ring.partition(KEYS).items() for key in keys}
+
+
+def test_partition_covers_every_key_once():
+    partition = ConsistentHashRing([f"node-{i}" for i in range(4)]).partition(KEYS)
+
+    assert sorted(key for keys in partition.values() for key in keys) == sorted(KEYS)
+    # 100 виртуальных узлов - перекос между узлами небольшой
+    assert all(len(KEYS) / 4 * 0.6 < len(keys) < len(KEYS) / 4 * 1.4 for keys in partition.values())
+
+
+def test_layout_does_not_depend_on_node_order():
+    first = ConsistentHashRing(["a", "b", "c"])
+    second = ConsistentHashRing(["c", "a", "b"])
+
+    assert owners(first) == owners(second)
+    assert first.get_node("BTC-USDT") == ConsistentHashRing(["b", "c", "a"]).get_node("BTC-USDT")
+
+
+@pytest.mark.parametrize("count", [2, 4, 8])
+def test_adding_node_moves_about_one_nth(count):
+    ring = ConsistentHashRing([f"node-{i}" for i in range(count)])
+    before = owners(ring)
+
+    ring.add_node("new")
+    after = owners(ring)
+    moved = [key for key in KEYS if before[key] != after[key]]
+
+    # Переезжают только ключи нового узла, примерно 1/(N+1) от всех
+    assert all(after[key] == "new" for key in moved)
+    assert len(moved) / len(KEYS) == pytest.approx(1 / (count + 1), abs=0.07)
+
+
+def test_remove_node_moves_only_its_keys():
+    ring = ConsistentHashRing(["a", "b", "c"])
+    before = owners(ring)
+
+    ring.remove_node("b")
+    after = owners(ring)
+
+    assert ring.nodes == ["a", "c"]
+    assert all(after[key] == before[key] for key in KEYS if before[key] != "b")
+
+
+def test_partition_lists_empty_nodes_and_empty_ring_fails():
+    assert ConsistentHashRing(["a", "b"]).partition([]) == {"a": [], "b": []}
+
+    with pytest.raises(ValueError):
+        ConsistentHashRing().get_node("BTC")
@@ -0,0 +1,124 @@
+import os
+import shutil
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from src.core import data_manager
+from src.core.dataset_catalog import DatasetCatalog
+from src.parser_driver.api import create_launch_dir
+
+
+def write_csv(path: Path, rows: int = 3, start: str = "2024-01-01") -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pd.DataFrame({"datetime": pd.date_range(start, periods=rows, freq="5min").strftime("%Y-%m-%d %H:%M:%S"),
+                  "close": range(rows)}).to_csv(path, index=False)
+    return path
+
+
+@pytest.fixture
+def data_dir(tmp_path) -> Path:
+    root = tmp_path / "data"
+    write_csv(root / "raw" / "launch_parser_1" / "BTC" / "BTC_5m.csv")
+    write_csv(root / "raw" / "launch_parser_2" / "BTC" / "BTC_5m.csv", rows=5)
+    write_csv(root / "raw" / "launch_parser_2" / "ETH" / "ETH_1h.csv")
+    write_csv(root / "processed" / "BTC" / "5m" / "BTC_5m.csv", rows=10)
+    write_csv(root / "processed" / "BTC" / "5m" / "clear_BTC_5m.csv")
+    return root
+
+
+@pytest.fixture
+def catalog(catalog, data_dir) -> DatasetCatalog:
+    # Каталог из conftest (он же data_manager.catalog) с корнем data_dir
+    catalog.data_dir = data_dir
+    catalog.rebuild([data_dir / "raw", data_dir / "processed"])
+    return catalog
+
+
+def test_rebuild_describes_files_from_paths(catalog, data_dir):
+    rows = {row["path"]: row for row in catalog.find()}
+    assert len(rows) == 5
+
+    raw = rows[str((data_dir / "raw" / "launch_parser_2" / "BTC" / "BTC_5m.csv").resolve())]
+    assert (raw["kind"], raw["coin"], raw["timeframe"], raw["launch_number"], raw["rows"]) == ("raw", "BTC", "5m", 2, 5)
+    assert raw["min_datetime"] == "2024-01-01 00:00:00" and raw["max_datetime"] == "2024-01-01 00:20:00"
+
+    processed = rows[str((data_dir / "processed" / "BTC" / "5m" / "BTC_5m.csv").resolve())]
+    assert (processed["kind"], processed["launch"], processed["rows"]) == ("processed", None, 10)
+
+
+def test_find_filters(catalog, data_dir):
+    assert len(catalog.find(kind="raw", coin="BTC")) == 2
+    assert len(catalog.find(timeframe="1h")) == 1
+    assert len(catalog.find(launch=data_dir / "raw" / "launch_parser_2")) == 2
+    assert len(catalog.find(under=data_dir / "processed")) == 2
+
+    # Префикс пути - только внутри папки, не соседняя launch_parser_10
+    write_csv(data_dir / "raw" / "launch_parser_10" / "BTC" / "BTC_5m.csv")
+    catalog.register(data_dir / "raw" / "launch_parser_10" / "BTC" / "BTC_5m.csv")
+    assert len(catalog.find(under=data_dir / "raw" / "launch_parser_1")) == 1
+
+    assert len(catalog.find_name("BTC_5m.csv")) == 4
+    assert len(catalog.find_name("*_1h.csv")) == 1
+    assert len(catalog.find_name("launch_parser_2/BTC/BTC_5m.csv")) == 1
+
+
+def test_register_refreshes_and_deleted_files_drop_out(catalog, data_dir):
+    path = data_dir / "processed" / "BTC" / "5m" / "BTC_5m.csv"
+    write_csv(path, rows=20, start="2024-02-01")
+    catalog.register(path)
+
+    row, = catalog.find(kind="processed", coin="BTC")
+    assert row["rows"] == 20 and row["min_datetime"] == "2024-02-01 00:00:00"
+
+    catalog.register(path, stats={"rows": 21, "min_datetime": "a", "max_datetime": "b"})
+    assert catalog.find(kind="processed", coin="BTC")[0]["rows"] == 21
+
+    # Файл удален мимо каталога - выпадает при поиске
+    os.remove(path)
+    assert catalog.find(kind="processed", coin="BTC") == []
+
+    catalog.remove(data_dir / "raw" / "launch_parser_1")
+    assert len(catalog.find(kind="raw")) == 2
+
+
+def test_last_launch_sees_empty_launch_dir(catalog, data_dir):
+    assert catalog.last_launch() == (data_dir / "raw" / "launch_parser_2").resolve()
+
+    # Пустая папка запуска найдена при переиндексации
+    (data_dir / "raw" / "launch_parser_3").mkdir()
+    catalog.rebuild([data_dir / "raw", data_dir / "processed"])
+    assert catalog.last_launch() == (data_dir / "raw" / "launch_parser_3").resolve()
+
+    # и при создании через create_launch_dir
+    created = create_launch_dir(str(data_dir / "raw"))
+    assert catalog.last_launch() == Path(created).resolve()
+
+    # Удаленные запуски пропускаются
+    shutil.rmtree(created)
+    shutil.rmtree(data_dir / "raw" / "launch_parser_3")
+    assert catalog.last_launch() == (data_dir / "raw" / "launch_parser_2").resolve()
+
+
+def test_last_launch_falls_back_to_files(tmp_path, data_dir):
+    # Каталог без таблицы launches в данных знает запуски только по файлам
+    catalog = DatasetCatalog(tmp_path / "old.sqlite", data_dir)
+    catalog.register(data_dir / "raw" / "launch_parser_1" / "BTC" / "BTC_5m.csv")
+
+    assert catalog.last_launch() == (data_dir / "raw" / "launch_parser_1").resolve()
+    assert catalog.last_launch("processed") is None
+
+
+def test_get_path_keeps_name_token_match(catalog, data_dir):
+    write_csv(data_dir / "processed" / "BTC" / "5m" / "BTC-USDT_5m.csv")
+    catalog.register(data_dir / "processed" / "BTC" / "5m" / "BTC-USDT_5m.csv")
+
+    found = {path.name for path in data_manager.get_path(data_dir / "processed", coin="BTC", timetravel="5m")}
+    assert found == {"BTC_5m.csv", "clear_BTC_5m.csv", "BTC-USDT_5m.csv"}
+
+    found = {path.name for path in data_manager.get_path(data_dir / "processed", coin="BTC", dataset_type="clear")}
+    assert found == {"clear_BTC_5m.csv"}
+
+    # Только монета, без таймфрейма и типа - как при обходе папок, ничего
+    assert list(data_manager.get_path(data_dir / "processed", coin="BTC")) == []
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.core.utils.clear_datasets import conncat_missing_rows
+from src.core.utils.gap_fill import fill_gaps, find_gaps
+
+
+def sample(rows: int, seed: int, freq: str = "5min") -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    timestamp = pd.date_range("2024-01-01", periods=int(rows * 1.2), freq=freq)
+    keep = np.sort(rng.choice(len(timestamp), rows, replace=False))
+    return pd.DataFrame({"datetime": timestamp[keep], "open": rng.random(rows), "close": rng.random(rows),
+                         "max": rng.random(rows), "min": rng.random(rows), "volume": rng.random(rows)})
+
+
+@pytest.mark.parametrize("seed, timetravel, freq", [(0, "5m", "5min"), (1, "5m", "5min"), (2, "15m", "15min")])
+def test_fill_gaps_matches_conncat_missing_rows(seed, timetravel, freq):
+    data = sample(500, seed, freq)
+
+    legacy = conncat_missing_rows(data.copy(), timetravel).sort_values("datetime", ignore_index=True)
+    result, report = fill_gaps(data.sample(frac=1, random_state=seed), timetravel, fill_value="x", flag_column=None)
+
+    assert result["datetime"].tolist() == legacy["datetime"].tolist()
+    assert (result.drop(columns="datetime").astype(str).to_numpy() ==
+            legacy.drop(columns="datetime").astype(str).to_numpy()).all()
+    assert report["missing"] == len(result) - len(data)
+
+
+def test_report_and_synthetic_flag():
+    data = pd.DataFrame({"datetime": ["2024-01-01 00:00", "2024-01-01 00:05", "2024-01-01 00:25",
+                                      "2024-01-01 00:35", "bad", "2024-01-01 00:05"],
+                         "close": [1.0, 2.0, 3.0, 4.0, 5.0, 6.0]})
+
+    result, report = fill_gaps(data, "5m")
+
+    assert result["datetime"].dt.strftime("%H:%M").tolist() == \
+        ["00:00", "00:05", "00:10", "00:15", "00:20", "00:25", "00:30", "00:35"]
+    assert result["synthetic"].tolist() == [False, False, True, True, True, False, True, False]
+    assert result["close"].tolist()[:2] == [1.0, 2.0] and np.isnan(result["close"].iloc[2])
+
+    assert report["missing"] == 4 and report["gaps"] == 2 and report["invalid_datetime"] == 1
+    assert report["longest"] == pd.Timedelta(minutes=15)
+    assert report["longest_start"] == pd.Timestamp("2024-01-01 00:05")
+
+
+def test_off_grid_candle_does_not_break_filling():
+    data = pd.DataFrame({"datetime": pd.to_datetime(["2024-01-01 00:00", "2024-01-01 00:12", "2024-01-01 00:20"]),
+                         "close": [1.0, 2.0, 3.0]})
+
+    result, report = fill_gaps(data, "5m", flag_column=None)
+
+    assert result["datetime"].dt.strftime("%H:%M").tolist() == ["00:00", "00:05", "00:10", "00:12", "00:17", "00:20"]
+    assert report["missing"] == 3
+
+
+def test_find_gaps_positions():
+    timestamp = pd.to_datetime(["2024-01-01 00:00", "2024-01-01 00:05", "2024-01-01 00:20"]).to_numpy()
+
+    gaps = find_gaps(timestamp, 5 * 60 * 10**9)
+
+    assert gaps["missing"].tolist() == [2] and gaps["position"].tolist() == [1]
+    assert fill_gaps(sample(10, 0).iloc[:0], "5m")[1]["missing"] == 0
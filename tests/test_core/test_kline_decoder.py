@@ -0,0 +1,80 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.core.utils.kline_decoder import (FUTURES_KLINE_COLUMNS, KlineBatch, decode_kline,
+                                          to_kucoin_kline_type)
+
+
+def spot_payload(count: int, start: int = 1_700_000_000) -> list:
+    # KuCoin отдает свечи от новых к старым
+    return [[str(start + i * 300), str(1 + i), str(2 + i), str(3 + i), str(0.5 + i), "10", str(100 + i)]
+            for i in reversed(range(count))]
+
+
+def test_decode_matches_row_by_row_parsing():
+    payload = spot_payload(50)
+    frame = decode_kline(payload).to_frame()
+
+    expected = pd.DataFrame({
+        "datetime": [datetime.fromtimestamp(int(row[0])) for row in reversed(payload)],
+        "open": [float(row[1]) for row in reversed(payload)],
+        "close": [float(row[2]) for row in reversed(payload)],
+        "max": [float(row[3]) for row in reversed(payload)],
+        "min": [float(row[4]) for row in reversed(payload)],
+        "volume": [float(row[6]) for row in reversed(payload)],
+    }).astype({"datetime": "datetime64[ns]"})
+
+    pd.testing.assert_frame_equal(frame, expected)
+
+
+def test_futures_milliseconds_and_column_order():
+    payload = [[1_700_000_300_000, 1.0, 3.0, 0.5, 2.0, 7, 10.0],
+               [1_700_000_000_000, 1.5, 3.5, 1.0, 2.5, 7, 11.0]]
+
+    batch = decode_kline(payload, FUTURES_KLINE_COLUMNS)
+
+    assert batch.timestamp.tolist() == [1_700_000_000, 1_700_000_300]
+    assert batch.max.tolist() == [3.5, 3.0]
+    assert batch.close.tolist() == [2.5, 2.0]
+    assert batch.volume.tolist() == [11.0, 10.0]
+
+
+def test_empty_and_invalid_payload():
+    assert len(decode_kline([])) == 0
+    assert len(decode_kline(None).to_frame()) == 0
+
+    with pytest.raises(ValueError):
+        decode_kline([["1", "2"]])
+
+
+def test_concat_drops_repeated_timestamps_keeping_first():
+    first = decode_kline(spot_payload(3))
+    second = decode_kline([[str(1_700_000_000), "9", "9", "9", "9", "9", "9"],
+                           [str(1_700_000_900), "5", "5", "5", "5", "5", "5"]])
+
+    batch = KlineBatch.concat([first, KlineBatch.empty(), second])
+
+    assert batch.timestamp.tolist() == [1_700_000_000 + i * 300 for i in range(4)]
+    assert batch.open.tolist() == [1.0, 2.0, 3.0, 5.0]
+
+
+def test_since_keeps_candles_from_last_datetime():
+    batch = decode_kline(spot_payload(5))
+    last = datetime.fromtimestamp(1_700_000_600)
+
+    assert batch.since(last).timestamp.tolist() == [1_700_000_600, 1_700_000_900, 1_700_001_200]
+    assert len(batch.since(None)) == 5
+
+
+def test_day_candles_are_truncated_to_date():
+    values = decode_kline(spot_payload(2)).get_datetime(day=True)
+    assert np.all(values == values.astype("datetime64[D]"))
+
+
+@pytest.mark.parametrize("time, kline_type", [("5m", "5min"), ("1H", "1hour"), ("4h", "4hour"),
+                                              ("1D", "1day"), ("1W", "1week"), ("5min", "5min")])
+def test_to_kucoin_kline_type(time, kline_type):
+    assert to_kucoin_kline_type(time) == kline_type
@@ -0,0 +1,122 @@
+import os
+import time
+
+import pandas as pd
+
+from src.core.launch_compactor import LaunchCompactor, CONSOLIDATED_DIR
+
+
+def write_launch(raw_dir, number: int, close: float, start: str = "2024-01-01", age: float = 7200):
+    launch = raw_dir / f"launch_parser_{number}"
+    (launch / "BTC").mkdir(parents=True)
+
+    pd.DataFrame({"datetime": pd.date_range(start, periods=3, freq="5min").astype(str),
+                  "open": 1.0, "close": close, "max": 2.0, "min": 0.5, "volume": "1K"}
+                 ).to_csv(launch / "BTC" / "BTC_5m.csv", index=False)
+
+    mtime = time.time() - age
+    for path in [launch, *launch.rglob("*")]:
+        os.utime(path, (mtime, mtime))
+
+    return launch
+
+
+def compactor(raw_dir) -> LaunchCompactor:
+    return LaunchCompactor(raw_dir, processed_last=lambda coin, timeframe: None)
+
+
+def test_compact_merges_launches_latest_wins(tmp_path):
+    write_launch(tmp_path, 1, close=1.0)
+    write_launch(tmp_path, 2, close=2.0, start="2024-01-01 00:10")
+    last = write_launch(tmp_path, 3, close=3.0)
+
+    report = compactor(tmp_path).compact(keep_last=1, min_age=3600)
+
+    assert report["launches"] == 2 and report["series"] == 1
+    data = compactor(tmp_path).read("BTC", "5m")
+    assert data["close"].tolist() == ["1.0", "1.0", "2.0", "2.0", "2.0"]
+    assert data["volume"].eq("1K").all()
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == [CONSOLIDATED_DIR, last.name]
+
+
+def test_compact_keeps_launch_with_broken_file(tmp_path):
+    write_launch(tmp_path, 1, close=1.0)
+    broken = write_launch(tmp_path, 2, close=2.0)
+    (broken / "ETH").mkdir()
+    (broken / "ETH" / "ETH_5m.csv").write_text("")
+    write_launch(tmp_path, 3, close=3.0)
+
+    report = compactor(tmp_path).compact(keep_last=1)
+
+    assert report["launches"] == 1 and report["launches_broken"] == 1
+    assert broken.exists() and (broken / "BTC" / "BTC_5m.csv").exists()
+    assert compactor(tmp_path).read("BTC", "5m")["close"].eq("1.0").all()
+
+
+def test_compact_skips_active_and_recent_launches(tmp_path):
+    write_launch(tmp_path, 1, close=1.0)
+    shared = write_launch(tmp_path, 2, close=2.0)
+    recent = write_launch(tmp_path, 3, close=3.0, age=60)
+    write_launch(tmp_path, 4, close=4.0)
+
+    report = compactor(tmp_path).compact(keep_last=1, skip=[str(shared)], min_age=3600)
+
+    assert report["launches"] == 1 and report["launches_active"] == 2
+    assert shared.exists() and recent.exists()
+    assert not (tmp_path / "launch_parser_1").exists()
+    assert compactor(tmp_path).read("BTC", "5m")["close"].eq("1.0").all()
+
+
+def test_dry_run_changes_nothing(tmp_path):
+    first = write_launch(tmp_path, 1, close=1.0)
+    write_launch(tmp_path, 2, close=2.0)
+
+    report = compactor(tmp_path).compact(keep_last=1, dry_run=True)
+
+    assert report["launches"] == 1 and report["files"] == 1
+    assert first.exists() and not (tmp_path / CONSOLIDATED_DIR).exists()
+
+
+def test_compact_daily_candles_twice_keeps_all_rows(tmp_path):
+    # Все свечи 1d в полночь: склеенный файл не должен менять формат времени
+    def write_daily(number: int, start: str):
+        launch = tmp_path / f"launch_parser_{number}"
+        (launch / "BTC").mkdir(parents=True)
+        pd.DataFrame({"datetime": pd.date_range(start, periods=5, freq="1D").strftime("%Y-%m-%d %H:%M:%S"),
+                      "open": 1.0, "close": float(number), "max": 2.0, "min": 0.5, "volume": "1K"}
+                     ).to_csv(launch / "BTC" / "BTC_1d.csv", index=False)
+        return launch
+
+    write_daily(1, "2024-01-01")
+    write_daily(2, "2024-01-06")
+    compactor(tmp_path).compact(keep_last=1)
+
+    second = write_daily(3, "2024-01-11")
+    compactor(tmp_path).compact(keep_last=1)
+
+    data = compactor(tmp_path).read("BTC", "1d")
+    assert data["datetime"].iloc[0] == "2024-01-01 00:00:00"
+    assert len(data) == 10 and data["close"].tolist() == ["1.0"] * 5 + ["2.0"] * 5
+    assert not (tmp_path / "launch_parser_2").exists() and second.exists()
+
+    write_daily(4, "2024-01-16")
+    compactor(tmp_path).compact(keep_last=1)
+
+    data = compactor(tmp_path).read("BTC", "1d")
+    assert len(data) == 15 and data["datetime"].is_unique
+
+
+def test_compact_keeps_launch_with_unparsed_datetime(tmp_path):
+    write_launch(tmp_path, 1, close=1.0)
+    bad = write_launch(tmp_path, 2, close=2.0, start="2024-01-01 00:15")
+    data = pd.read_csv(bad / "BTC" / "BTC_5m.csv")
+    data.loc[1, "datetime"] = "01/02/2024 garbage"
+    data.to_csv(bad / "BTC" / "BTC_5m.csv", index=False)
+    write_launch(tmp_path, 3, close=3.0)
+
+    report = compactor(tmp_path).compact(keep_last=1)
+
+    assert report["launches"] == 1 and report["launches_broken"] == 1
+    assert bad.exists()
+    assert compactor(tmp_path).read("BTC", "5m")["close"].eq("1.0").all()
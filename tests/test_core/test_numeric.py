@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.core.utils.clear_datasets import str_to_float, volume_to_float
+from src.core.utils.numeric import parse_numbers, coerce_ohlcv, typed_missing
+
+
+def legacy(values: list, function) -> np.ndarray:
+    result = [function(value) for value in values]
+    return np.array([np.nan if value in (None, "x") else value for value in result], dtype=np.float64)
+
+
+@pytest.mark.parametrize("values", [
+    ["1 234,5", "12,25", "7", "-0,5", "1e3"],
+    ["1.5", "2", "x", "bad", "3.25"],
+    ["1 000,25", " 42 ", ".5", "x", "1,2,3"],
+])
+def test_prices_match_str_to_float(values):
+    result, parsed, missing = parse_numbers(pd.Series(values, dtype=object))
+
+    assert np.array_equal(result, legacy(values, str_to_float), equal_nan=True)
+    assert missing.tolist() == [value == "x" for value in values]
+    assert parsed.tolist() == (~np.isnan(result)).tolist()
+
+
+def test_non_breaking_spaces_are_thousand_separators():
+    # str_to_float убирает только обычные пробелы
+    result, _, _ = parse_numbers(pd.Series(["1\u00a0000,25", "2\u202f500"], dtype=object))
+
+    assert result.tolist() == [1000.25, 2500.0]
+
+
+@pytest.mark.parametrize("values", [
+    ["1,234.5K", "2M", "0.5B", "123", "12.345K"],
+    ["1.2K", "x", "3", "4,000", "7.77M"],
+])
+def test_volume_matches_volume_to_float(values):
+    result, _, _ = parse_numbers(pd.Series(values, dtype=object), volume=True)
+
+    assert np.array_equal(result, legacy(values, volume_to_float), equal_nan=True)
+
+
+def test_random_columns_match_legacy():
+    rng = np.random.default_rng(0)
+    price = np.round(rng.random(2000) * 1000, 2)
+    prices = pd.Series(price).map("{:,.2f}".format).str.replace(",", " ").str.replace(".", ",")
+    volumes = pd.Series(np.round(rng.random(2000) * 999, 2)).astype(str) + rng.choice(["", "K", "M", "B"], 2000)
+
+    assert np.allclose(parse_numbers(prices)[0], legacy(list(prices), str_to_float))
+    assert np.allclose(parse_numbers(volumes, volume=True)[0], legacy(list(volumes), volume_to_float))
+
+
+def test_mixed_numbers_and_strings():
+    values = pd.Series([1.5, "2,5", 3, "x", None], dtype=object)
+
+    result, parsed, missing = parse_numbers(values)
+
+    assert np.array_equal(result, [1.5, 2.5, 3.0, np.nan, np.nan], equal_nan=True)
+    assert parsed.tolist() == [True, True, True, False, False]
+    assert missing.tolist() == [False, False, False, True, False]
+
+
+def test_coerce_ohlcv_reports_rejected_values():
+    data = pd.DataFrame({"datetime": ["2024-01-01 00:00", "2024-01-01 00:05", "2024-01-01 00:10"],
+                         "open": ["1,5", "x", "2"], "close": ["1", "2", "bad"],
+                         "volume": ["1K", "2", "3M"], "synthetic": [False, True, False]})
+
+    result, valid, rejected = coerce_ohlcv(data)
+
+    assert result["volume"].tolist() == [1000.0, 2.0, 3_000_000.0]
+    assert result["datetime"].tolist() == data["datetime"].tolist()
+    assert valid.tolist() == [True, False, False]
+    assert rejected.to_dict("records") == [{"row": 2, "column": "close", "value": "bad"}]
+
+
+def test_typed_missing_marks_synthetic():
+    data = pd.DataFrame({"open": ["1.0", "x"], "close": ["2.0", "x"], "volume": ["1.2K", "x"]})
+
+    result = typed_missing(data)
+
+    assert result["open"].dtype == np.float64 and np.isnan(result["open"].iloc[1])
+    assert result["volume"].tolist()[0] == "1.2K"
+    assert result["synthetic"].tolist() == [False, True]
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.core.ohlcv_memmap import OHLCVMemmap, HEADER_SIZE
+
+
+def candles(start: str, periods: int, close: float = 1.0) -> pd.DataFrame:
+    return pd.DataFrame({
+        "datetime": pd.date_range(start, periods=periods, freq="5min"),
+        "open": np.full(periods, 1.0),
+        "close": np.full(periods, close),
+        "max": np.full(periods, 2.0),
+        "min": np.full(periods, 0.5),
+        "volume": np.arange(periods, dtype=float),
+    })
+
+
+def test_write_and_read_round_trip(tmp_path):
+    data = candles("2024-01-01", 10)
+    file = OHLCVMemmap.write(tmp_path / "BTC_5m.ohlcv", data.iloc[::-1], "5m")
+
+    assert len(file) == 10 and file.timetravel == "5m"
+    pd.testing.assert_frame_equal(file.to_frame(), data, check_freq=False)
+    assert file.get_datetime_last() == pd.Timestamp("2024-01-01 00:45")
+    assert (tmp_path / "BTC_5m.ohlcv").stat().st_size == HEADER_SIZE + 10 * file.records.itemsize
+
+
+def test_to_frame_is_zero_copy(tmp_path):
+    file = OHLCVMemmap.write(tmp_path / "BTC_5m.ohlcv", candles("2024-01-01", 100))
+
+    frame = file.to_frame("2024-01-01 01:00", "2024-01-01 02:00")
+
+    assert len(frame) == 13
+    for column in frame.columns:
+        assert np.shares_memory(frame[column].to_numpy(), file.records)
+
+    with pytest.raises(ValueError):
+        frame["close"].to_numpy()[0] = 0.0
+
+
+def test_search_bounds(tmp_path):
+    file = OHLCVMemmap.write(tmp_path / "BTC_5m.ohlcv", candles("2024-01-01", 10))
+
+    assert file.search("2024-01-01 00:07", "2024-01-01 00:20") == slice(2, 5)
+    assert file.search(end="2023-12-31") == slice(0, 0)
+    assert file.search() == slice(0, 10)
+
+
+def test_append_overwrites_resent_last_candle(tmp_path):
+    path = tmp_path / "BTC_5m.ohlcv"
+    OHLCVMemmap.write(path, candles("2024-01-01", 3, close=1.0))
+    reader = OHLCVMemmap(path)
+
+    # Хвост отдан повторно: последняя свеча была открытой и изменилась
+    assert OHLCVMemmap.append(path, candles("2024-01-01 00:05", 3, close=5.0)) == 2
+
+    file = OHLCVMemmap(path)
+    assert len(file) == 4
+    assert file.to_frame()["close"].tolist() == [1.0, 1.0, 5.0, 5.0]
+
+    # Открытый раньше читатель видит прежнее число записей
+    assert len(reader) == 3
+
+
+def test_append_skips_older_and_creates_file(tmp_path):
+    path = tmp_path / "BTC_5m.ohlcv"
+
+    assert OHLCVMemmap.append(path, candles("2024-01-01", 5)) == 5
+    assert OHLCVMemmap.append(path, candles("2024-01-01", 3, close=9.0)) == 0
+    assert OHLCVMemmap(path).to_frame()["close"].eq(1.0).all()
+
+
+def test_invalid_file(tmp_path):
+    path = tmp_path / "bad.ohlcv"
+    path.write_bytes(b"x" * HEADER_SIZE)
+
+    with pytest.raises(ValueError, match="bad magic"):
+        OHLCVMemmap(path)
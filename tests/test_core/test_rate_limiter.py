@@ -0,0 +1,111 @@
+import asyncio
+import multiprocessing as mp
+from types import SimpleNamespace
+
+import pytest
+
+from src.core.utils import rate_limiter
+from src.core.utils.rate_limiter import KUCOIN_ENDPOINT_WEIGHTS, KucoinRateLimiter, TokenBucket
+
+
+@pytest.fixture
+def clock(monkeypatch) -> SimpleNamespace:
+    """Часы модуля: time() стоит на месте, sleep() только запоминает паузы"""
+    clock = SimpleNamespace(now=1_000_000.0, sleeps=[])
+    clock.time = lambda: clock.now
+    clock.sleep = clock.sleeps.append
+
+    monkeypatch.setattr(rate_limiter, "time", clock)
+    return clock
+
+
+def test_reserve_refills_at_rate_up_to_capacity(tmp_path, clock):
+    bucket = TokenBucket(tmp_path / "bucket", capacity=10, refill_per_second=2)
+
+    # Полная корзина: 10 токенов без ожидания, дальше - долг
+    assert [bucket.reserve(5), bucket.reserve(5)] == [0, 0]
+    assert bucket.reserve(4) == pytest.approx(2.0)
+
+    # За 3 с пришло 6 токенов: долг -4 погашен, свободно 2
+    clock.now += 3
+    assert bucket.reserve(2) == 0
+    assert bucket.reserve(1) == pytest.approx(0.5)
+
+    # Долгий простой не копит больше capacity
+    clock.now += 3600
+    assert bucket.reserve(10) == 0
+    assert bucket.reserve(1) == pytest.approx(0.5)
+
+
+def test_reservations_queue_in_order(tmp_path, clock):
+    bucket = TokenBucket(tmp_path / "bucket", capacity=3, refill_per_second=1)
+    bucket.reserve(3)
+
+    # Каждый следующий ждет дольше на время своего веса
+    assert [bucket.reserve(1) for _ in range(3)] == pytest.approx([1, 2, 3])
+
+
+def test_instances_share_state_file(tmp_path, clock):
+    first = TokenBucket(tmp_path / "bucket", capacity=4, refill_per_second=1)
+    second = TokenBucket(tmp_path / "bucket", capacity=4, refill_per_second=1)
+
+    first.reserve(3)
+    assert second.reserve(2) == pytest.approx(1)
+    assert first.reserve(1) == pytest.approx(2)
+
+
+def reserve_many(path, count: int) -> None:
+    bucket = TokenBucket(path, capacity=10, refill_per_second=1e-6)
+    for _ in range(count):
+        bucket.reserve(1)
+
+
+def test_processes_share_one_bucket(tmp_path):
+    path = tmp_path / "bucket"
+
+    processes = [mp.get_context("fork").Process(target=reserve_many, args=(path, 25)) for _ in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(30)
+        assert process.exitcode == 0
+
+    # 100 списаний из 10 токенов: без общей блокировки часть из них потерялась бы
+    tokens, _ = rate_limiter._STATE.unpack(path.read_bytes())
+    assert tokens == pytest.approx(-90, abs=0.01)
+
+
+def test_kucoin_limiter_weights_and_pools(tmp_path, clock):
+    limiter = KucoinRateLimiter(tmp_path, capacity=30, window=30)
+
+    assert set(limiter.buckets) == {"spot", "futures"}
+
+    # spot: 15 + 3 * 5 = 30 токенов - вся корзина, следующий ждет свой вес
+    assert limiter.acquire_sync("stats_24hr") == 0
+    for _ in range(5):
+        assert limiter.acquire_sync("spot_kline") == 0
+    assert limiter.acquire_sync("order_book") == pytest.approx(3)
+    assert clock.sleeps == [pytest.approx(3)]
+
+    # futures - отдельная корзина
+    assert limiter.acquire_sync("futures_kline") == 0
+
+    with pytest.raises(ValueError):
+        limiter.acquire_sync("unknown")
+
+
+def test_kucoin_limiter_async_waits(tmp_path, clock, monkeypatch):
+    sleeps = []
+
+    async def sleep(seconds):
+        sleeps.append(seconds)
+
+    monkeypatch.setattr(rate_limiter.asyncio, "sleep", sleep)
+    limiter = KucoinRateLimiter(tmp_path, capacity=3, window=3,
+                                weights={"spot_kline": KUCOIN_ENDPOINT_WEIGHTS["spot_kline"]})
+
+    async def scenario():
+        return [await limiter.acquire("spot_kline") for _ in range(3)]
+
+    assert asyncio.run(scenario()) == pytest.approx([0, 3, 6])
+    assert sleeps == pytest.approx([3, 6])
@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.core.models import CandleRingBuffer, DatasetTimeseries
+from src.core.models.ring_buffer import OHLCV_COLUMNS
+
+STEP = pd.Timedelta(minutes=5)
+START = pd.Timestamp("2024-01-01")
+
+
+def candles(positions, rng) -> pd.DataFrame:
+    return pd.DataFrame({"datetime": [START + STEP * int(p) for p in positions],
+                         **{column: rng.random(len(positions)) for column in OHLCV_COLUMNS}})
+
+
+class DictBuffer:
+    """Эталон: словарь время -> значения, повтор перезаписывает, остаются capacity последних"""
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.rows = {}
+
+    def append(self, data: pd.DataFrame) -> int:
+        new = 0
+        for row in data.itertuples(index=False):
+            new += row.datetime not in self.rows and (not self.rows or row.datetime > max(self.rows))
+            self.rows[row.datetime] = [getattr(row, column) for column in OHLCV_COLUMNS]
+
+        self.truncate(self.capacity)
+        return new
+
+    def truncate(self, keep: int) -> None:
+        for key in sorted(self.rows)[:-keep or None] if keep else list(self.rows):
+            del self.rows[key]
+
+    def to_frame(self) -> pd.DataFrame:
+        keys = sorted(self.rows)
+        return pd.DataFrame({"datetime": pd.to_datetime(keys).astype("datetime64[ns]"),
+                             **{column: [self.rows[key][i] for key in keys]
+                                for i, column in enumerate(OHLCV_COLUMNS)}})
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_ring_buffer_matches_dict(seed):
+    rng = np.random.default_rng(seed)
+    capacity = int(rng.integers(3, 30))
+
+    ring, reference = CandleRingBuffer(capacity), DictBuffer(capacity)
+    head = 0
+
+    for _ in range(60):
+        action = rng.random()
+
+        if action < 0.6:
+            # Опрос: последние свечи с повтором текущей и новые
+            head += int(rng.integers(0, 4))
+            positions = np.arange(head - int(rng.integers(0, 4)), head + 1)
+        elif action < 0.8:
+            # Догрузка пропуска внутри или перед историей
+            positions = rng.choice(np.arange(head - 2 * capacity, head + 1), int(rng.integers(1, 6)), replace=False)
+        elif action < 0.9:
+            # Большая пачка больше емкости
+            head += capacity
+            positions = np.arange(head - capacity - 3, head + 1)
+        else:
+            keep = int(rng.integers(0, capacity + 1))
+            ring.truncate(keep)
+            reference.truncate(keep)
+            continue
+
+        data = candles(positions, rng).sample(frac=1, random_state=seed)
+        ring.append(data)
+        reference.append(data)
+
+        pd.testing.assert_frame_equal(ring.to_frame(), reference.to_frame())
+        assert len(ring) == len(reference.rows)
+
+    expected = reference.to_frame()
+    if len(expected):
+        assert ring.get_datetime_last() == expected["datetime"].iloc[-1]
+        assert ring.latest()["close"] == expected["close"].iloc[-1]
+
+
+def test_resent_candle_updates_in_place():
+    rng = np.random.default_rng(0)
+    ring = CandleRingBuffer(10)
+
+    assert ring.append(candles(range(5), rng)) == 5
+
+    update = candles([4], rng)
+    assert ring.append(update) == 0
+    assert ring.latest()["close"] == update["close"].iloc[0]
+    assert len(ring) == 5
+
+
+def test_overflow_keeps_newest_and_orders_descending():
+    ring = CandleRingBuffer(4)
+    ring.append(candles(range(10), np.random.default_rng(0)))
+
+    frame = ring.to_frame(ascending=False)
+    assert frame["datetime"].tolist() == [START + STEP * i for i in (9, 8, 7, 6)]
+    assert ring.nbytes == 4 * 8 + 4 * len(OHLCV_COLUMNS) * 8
+
+
+def test_accepts_dataset_and_string_values():
+    data = pd.DataFrame({"datetime": ["2024-01-01 00:00:00", "2024-01-01 00:05:00"],
+                         "open": ["1.5", "x"], "close": [1, 2], "max": [2, 3], "min": [0, 1], "volume": [5, 6]})
+    ring = CandleRingBuffer(5)
+
+    ring.append(DatasetTimeseries(data.copy()))
+
+    frame = ring.to_frame()
+    assert frame["open"].iloc[0] == 1.5 and np.isnan(frame["open"].iloc[1])
+    assert isinstance(ring.to_dataset(), DatasetTimeseries)
+
+
+def test_invalid_capacity():
+    with pytest.raises(ValueError):
+        CandleRingBuffer(0)
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.core.utils.rollup import rollup, timeframe_to_ns, bucket_start, tail_start, OHLCV_COLUMNS
+
+
+def candles(start: str, periods: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 0.5, periods))
+    return pd.DataFrame({
+        "datetime": pd.date_range(start, periods=periods, freq="5min"),
+        "open": close + rng.normal(0, 0.1, periods), "close": close,
+        "max": close + rng.random(periods), "min": close - rng.random(periods),
+        "volume": rng.random(periods) * 1e4,
+    })
+
+
+@pytest.mark.parametrize("timeframe, freq", [("15m", "15min"), ("1h", "1h"), ("4h", "4h"), ("1d", "1D")])
+def test_rollup_matches_resample(timeframe, freq):
+    data = candles("2024-01-01 01:35", 3 * 288)
+
+    result = rollup(data.sample(frac=1, random_state=0), timeframe)
+
+    expected = (data.set_index("datetime").resample(freq, origin="epoch")
+                .agg({"open": "first", "close": "last", "max": "max", "min": "min", "volume": "sum"}))
+
+    assert result["datetime"].tolist() == expected.index.tolist()
+    assert np.allclose(result[list(OHLCV_COLUMNS)].to_numpy(), expected[list(OHLCV_COLUMNS)].to_numpy())
+
+
+def test_rollup_count_complete_and_since():
+    result = rollup(candles("2024-01-01 00:05", 6), "15m")
+
+    assert result["count"].tolist() == [2, 3, 1]
+    assert result["complete"].tolist() == [False, True, False]
+
+    since = rollup(candles("2024-01-01 00:05", 6), "15m", since=pd.Timestamp("2024-01-01 00:15"))
+    assert since["datetime"].tolist() == [pd.Timestamp("2024-01-01 00:15"), pd.Timestamp("2024-01-01 00:30")]
+
+
+def test_rollup_skips_missing_candles():
+    data = candles("2024-01-01", 3).astype({"volume": object})
+    data.loc[1, "volume"] = "x"
+
+    result = rollup(data, "15m")
+
+    assert result["count"].tolist() == [2]
+    assert result["close"].iloc[0] == data["close"].iloc[2]
+
+
+def test_timeframes_and_buckets():
+    assert timeframe_to_ns("4h") == 4 * 3600 * 10**9
+    assert timeframe_to_ns("1d") == 86400 * 10**9
+
+    with pytest.raises(ValueError):
+        timeframe_to_ns("5x")
+    with pytest.raises(ValueError):
+        rollup(candles("2024-01-01", 3), "7m")
+
+    assert bucket_start(pd.Timestamp("2024-01-01 05:17"), "4h") == pd.Timestamp("2024-01-01 04:00")
+    assert tail_start(candles("2024-01-01 05:17", 2), ["15m", "1d"]) == pd.Timestamp("2024-01-01")
+    assert tail_start(candles("2024-01-01", 0), ["15m"]) is None
@@ -0,0 +1,131 @@
+import numpy as np
+import pandas as pd
+
+from src.core.models.time_index import CSVTimeIndex
+
+
+def candles(start: str, periods: int, close: float = 1.0) -> pd.DataFrame:
+    return pd.DataFrame({
+        "datetime": pd.date_range(start, periods=periods, freq="1h"),
+        "open": 1.0, "close": close, "max": 2.0, "min": 0.5,
+        "volume": np.arange(periods, dtype=float),
+    })
+
+
+def rebuilt_meta(path) -> dict:
+    index = CSVTimeIndex(path)
+    index.rebuild()
+    return {key: value for key, value in index.meta.items() if key not in ("size", "mtime_ns")}
+
+
+def assert_index_valid(index: CSVTimeIndex) -> None:
+    fresh = CSVTimeIndex(index.csv_path)
+    assert fresh.load()
+    meta = {key: value for key, value in fresh.meta.items() if key not in ("size", "mtime_ns")}
+    assert meta == rebuilt_meta(index.csv_path)
+
+
+def test_append_only_new_rows(tmp_path):
+    index = CSVTimeIndex(tmp_path / "BTC_1h.csv")
+    data = candles("2024-01-01", 60)
+    index.write(data.iloc[:48])
+
+    # Повторно отданная половина буфера и новые свечи
+    update = data.iloc[36:]
+    assert index.covers(update)
+    assert index.append(update) == 12
+
+    assert_index_valid(index)
+    assert len(index.read_range()) == 60
+    assert index.lookup(pd.Timestamp("2024-01-03 11:00"))["volume"] == 59.0
+
+
+def test_changed_row_rewrites_only_tail(tmp_path):
+    path = tmp_path / "BTC_1h.csv"
+    index = CSVTimeIndex(path)
+    index.write(candles("2024-01-01", 72))
+    before = path.read_bytes()
+    offset = index.meta["days"]["2024-01-02"][0]
+
+    # Открытая свеча 2024-01-02 05:00 пришла с итоговым close и новые свечи
+    update = candles("2024-01-02 05:00", 48, close=9.0)
+    changed = index.first_change(update)
+    assert changed == pd.Timestamp("2024-01-02 05:00")
+    assert not index.covers(update)
+
+    # Хвост - старые дни 01-02 и 01-03 (48 строк) и 5 новых свечей 01-04
+    assert index.rewrite_from(update, changed) == 48 + 5
+
+    after = path.read_bytes()
+    assert after[:offset] == before[:offset]
+
+    data = pd.read_csv(path, parse_dates=["datetime"])
+    assert len(data) == 72 + 5
+    assert data["datetime"].is_monotonic_increasing and data["datetime"].is_unique
+    assert data.set_index("datetime").loc["2024-01-02 04:00", "close"] == 1.0
+    assert (data.set_index("datetime").loc["2024-01-02 05:00":, "close"] == 9.0).all()
+
+    assert_index_valid(index)
+    assert index.read_range("2024-01-02 04:00", "2024-01-02 05:00")["close"].tolist() == [1.0, 9.0]
+
+
+def test_new_columns_are_not_covered_even_without_old_rows(tmp_path):
+    index = CSVTimeIndex(tmp_path / "BTC_1h.csv")
+    index.write(candles("2024-01-01", 24))
+
+    update = candles("2024-01-02", 5).assign(synthetic=True)
+
+    assert index.first_change(update) is None
+    assert not index.same_columns(update)
+    assert not index.covers(update)
+
+
+def test_unsorted_file_is_rewritten_sorted(tmp_path):
+    path = tmp_path / "BTC_1h.csv"
+    candles("2024-01-01", 24).iloc[::-1].to_csv(path, index=False)
+
+    index = CSVTimeIndex(path)
+    assert index.load() and not index.meta["sorted"]
+
+    update = candles("2024-01-01 10:00", 20, close=5.0)
+    changed = index.first_change(update)
+    assert index.rewrite_from(update, changed) == 30
+
+    data = pd.read_csv(path, parse_dates=["datetime"])
+    assert data["datetime"].is_monotonic_increasing and len(data) == 30
+    assert data["close"].tolist() == [1.0] * 10 + [5.0] * 20
+
+    assert index.meta["sorted"]
+    assert_index_valid(index)
+
+
+def test_midnight_append_keeps_datetime_format(tmp_path):
+    path = tmp_path / "BTC_1h.csv"
+    index = CSVTimeIndex(path)
+    data = candles("2024-01-01 12:00", 14)
+    index.write(data.iloc[:12])
+
+    # Дописывается только свеча 00:00 следующего дня
+    assert index.append(data.iloc[12:13]) == 1
+    assert path.read_text().splitlines()[-1].startswith("2024-01-02 00:00:00,")
+
+    reloaded = pd.to_datetime(pd.read_csv(path)["datetime"], format="%Y-%m-%d %H:%M:%S", errors="coerce")
+    assert reloaded.notna().all() and len(reloaded) == 13
+
+    # Повторно отданная полночь не считается изменением прошлого
+    assert index.first_change(data.iloc[12:]) is None
+    assert index.append(data.iloc[12:]) == 1
+    assert_index_valid(index)
+
+
+def test_daily_series_round_trip(tmp_path):
+    path = tmp_path / "BTC_1d.csv"
+    index = CSVTimeIndex(path)
+    data = candles("2024-01-01", 10).assign(datetime=pd.date_range("2024-01-01", periods=10, freq="1D"))
+
+    index.write(data.iloc[:5])
+    assert index.covers(data)
+    assert index.append(data) == 5
+
+    assert len(index.read_range()) == 10
+    assert index.meta["sorted"] and len(index.meta["days"]) == 10
@@ -0,0 +1,173 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from prometheus_client import REGISTRY
+
+from src.handlers.pipeline import Pipeline, Stage
+
+
+def items_total(pipeline: str, stage: str, status: str) -> float:
+    return REGISTRY.get_sample_value("parser_pipeline_items_total",
+                                     {"pipeline": pipeline, "stage": stage, "status": status}) or 0
+
+
+class Gate:
+    """Фейковая стадия: запоминает элементы и ждет open() перед ответом"""
+
+    def __init__(self, opened: bool = False) -> None:
+        self.event = asyncio.Event()
+        self.started = []
+        self.done = []
+        self.cancelled = 0
+
+        if opened:
+            self.event.set()
+
+    def open(self) -> None:
+        self.event.set()
+
+    async def __call__(self, item):
+        self.started.append(item)
+        try:
+            await self.event.wait()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+
+        self.done.append(item)
+        return item
+
+
+async def settle() -> None:
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+def test_full_queue_blocks_previous_stage():
+    async def scenario():
+        fetch = Gate(opened=True)
+        write = Gate()
+        pipeline = Pipeline("test_backpressure", [Stage("fetch", fetch, maxsize=1),
+                                                  Stage("write", write, maxsize=1)]).start()
+
+        # write держит 1-й элемент, 2-й лежит в его очереди, fetch ждет с 3-м, 4-й - в очереди fetch
+        for item in range(4):
+            await pipeline.put(item)
+        await settle()
+
+        put = asyncio.create_task(pipeline.put(4))
+        await settle()
+
+        assert write.started == [0]
+        assert fetch.done == [0, 1, 2]
+        assert not put.done()
+
+        write.open()
+        await put
+        await pipeline.join()
+
+        assert write.done == [0, 1, 2, 3, 4]
+        await pipeline.stop()
+
+    asyncio.run(scenario())
+
+
+def test_join_drains_every_stage():
+    results = []
+
+    async def double(item):
+        await asyncio.sleep(0)
+        # None дальше не передается
+        return None if item % 3 == 0 else item * 2
+
+    async def collect(item):
+        await asyncio.sleep(0)
+        results.append(item)
+
+    async def scenario():
+        async with Pipeline("test_join", [Stage("double", double, concurrency=3, maxsize=2),
+                                          Stage("collect", collect, concurrency=2, maxsize=2)]) as pipeline:
+            for item in range(30):
+                await pipeline.put(item)
+
+            await pipeline.join()
+            assert all(stage.queue.empty() for stage in pipeline.stages)
+            return list(results)
+
+    assert sorted(asyncio.run(scenario())) == [item * 2 for item in range(30) if item % 3]
+
+
+def test_stop_cancels_busy_and_idle_workers():
+    async def scenario():
+        gate = Gate()
+        pipeline = Pipeline("test_stop", [Stage("slow", gate, concurrency=2), Stage("idle", Gate())]).start()
+        workers = list(pipeline.workers)
+        assert len(workers) == 3
+
+        await pipeline.put("item")
+        await settle()
+        assert gate.started == ["item"]
+
+        await pipeline.stop()
+
+        assert all(worker.cancelled() for worker in workers)
+        assert gate.cancelled == 1 and gate.done == []
+        assert pipeline.workers == []
+
+        # После stop можно запустить заново
+        assert len(pipeline.start().workers) == 3
+        await pipeline.stop()
+
+    asyncio.run(scenario())
+
+
+def test_errors_are_counted_and_stage_keeps_working():
+    processed = []
+
+    async def parse(item):
+        if item % 2:
+            raise ValueError(f"bad item {item}")
+        return item
+
+    async def save(item):
+        processed.append(item)
+
+    async def scenario():
+        async with Pipeline("test_errors", [Stage("parse", parse), Stage("save", save)]) as pipeline:
+            for item in range(6):
+                await pipeline.put(item)
+            await pipeline.join()
+
+            assert not any(worker.done() for worker in pipeline.workers)
+
+    asyncio.run(scenario())
+
+    assert processed == [0, 2, 4]
+    assert items_total("test_errors", "parse", "error") == 3
+    assert items_total("test_errors", "parse", "ok") == 3
+    assert items_total("test_errors", "save", "ok") == 3
+
+
+def test_executor_stage_runs_sync_function():
+    async def scenario(executor):
+        results = []
+
+        async def collect(item):
+            results.append(item)
+
+        async with Pipeline("test_executor", [Stage("square", lambda item: item * item, executor=executor),
+                                              Stage("collect", collect)]) as pipeline:
+            for item in range(5):
+                await pipeline.put(item)
+            await pipeline.join()
+
+        return results
+
+    with ThreadPoolExecutor(2) as executor:
+        assert asyncio.run(scenario(executor)) == [0, 1, 4, 9, 16]
+
+
+def test_pipeline_needs_stages():
+    with pytest.raises(ValueError):
+        Pipeline("empty", [])
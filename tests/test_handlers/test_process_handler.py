@@ -0,0 +1,82 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.core.models.dataset import DatasetTimeseries
+from src.handlers.process_handler import Handler
+
+
+def candles(rows: int, freq: str, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    data = pd.DataFrame({
+        "datetime": pd.date_range("2024-01-01", periods=rows, freq=freq).strftime("%Y-%m-%d %H:%M:%S"),
+        **{column: np.round(rng.random(rows) * 100, 2) for column in ("open", "close", "max", "min")},
+        "volume": [f"{value:.1f}K" for value in rng.random(rows) * 10],
+    })
+    # Пропуск в середине - его заполняет fill_gaps с шагом таймфрейма
+    return data.drop(index=rows // 2).iloc[::-1]
+
+
+@pytest.fixture
+def launches(tmp_path: Path) -> Path:
+    # Выходы всех файлов - в одну папку data: ее создают несколько процессов сразу
+    for launch, seed in (("run1", 0), ("run2", 1)):
+        folder = tmp_path / "raw" / launch / "data"
+        folder.mkdir(parents=True)
+
+        for coin, timeframe, freq in (("BTC", "1h", "1h"), ("ETH", "4h", "4h"), ("SOL", "1d", "1D"),
+                                      ("XRP", "5m", "5min"), ("ADA", "15m", "15min")):
+            candles(48, freq, seed).to_csv(folder / f"{coin}_{timeframe}.csv", index=False)
+
+    return tmp_path / "raw"
+
+
+def outputs(folder: Path) -> dict:
+    return {file.name: pd.read_csv(file) for file in sorted((folder / "data").glob("clear_*.csv"))}
+
+
+def test_parallel_clear_matches_serial(launches, tmp_path, monkeypatch):
+    results = {}
+
+    for workers in (1, 4):
+        out = tmp_path / f"out_{workers}"
+        out.mkdir()
+        monkeypatch.chdir(out)
+
+        summary = Handler.clear_datasets([launches], workers=workers)
+
+        assert summary["files"] == 10 and summary["failed"] == 0
+        results[workers] = outputs(out)
+
+    assert list(results[1]) == [f"clear_{coin}.csv" for coin in ("ADA_15m", "BTC_1h", "ETH_4h", "SOL_1d", "XRP_5m")]
+
+    for name, data in results[1].items():
+        pd.testing.assert_frame_equal(results[4][name], data)
+
+
+@pytest.mark.parametrize("timeframe, freq", [("1h", "1h"), ("4h", "4h"), ("1d", "1D")])
+def test_clear_uses_timeframe_from_file_name(tmp_path, monkeypatch, timeframe, freq):
+    folder = tmp_path / "raw" / "data"
+    folder.mkdir(parents=True)
+    candles(48, freq, 0).to_csv(folder / f"BTC_{timeframe}.csv", index=False)
+    monkeypatch.chdir(tmp_path)
+
+    dataset = Handler.clear(str(folder / f"BTC_{timeframe}.csv"), save=False)
+
+    assert dataset.timetravel == timeframe
+    # Заполнен только один пропуск, а не свечи 5m между часовыми
+    assert len(dataset) == 48
+    assert dataset.get_dataset()["datetime"].diff().dropna().nunique() == 1
+
+
+def test_save_creates_missing_and_existing_output_folders(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    dataset = DatasetTimeseries(candles(10, "1h", 0), timetravel="1h")
+
+    for path_save in ("out/nested/data", "out/nested/data"):
+        dataset.set_path_save(path_save)
+        dataset.save_dataset("BTC_1h.csv")
+
+    assert len(pd.read_csv(tmp_path / "out" / "nested" / "data" / "BTC_1h.csv")) == 9
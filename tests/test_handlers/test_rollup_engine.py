@@ -0,0 +1,45 @@
+import asyncio
+
+import pandas as pd
+
+from src.handlers import rollup as rollup_module
+from src.handlers.rollup import RollupEngine
+
+
+def candles(start: str, closes: list) -> pd.DataFrame:
+    return pd.DataFrame({
+        "datetime": pd.date_range(start, periods=len(closes), freq="5min"),
+        "open": 1.0, "close": closes, "max": 10.0, "min": 0.5, "volume": 1.0,
+    })
+
+
+def test_update_rolls_up_resent_open_candle_from_fetched_frame(monkeypatch):
+    # В БД открытая свеча 00:10 осталась с close=2.0 (ON CONFLICT DO NOTHING)
+    stored = candles("2024-01-01 00:00", [1.0, 1.5, 2.0])
+    written = {}
+
+    async def get_frame(timeseries_id, since=None):
+        return stored[stored["datetime"] >= since].copy()
+
+    async def add_bulk(timeseries_id, data, upsert=False):
+        assert upsert
+        written[timeseries_id] = data
+        return len(data)
+
+    monkeypatch.setattr(rollup_module.CoinQuery, "get_data_timeseries_frame", get_frame)
+    monkeypatch.setattr(rollup_module.CoinQuery, "add_data_timeseries_bulk", add_bulk)
+
+    engine = RollupEngine("5m", ["15m"])
+    engine._timeseries[("BTC", "15m")] = 15
+
+    # Порция: закрытая 00:10 с итоговым close и новая открытая 00:15
+    fresh = candles("2024-01-01 00:10", [3.0, 4.0])
+    fresh["datetime"] = fresh["datetime"].astype(str)
+
+    result = asyncio.run(engine.update("BTC", fresh, base_timeseries_id=5))
+
+    assert result == {"15m": 2}
+    bars = written[15]
+    assert bars["close"].tolist() == [3.0, 4.0]
+    assert bars["count"].tolist() == [3, 1]
+    assert bars["complete"].tolist() == [True, False]
@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+
+from src.parser_driver.http_client import HttpClient, HttpClientError
+
+
+async def serve(status: int):
+    async def handler(request):
+        return web.json_response({"Data": []}, status=status)
+
+    app = web.Application()
+    app.router.add_get("/news", handler)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+
+    return runner, f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/news"
+
+
+def test_get_json_returns_body():
+    async def scenario():
+        runner, url = await serve(200)
+        client = HttpClient()
+        try:
+            return await client.get_json(url)
+        finally:
+            await client.close()
+            await runner.cleanup()
+
+    assert asyncio.run(scenario()) == {"Data": []}
+
+
+def test_get_json_raises_http_client_error():
+    async def scenario():
+        runner, url = await serve(429)
+        client = HttpClient()
+        try:
+            await client.get_json(url)
+        finally:
+            await client.close()
+            await runner.cleanup()
+
+    with pytest.raises(HttpClientError) as error:
+        asyncio.run(scenario())
+
+    assert error.value.status == 429 and error.value.url.endswith("/news")
@@ -0,0 +1,260 @@
+import asyncio
+import json
+from functools import partial
+
+import pytest
+import websockets
+
+from src.parser_driver.parsers.kucoin_stream import KuCoinCandleStream, KuCoinWsConnection, CANDLE_SUBJECT
+from src.handlers import att_parser
+from src.handlers.att_parser import AttParser
+
+
+class FakeKuCoinServer:
+    """Локальный websocket сервер: отвечает на ping, запоминает подписки и рассылает свечи"""
+
+    def __init__(self) -> None:
+        self.connections = []
+        self.paths = []
+        self.subscribed = []
+        self.unsubscribed = []
+        self.pings = 0
+        self.closed = 0
+
+    async def __aenter__(self) -> "FakeKuCoinServer":
+        self.server = await websockets.serve(self.handler, "127.0.0.1", 0)
+        self.url = f"ws://127.0.0.1:{self.server.sockets[0].getsockname()[1]}"
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def handler(self, socket) -> None:
+        self.connections.append(socket)
+        self.paths.append(socket.request.path)
+        await socket.send(json.dumps({"id": "welcome", "type": "welcome"}))
+
+        try:
+            async for raw in socket:
+                message = json.loads(raw)
+
+                if message["type"] == "ping":
+                    self.pings += 1
+                    await socket.send(json.dumps({"id": message["id"], "type": "pong"}))
+                else:
+                    getattr(self, f"{message['type']}d").append(message["topic"])
+                    await socket.send(json.dumps({"id": message["id"], "type": "ack"}))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self.connections.remove(socket)
+            self.closed += 1
+
+    def factory(self, connections: list, ping_interval: float = 18):
+        """ws_factory: настоящий KuCoinWsConnection, подключенный к этому серверу"""
+        async def create(loop, client, callback, private=False):
+            connection = await KuCoinWsConnection.connect(self.url, callback, ping_interval)
+            connections.append(connection)
+            return connection
+
+        return create
+
+    async def push(self, symbol: str, candle: list) -> None:
+        message = json.dumps({"type": "message", "topic": f"/market/candles:{symbol}_5min",
+                              "subject": CANDLE_SUBJECT, "data": {"symbol": symbol, "candles": candle}})
+        for socket in list(self.connections):
+            await socket.send(message)
+
+
+def candle(minute: int, close: float) -> list:
+    # time, open, close, high, low, amount, volume - как в обновлении KuCoin
+    return [str(1700000100 + minute * 60), "1.0", str(close), "2.0", "0.5", "10", "100"]
+
+
+async def wait_for(condition, timeout: float = 5) -> None:
+    async def poll():
+        while not condition():
+            await asyncio.sleep(0.01)
+
+    await asyncio.wait_for(poll(), timeout)
+
+
+def test_stream_decodes_candles_and_closes_client():
+    async def scenario():
+        received, clients = [], []
+
+        async def on_candle(coin, batch):
+            received.append((coin, batch))
+
+        async with FakeKuCoinServer() as server:
+            stream = KuCoinCandleStream(on_candle, ws_factory=server.factory(clients))
+            await stream.connect(["BTC", "ETH", "BTC_FUTURE"])
+
+            await wait_for(lambda: len(server.subscribed) == 1)
+            assert server.subscribed == ["/market/candles:BTC-USDT_5min,ETH-USDT_5min"]
+
+            await server.push("BTC-USDT", candle(0, 1.5))
+            await wait_for(lambda: received)
+
+            coin, batch = received[0]
+            assert coin == "BTC"
+            assert batch.close.tolist() == [1.5]
+            assert batch.volume.tolist() == [100.0]
+
+            await stream.close()
+            await wait_for(lambda: server.closed == 1)
+
+            assert server.unsubscribed == server.subscribed
+            assert stream.ws_client is None and not server.connections
+            assert clients[0].closed
+
+    asyncio.run(scenario())
+
+
+def test_stream_reconnect_replaces_connection():
+    async def scenario():
+        received, clients = [], []
+
+        async def on_candle(coin, batch):
+            received.append(coin)
+
+        async with FakeKuCoinServer() as server:
+            stream = KuCoinCandleStream(on_candle, stale_timeout=0.05,
+                                        ws_factory=server.factory(clients))
+            await stream.connect(["BTC"])
+
+            await asyncio.sleep(0.1)
+            assert stream.is_stale()
+
+            await stream.reconnect()
+            await wait_for(lambda: server.closed == 1 and len(server.subscribed) == 2)
+
+            # Старое соединение закрыто, открыто только новое
+            assert len(server.connections) == 1
+            assert stream.reconnects == 1 and stream.ws_client is clients[1]
+            assert clients[0].closed and not clients[1].closed
+
+            await server.push("BTC-USDT", candle(0, 1.0))
+            await wait_for(lambda: received)
+            assert received == ["BTC"] and not stream.is_stale()
+
+            await stream.close()
+
+    asyncio.run(scenario())
+
+
+def test_connection_pings_and_close_stops_its_tasks():
+    async def scenario():
+        received = []
+
+        async def callback(message):
+            received.append(message)
+
+        async with FakeKuCoinServer() as server:
+            connection = await KuCoinWsConnection.connect(server.url, callback, ping_interval=0.02)
+            await connection.subscribe("/market/candles:BTC-USDT_5min")
+
+            await wait_for(lambda: server.pings >= 2 and server.subscribed)
+            await server.push("BTC-USDT", candle(0, 1.0))
+            await wait_for(lambda: received)
+
+            # welcome, ack и pong до callback не доходят
+            assert [message["subject"] for message in received] == [CANDLE_SUBJECT]
+
+            other = asyncio.create_task(asyncio.sleep(10))
+            await connection.close()
+            await wait_for(lambda: server.closed == 1)
+
+            assert connection.closed and not other.done()
+            pings = server.pings
+            await asyncio.sleep(0.05)
+            assert server.pings == pings
+
+            await connection.close()
+            other.cancel()
+
+    asyncio.run(scenario())
+
+
+def test_create_connects_with_public_token():
+    class TokenApi:
+        def __init__(self, url):
+            self.url, self.private = url, None
+
+        def get_ws_token(self, private):
+            self.private = private
+            return {"token": "abc", "instanceServers": [{"endpoint": self.url, "pingInterval": 18000,
+                                                         "pingTimeout": 10000, "encrypt": False}]}
+
+    async def scenario():
+        async with FakeKuCoinServer() as server:
+            token_api = TokenApi(server.url)
+            connection = await KuCoinWsConnection.create(client=token_api, callback=None)
+            await wait_for(lambda: server.paths)
+
+            assert token_api.private is False and connection.ping_interval == 18
+            assert server.paths[0].startswith("/?token=abc&connectId=")
+
+            await connection.close()
+
+    asyncio.run(scenario())
+
+
+def test_att_parser_stream_writes_closed_candles_and_backfills_on_reconnect(monkeypatch):
+    async def scenario():
+        clients, backfills, buffered, written = [], [], [], []
+        stop = asyncio.Event()
+
+        async with FakeKuCoinServer() as server:
+            monkeypatch.setattr(att_parser, "KuCoinCandleStream",
+                                partial(KuCoinCandleStream, ws_factory=server.factory(clients)))
+            monkeypatch.setattr(att_parser, "STREAM_CHECK_INTERVAL", 0.02)
+            monkeypatch.setattr(att_parser, "STREAM_STALE_TIMEOUT", 0.3)
+
+            parser = AttParser(api=None, pause=0)
+            parser.coin_list = ["BTC", "BTC_FUTURE"]
+
+            async def add_buffer(coin, data, time_parser="5m", update_db=True):
+                buffered.append((coin, data.get_dataset(), update_db))
+
+            async def update_db(coin, dataset, time_parser):
+                written.append((coin, dataset.get_dataset()))
+
+            async def backfill(coin_last_datetimes, *args):
+                backfills.append(dict(coin_last_datetimes))
+                return []
+
+            parser.add_buffer_dataTimeseries = add_buffer
+            parser.update_db_timeseries = update_db
+
+            task = asyncio.create_task(parser.start_manager_kucoin_stream(
+                lambda **kwargs: not stop.is_set(), backfill, "5m", 0, "USDT"))
+
+            await wait_for(lambda: len(server.subscribed) == 1)
+            assert backfills == [{"BTC": None}]
+
+            # Тики открытой свечи, затем новая свеча - первая закрыта с последними значениями
+            for close in (1.0, 1.1, 1.2):
+                await server.push("BTC-USDT", candle(0, close))
+            await server.push("BTC-USDT", candle(5, 2.0))
+            await wait_for(lambda: written)
+
+            assert len(buffered) == 1 and buffered[0][2] is False
+            assert buffered[0][1]["close"].tolist() == [1.2, 2.0]
+
+            coin, closed = written[0]
+            assert coin == "BTC" and closed["close"].tolist() == [1.2]
+
+            # Тишина дольше stale_timeout - переподключение и догрузка через REST
+            await wait_for(lambda: len(backfills) == 2 and len(server.subscribed) == 2)
+            await wait_for(lambda: server.closed == 1)
+            assert len(server.connections) == 1
+
+            stop.set()
+            await asyncio.wait_for(task, 5)
+            await wait_for(lambda: not server.connections)
+
+            assert len(server.unsubscribed) == 2
+
+    asyncio.run(scenario())
@@ -0,0 +1,19 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from src.parser_driver.api import create_launch_dir
+
+
+def test_create_launch_dir_numbers_after_max(tmp_path):
+    os.mkdir(tmp_path / "launch_parser_3")
+    os.mkdir(tmp_path / "other_9")
+
+    assert create_launch_dir(str(tmp_path)) == str(tmp_path / "launch_parser_4")
+
+
+def test_concurrent_launch_dirs_are_distinct(tmp_path):
+    with ThreadPoolExecutor(16) as executor:
+        dirs = list(executor.map(lambda _: create_launch_dir(str(tmp_path)), range(64)))
+
+    assert len(set(dirs)) == 64
+    assert sorted(os.listdir(tmp_path)) == sorted(f"launch_parser_{n}" for n in range(1, 65))